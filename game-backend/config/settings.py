@@ -144,6 +144,36 @@ SERVER_DESCRIPTION = os.environ.get("SERVER_DESCRIPTION", "")
 SERVER_GAME_MODES_JSON = os.environ.get("SERVER_GAME_MODES", "{}")
 # Room config for multi-room support: max_rooms (int), capacity_per_room (int). Default checkers: 10 rooms, 2 players each.
 ROOM_CONFIG_JSON = os.environ.get("ROOM_CONFIG", '{"max_rooms": 10, "capacity_per_room": 2}')
+# Checkers board engine: "list" (8x8 list board, games.checkers) or "bitboard" (packed ints, games.bitboard).
+# Both produce the same WebSocket state, so this can be switched without client changes.
+CHECKERS_ENGINE = os.environ.get("CHECKERS_ENGINE", "list").strip().lower()
+# Where checkers room state lives: "memory" (this process only) or "redis" (shared by all workers and hosts,
+# needed when more than one worker serves the same rooms). Defaults to redis when REDIS_URL is set.
+CHECKERS_STATE_STORE = os.environ.get(
+    "CHECKERS_STATE_STORE", "redis" if _redis_url else "memory"
+).strip().lower()
+CHECKERS_STATE_REDIS_URL = _redis_url
+# Checkers room eviction: a room with no connections on this worker is dropped after CHECKERS_ROOM_IDLE_SECONDS
+# without activity, or earlier (least recently active first) while more than CHECKERS_MAX_ROOMS are held.
+# The sweeper runs every CHECKERS_ROOM_SWEEP_SECONDS.
+CHECKERS_ROOM_IDLE_SECONDS = int(os.environ.get("CHECKERS_ROOM_IDLE_SECONDS", "600"))
+CHECKERS_MAX_ROOMS = int(os.environ.get("CHECKERS_MAX_ROOMS", "1000"))
+CHECKERS_ROOM_SWEEP_SECONDS = float(os.environ.get("CHECKERS_ROOM_SWEEP_SECONDS", "30"))
+# Checkers bot (games.ai): seconds of search per move, deepest search, and search worker processes.
+CHECKERS_AI_TIME_BUDGET = float(os.environ.get("CHECKERS_AI_TIME_BUDGET", "1.0"))
+CHECKERS_AI_MAX_DEPTH = int(os.environ.get("CHECKERS_AI_MAX_DEPTH", "32"))
+CHECKERS_AI_WORKERS = int(os.environ.get("CHECKERS_AI_WORKERS", "2"))
+# Matchmaker HTTP client: keep-alive connections shared by all calls, and timeout (seconds) for connecting,
+# reading and waiting for a free connection.
+MATCHMAKER_HTTP_MAX_CONNECTIONS = int(os.environ.get("MATCHMAKER_HTTP_MAX_CONNECTIONS", "8"))
+MATCHMAKER_HTTP_TIMEOUT = float(os.environ.get("MATCHMAKER_HTTP_TIMEOUT", "5"))
+# Heartbeats are collected in memory and sent to the matchmaker as one batch every this many seconds.
+MATCHMAKER_ACTIVITY_FLUSH_SECONDS = float(os.environ.get("MATCHMAKER_ACTIVITY_FLUSH_SECONDS", "1"))
+# Room status push to the matchmaker: sent this long after a room change (so bursts go out once), then
+# repeated every KEEPALIVE seconds while idle; failed pushes are retried after RETRY seconds.
+MATCHMAKER_STATUS_DEBOUNCE_SECONDS = float(os.environ.get("MATCHMAKER_STATUS_DEBOUNCE_SECONDS", "0.25"))
+MATCHMAKER_STATUS_KEEPALIVE_SECONDS = float(os.environ.get("MATCHMAKER_STATUS_KEEPALIVE_SECONDS", "60"))
+MATCHMAKER_STATUS_RETRY_SECONDS = float(os.environ.get("MATCHMAKER_STATUS_RETRY_SECONDS", "5"))
 # Port this game server is running on (e.g. 8001).
 SERVER_PORT = os.environ.get("SERVER_PORT", "8001")
 # URL of the game frontend (client) for this server; used for Join links. No default.
@@ -0,0 +1,198 @@
+"""
+Checkers bot: picks a move for a seat with no human player.
+
+choose_move runs an iterative-deepening alpha-beta (negamax) search on a games.checkers list board, using
+in-place make_path/unmake_path and a transposition table keyed by Zobrist hash. Each deeper iteration
+starts from the previous best move; when the time budget runs out the unfinished iteration is dropped and
+the last completed one answers. Moves are whole capture chains, so every ply alternates the side to move.
+
+The search is CPU-bound, so the consumer calls choose_move_async, which runs it in a process pool
+(CHECKERS_AI_WORKERS processes) and keeps the event loop free. choose_move only takes and returns plain
+lists/tuples so it pickles cheaply.
+"""
+import asyncio
+import atexit
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from . import checkers
+
+WIN_SCORE = 100_000
+MAN_VALUE = 100
+KING_VALUE = 160
+# Per row advanced towards the crowning row.
+ADVANCE_VALUE = 2
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+# Check the clock every this many nodes.
+_CLOCK_INTERVAL = 1024
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def evaluate(board) -> int:
+    """Static score from black's point of view: material plus a small bonus for advanced men."""
+    score = 0
+    for row in range(checkers.BOARD_SIZE):
+        for piece in board[row]:
+            if piece == checkers.BLACK:
+                score += MAN_VALUE + ADVANCE_VALUE * row
+            elif piece == checkers.RED:
+                score -= MAN_VALUE + ADVANCE_VALUE * (checkers.BOARD_SIZE - 1 - row)
+            elif piece == checkers.BLACK_KING:
+                score += KING_VALUE
+            elif piece == checkers.RED_KING:
+                score -= KING_VALUE
+    return score
+
+
+def legal_paths(board, color, start=None) -> list[tuple]:
+    """Every legal move for color as a path of squares: whole capture chains when a jump is available,
+    otherwise single steps. start restricts moves to one piece (a pending must_continue)."""
+    paths = checkers.get_capture_paths(board, color)
+    if not paths:
+        paths = [((fr, fc), (tr, tc)) for fr, fc, tr, tc, _ in checkers.get_all_moves(board, color)]
+    if start:
+        paths = [p for p in paths if p[0] == start]
+    return paths
+
+
+class _Search:
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.nodes = 0
+        # hash -> (depth, score, bound, best path)
+        self.table: dict[int, tuple] = {}
+
+    def negamax(self, board, color, h, depth, alpha, beta, ply) -> int:
+        self.nodes += 1
+        if self.nodes % _CLOCK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise _OutOfTime
+
+        entry = self.table.get(h)
+        best_first = None
+        if entry is not None:
+            entry_depth, entry_score, bound, best_first = entry
+            if entry_depth >= depth:
+                if bound == _EXACT:
+                    return entry_score
+                if bound == _LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == _UPPER and entry_score <= alpha:
+                    return entry_score
+
+        paths = legal_paths(board, color)
+        if not paths:
+            return -WIN_SCORE + ply
+        if depth <= 0:
+            score = evaluate(board)
+            return score if color == "black" else -score
+        if best_first in paths:
+            paths.remove(best_first)
+            paths.insert(0, best_first)
+
+        original_alpha = alpha
+        opponent = "red" if color == "black" else "black"
+        best_score = -WIN_SCORE - 1
+        best_path = paths[0]
+        for path in paths:
+            undos = checkers.make_path(board, path)
+            score = -self.negamax(
+                board, opponent, checkers.zobrist_update(h, board, undos), depth - 1, -beta, -alpha, ply + 1,
+            )
+            checkers.unmake_path(board, undos)
+            if score > best_score:
+                best_score, best_path = score, path
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = _UPPER
+        elif best_score >= beta:
+            bound = _LOWER
+        else:
+            bound = _EXACT
+        self.table[h] = (depth, best_score, bound, best_path)
+        return best_score
+
+    def root(self, board, color, h, depth, paths) -> tuple[int, tuple]:
+        opponent = "red" if color == "black" else "black"
+        alpha = -WIN_SCORE - 1
+        best_path = paths[0]
+        for path in paths:
+            undos = checkers.make_path(board, path)
+            score = -self.negamax(
+                board, opponent, checkers.zobrist_update(h, board, undos), depth - 1, -WIN_SCORE - 1, -alpha, 1,
+            )
+            checkers.unmake_path(board, undos)
+            if score > alpha:
+                alpha, best_path = score, path
+        return alpha, best_path
+
+
+def choose_move(board_state, color: str, time_budget: float, max_depth: int = 32, must_continue=None):
+    """Pick a move for color on a board in board_to_state shape. Returns a path (tuple of (row, col)) or None
+    when color has no legal move. Searches deeper until time_budget seconds have passed, max_depth is
+    reached, or a forced win or loss is found."""
+    board = [list(row) for row in board_state]
+    start = tuple(must_continue) if must_continue else None
+    paths = legal_paths(board, color, start)
+    if len(paths) <= 1:
+        return paths[0] if paths else None
+
+    search = _Search(time.monotonic() + time_budget)
+    h = checkers.zobrist_hash(board, color)
+    best = paths[0]
+    for depth in range(1, max_depth + 1):
+        ordered = [best] + [p for p in paths if p != best]
+        try:
+            score, best = search.root(board, color, h, depth, ordered)
+        except _OutOfTime:
+            break
+        if abs(score) >= WIN_SCORE - max_depth:
+            break
+    return best
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process-wide search pool, created on first use and shut down at interpreter exit. Workers are spawned
+    rather than forked, since the server process already runs threads (matchmaker pollers, the event loop)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "CHECKERS_AI_WORKERS", 2),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        atexit.register(_shutdown_pool)
+    return _pool
+
+
+def _shutdown_pool() -> None:
+    """Stop the search workers, dropping searches that have not started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def choose_move_async(board_state, color: str, must_continue=None):
+    """choose_move in the search pool with the configured CHECKERS_AI_TIME_BUDGET and CHECKERS_AI_MAX_DEPTH."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_pool(),
+        choose_move,
+        board_state,
+        color,
+        float(getattr(settings, "CHECKERS_AI_TIME_BUDGET", 1.0)),
+        int(getattr(settings, "CHECKERS_AI_MAX_DEPTH", 32)),
+        must_continue,
+    )
@@ -1,6 +1,6 @@
 from django.apps import AppConfig
 
-from .matchmaker_client import start_online_users_poller, start_status_poller
+from .matchmaker_client import start_activity_flusher, start_online_users_poller, start_status_poller
 from .room_registry import get_all_rooms_snapshot
 
 
@@ -11,4 +11,5 @@ class GamesConfig(AppConfig):
 
     def ready(self):
         start_online_users_poller()
+        start_activity_flusher()
         start_status_poller(get_rooms_callback=get_all_rooms_snapshot)
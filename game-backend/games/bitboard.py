@@ -0,0 +1,301 @@
+"""
+Bitboard checkers engine. Same rules and API as games.checkers, but the board is packed
+into three 32-bit integers (black pieces, red pieces, kings) over the playable dark squares.
+Square index = row * 4 + col // 2, so bit order is row-major like the list board.
+Moves are generated for all pieces at once with precomputed per-direction shift masks.
+"""
+from typing import NamedTuple
+
+from .checkers import BLACK, BLACK_KING, BOARD_SIZE, EMPTY, RED, RED_KING
+
+SQUARES = 32
+FULL = (1 << SQUARES) - 1
+
+# Same order as games.checkers so generated move lists match: down-left, down-right, up-left, up-right.
+DIRECTIONS = ((1, -1), (1, 1), (-1, -1), (-1, 1))
+BLACK_FORWARD = (0, 1)
+RED_FORWARD = (2, 3)
+
+BLACK_START = 0x00000FFF  # rows 0-2
+RED_START = 0xFFF00000  # rows 5-7
+BLACK_KING_ROW = 0xF0000000  # row 7
+RED_KING_ROW = 0x0000000F  # row 0
+
+
+class BitBoard(NamedTuple):
+    black: int
+    red: int
+    kings: int
+
+
+def _coords(sq: int) -> tuple[int, int]:
+    row = sq // 4
+    return row, 2 * (sq % 4) + (1 if row % 2 == 0 else 0)
+
+
+def _square(row: int, col: int) -> int:
+    return row * 4 + col // 2
+
+
+def _is_dark(row: int, col: int) -> bool:
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE and (row + col) % 2 == 1
+
+
+def _build_masks():
+    """Per direction: [(shift, source_mask)] for steps and [(mid_shift, land_shift, source_mask)] for jumps.
+    The index delta to a diagonal neighbour depends on row parity, so each direction has several groups."""
+    steps = []
+    jumps = []
+    for dr, dc in DIRECTIONS:
+        step_groups: dict[int, int] = {}
+        jump_groups: dict[tuple[int, int], int] = {}
+        for sq in range(SQUARES):
+            row, col = _coords(sq)
+            if _is_dark(row + dr, col + dc):
+                mid = _square(row + dr, col + dc)
+                step_groups[mid - sq] = step_groups.get(mid - sq, 0) | (1 << sq)
+                if _is_dark(row + 2 * dr, col + 2 * dc):
+                    land = _square(row + 2 * dr, col + 2 * dc)
+                    key = (mid - sq, land - sq)
+                    jump_groups[key] = jump_groups.get(key, 0) | (1 << sq)
+        steps.append(tuple(step_groups.items()))
+        jumps.append(tuple((m, l, mask) for (m, l), mask in jump_groups.items()))
+    return tuple(steps), tuple(jumps)
+
+
+_STEP_MASKS, _JUMP_MASKS = _build_masks()
+_COORDS = tuple(_coords(sq) for sq in range(SQUARES))
+
+
+def _shift(bits: int, n: int) -> int:
+    return ((bits << n) & FULL) if n >= 0 else (bits >> -n)
+
+
+def _bits(bits: int):
+    """Yield set square indexes in ascending (row-major) order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def initial_board() -> BitBoard:
+    return BitBoard(BLACK_START, RED_START, 0)
+
+
+def board_from_state(state) -> BitBoard:
+    """Build a BitBoard from the board_to_state JSON shape (or a games.checkers list board)."""
+    black = red = kings = 0
+    for sq in range(SQUARES):
+        row, col = _COORDS[sq]
+        piece = state[row][col]
+        bit = 1 << sq
+        if piece in (BLACK, BLACK_KING):
+            black |= bit
+        elif piece in (RED, RED_KING):
+            red |= bit
+        if piece in (BLACK_KING, RED_KING):
+            kings |= bit
+    return BitBoard(black, red, kings)
+
+
+def board_to_state(bb: BitBoard):
+    """Serialize board for JSON; same shape as games.checkers.board_to_state."""
+    board = [[EMPTY] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+    for sq in _bits(bb.black | bb.red):
+        row, col = _COORDS[sq]
+        bit = 1 << sq
+        if bb.black & bit:
+            board[row][col] = BLACK_KING if bb.kings & bit else BLACK
+        else:
+            board[row][col] = RED_KING if bb.kings & bit else RED
+    return board
+
+
+def get_piece(bb: BitBoard, row: int, col: int) -> int:
+    """Return the games.checkers piece constant on (row, col)."""
+    if not _is_dark(row, col):
+        return EMPTY
+    bit = 1 << _square(row, col)
+    if bb.black & bit:
+        return BLACK_KING if bb.kings & bit else BLACK
+    if bb.red & bit:
+        return RED_KING if bb.kings & bit else RED
+    return EMPTY
+
+
+def _sides(bb: BitBoard, color: str) -> tuple[int, int, tuple[int, int]]:
+    if color == "black":
+        return bb.black, bb.red, BLACK_FORWARD
+    return bb.red, bb.black, RED_FORWARD
+
+
+def _movers(own: int, kings: int, forward: tuple[int, int], d: int) -> int:
+    return own if d in forward else own & kings
+
+
+def _jump_sources(bb: BitBoard, color: str) -> list[int]:
+    """Per direction, bitset of own pieces that can capture in that direction."""
+    own, opp, forward = _sides(bb, color)
+    empty = ~(bb.black | bb.red) & FULL
+    sources = []
+    for d in range(4):
+        movers = _movers(own, bb.kings, forward, d)
+        src = 0
+        for mid_shift, land_shift, mask in _JUMP_MASKS[d]:
+            src |= movers & mask & _shift(opp, -mid_shift) & _shift(empty, -land_shift)
+        sources.append(src)
+    return sources
+
+
+def _step_sources(bb: BitBoard, color: str) -> list[int]:
+    """Per direction, bitset of own pieces that can make a simple move in that direction."""
+    own, _, forward = _sides(bb, color)
+    empty = ~(bb.black | bb.red) & FULL
+    sources = []
+    for d in range(4):
+        movers = _movers(own, bb.kings, forward, d)
+        src = 0
+        for shift, mask in _STEP_MASKS[d]:
+            src |= movers & mask & _shift(empty, -shift)
+        sources.append(src)
+    return sources
+
+
+def _collect(sources: list[int], distance: int, is_jump: bool) -> list[tuple]:
+    moves = []
+    for sq in _bits(sources[0] | sources[1] | sources[2] | sources[3]):
+        row, col = _COORDS[sq]
+        bit = 1 << sq
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            if sources[d] & bit:
+                moves.append((row, col, row + distance * dr, col + distance * dc, is_jump))
+    return moves
+
+
+def must_jump(bb: BitBoard, color: str) -> bool:
+    """Check if any piece of this color has a mandatory jump."""
+    return any(_jump_sources(bb, color))
+
+
+def get_all_moves(bb: BitBoard, color: str) -> list[tuple]:
+    """Return all valid moves for color as (from_row, from_col, to_row, to_col, is_jump). Jumps are mandatory."""
+    jumps = _jump_sources(bb, color)
+    if any(jumps):
+        return _collect(jumps, 2, True)
+    return _collect(_step_sources(bb, color), 1, False)
+
+
+def has_any_move(bb: BitBoard, color: str) -> bool:
+    return any(_jump_sources(bb, color)) or any(_step_sources(bb, color))
+
+
+def _piece_color(bb: BitBoard, bit: int) -> str | None:
+    if bb.black & bit:
+        return "black"
+    if bb.red & bit:
+        return "red"
+    return None
+
+
+def get_valid_moves(bb: BitBoard, row: int, col: int) -> list[tuple[int, int]]:
+    """Return list of (to_row, to_col) for valid non-jump moves from (row, col)."""
+    if not _is_dark(row, col):
+        return []
+    bit = 1 << _square(row, col)
+    color = _piece_color(bb, bit)
+    if color is None:
+        return []
+    sources = _step_sources(bb, color)
+    return [(row + dr, col + dc) for d, (dr, dc) in enumerate(DIRECTIONS) if sources[d] & bit]
+
+
+def get_valid_jumps(bb: BitBoard, row: int, col: int) -> list[tuple[int, int, int, int]]:
+    """Return list of (to_row, to_col, jump_row, jump_col) for valid jumps."""
+    if not _is_dark(row, col):
+        return []
+    bit = 1 << _square(row, col)
+    color = _piece_color(bb, bit)
+    if color is None:
+        return []
+    sources = _jump_sources(bb, color)
+    return [
+        (row + 2 * dr, col + 2 * dc, row + dr, col + dc)
+        for d, (dr, dc) in enumerate(DIRECTIONS)
+        if sources[d] & bit
+    ]
+
+
+def apply_move(bb: BitBoard, from_row, from_col, to_row, to_col):
+    """Apply a move. Returns new board and captured (jump_row, jump_col) or None."""
+    from_bit = 1 << _square(from_row, from_col)
+    to_bit = 1 << _square(to_row, to_col)
+    black, red, kings = bb
+    is_king = kings & from_bit
+    kings &= ~from_bit
+    if black & from_bit:
+        black = (black & ~from_bit) | to_bit
+        if is_king or to_bit & BLACK_KING_ROW:
+            kings |= to_bit
+    else:
+        red = (red & ~from_bit) | to_bit
+        if is_king or to_bit & RED_KING_ROW:
+            kings |= to_bit
+    jump = None
+    if abs(to_row - from_row) == 2:
+        jump = ((from_row + to_row) // 2, (from_col + to_col) // 2)
+        mid_bit = 1 << _square(*jump)
+        black &= ~mid_bit
+        red &= ~mid_bit
+        kings &= ~mid_bit
+    return BitBoard(black, red, kings), jump
+
+
+def _extend_capture_path(bb: BitBoard, path: list, paths: list) -> None:
+    row, col = path[-1]
+    jumps = get_valid_jumps(bb, row, col)
+    if not jumps:
+        paths.append(tuple(path))
+        return
+    piece = get_piece(bb, row, col)
+    for jr, jc, _, _ in jumps:
+        new_bb, _ = apply_move(bb, row, col, jr, jc)
+        if get_piece(new_bb, jr, jc) != piece:
+            # Crowning ends the move, even if the new king could jump again.
+            paths.append(tuple(path + [(jr, jc)]))
+        else:
+            _extend_capture_path(new_bb, path + [(jr, jc)], paths)
+
+
+def get_capture_paths(bb: BitBoard, color: str) -> list[tuple]:
+    """Return every complete capture sequence for color as a tuple of (row, col) squares, start first.
+    A chain continues while the piece can jump again and stops when a man is crowned. Empty if no jumps."""
+    sources = _jump_sources(bb, color)
+    paths: list[tuple] = []
+    for sq in _bits(sources[0] | sources[1] | sources[2] | sources[3]):
+        _extend_capture_path(bb, [_COORDS[sq]], paths)
+    return paths
+
+
+def apply_path(bb: BitBoard, path):
+    """Apply a move given as a sequence of squares (one step, or a chain of jumps).
+    Returns new board and list of captured (jump_row, jump_col)."""
+    captured = []
+    for (fr, fc), (tr, tc) in zip(path, path[1:]):
+        bb, jump = apply_move(bb, fr, fc, tr, tc)
+        if jump:
+            captured.append(jump)
+    return bb, captured
+
+
+def check_winner(bb: BitBoard):
+    """Return 'black', 'red', or None."""
+    if not bb.black:
+        return "red"
+    if not bb.red:
+        return "black"
+    if not has_any_move(bb, "black"):
+        return "red"
+    if not has_any_move(bb, "red"):
+        return "black"
+    return None
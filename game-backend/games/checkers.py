@@ -2,6 +2,7 @@
 Checkers game logic. English rules: 8x8 board, black moves first.
 Board coordinates: row 0 at top, col 0 at left. Black starts at top (rows 0-2).
 """
+import random
 
 # Piece types
 EMPTY = 0
@@ -39,6 +40,10 @@ def is_king(piece):
     return piece in (BLACK_KING, RED_KING)
 
 
+def get_piece(board, row, col):
+    return board[row][col]
+
+
 def get_owner(piece):
     if is_black(piece):
         return "black"
@@ -126,22 +131,88 @@ def get_all_moves(board, color):
     return moves
 
 
-def apply_move(board, from_row, from_col, to_row, to_col):
-    """Apply a move. Returns new board and captured (jump_row, jump_col) or None."""
-    new_board = [row[:] for row in board]
-    piece = new_board[from_row][from_col]
-    new_board[from_row][from_col] = EMPTY
-    new_board[to_row][to_col] = piece
+def make_move(board, from_row, from_col, to_row, to_col):
+    """Apply a move in place, without copying the board. Returns an undo record for unmake_move:
+    (from_row, from_col, to_row, to_col, piece, jump, captured_piece), where piece is the mover before any
+    promotion and jump is the captured (row, col) or None. Only use on boards you own (not shared room state)."""
+    piece = board[from_row][from_col]
+    board[from_row][from_col] = EMPTY
+    board[to_row][to_col] = piece
     jump = None
+    captured_piece = EMPTY
     if abs(to_row - from_row) == 2:
         jump = ((from_row + to_row) // 2, (from_col + to_col) // 2)
-        new_board[jump[0]][jump[1]] = EMPTY
+        captured_piece = board[jump[0]][jump[1]]
+        board[jump[0]][jump[1]] = EMPTY
     # Promote to king
     if piece == BLACK and to_row == BOARD_SIZE - 1:
-        new_board[to_row][to_col] = BLACK_KING
+        board[to_row][to_col] = BLACK_KING
     elif piece == RED and to_row == 0:
-        new_board[to_row][to_col] = RED_KING
-    return new_board, jump
+        board[to_row][to_col] = RED_KING
+    return (from_row, from_col, to_row, to_col, piece, jump, captured_piece)
+
+
+def unmake_move(board, undo):
+    """Revert a make_move in place using its undo record (also undoes promotion)."""
+    from_row, from_col, to_row, to_col, piece, jump, captured_piece = undo
+    board[to_row][to_col] = EMPTY
+    board[from_row][from_col] = piece
+    if jump:
+        board[jump[0]][jump[1]] = captured_piece
+
+
+def make_path(board, path):
+    """Apply a step or capture chain in place. Returns the undo records, to pass to unmake_path."""
+    return [make_move(board, fr, fc, tr, tc) for (fr, fc), (tr, tc) in zip(path, path[1:])]
+
+
+def unmake_path(board, undos):
+    for undo in reversed(undos):
+        unmake_move(board, undo)
+
+
+def apply_move(board, from_row, from_col, to_row, to_col):
+    """Apply a move. Returns new board and captured (jump_row, jump_col) or None."""
+    new_board = [row[:] for row in board]
+    undo = make_move(new_board, from_row, from_col, to_row, to_col)
+    return new_board, undo[5]
+
+
+def _extend_capture_path(board, path, paths):
+    row, col = path[-1]
+    jumps = get_valid_jumps(board, row, col)
+    if not jumps:
+        paths.append(tuple(path))
+        return
+    for jr, jc, _, _ in jumps:
+        undo = make_move(board, row, col, jr, jc)
+        if board[jr][jc] != undo[4]:
+            # Crowning ends the move, even if the new king could jump again.
+            paths.append(tuple(path + [(jr, jc)]))
+        else:
+            _extend_capture_path(board, path + [(jr, jc)], paths)
+        unmake_move(board, undo)
+
+
+def get_capture_paths(board, color):
+    """Return every complete capture sequence for color as a tuple of (row, col) squares, start first.
+    A chain continues while the piece can jump again and stops when a man is crowned. Empty if no jumps."""
+    moves = get_all_moves(board, color)
+    if not moves or not moves[0][4]:
+        return []
+    paths = []
+    scratch = [row[:] for row in board]
+    for start in dict.fromkeys((fr, fc) for fr, fc, _, _, _ in moves):
+        _extend_capture_path(scratch, [start], paths)
+    return paths
+
+
+def apply_path(board, path):
+    """Apply a move given as a sequence of squares (one step, or a chain of jumps).
+    Returns new board and list of captured (jump_row, jump_col)."""
+    new_board = [row[:] for row in board]
+    undos = make_path(new_board, path)
+    return new_board, [undo[5] for undo in undos if undo[5]]
 
 
 def check_winner(board):
@@ -172,6 +243,59 @@ def check_winner(board):
     return None
 
 
+# Zobrist keys: one random 64-bit key per (piece, square) plus one for "red to move". Seeded, so every
+# process (search workers, other Daphne workers) computes the same hash for the same position.
+_ZOBRIST_RANDOM = random.Random(0x5EED_C4EC)
+ZOBRIST_PIECES = [
+    [[_ZOBRIST_RANDOM.getrandbits(64) if piece != EMPTY else 0 for _ in range(BOARD_SIZE)]
+     for _ in range(BOARD_SIZE)]
+    for piece in range(RED_KING + 1)
+]
+ZOBRIST_RED_TO_MOVE = _ZOBRIST_RANDOM.getrandbits(64)
+
+
+def zobrist_hash(board, color):
+    """Full 64-bit Zobrist hash of a position (board plus side to move)."""
+    h = ZOBRIST_RED_TO_MOVE if color == "red" else 0
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            piece = board[row][col]
+            if piece != EMPTY:
+                h ^= ZOBRIST_PIECES[piece][row][col]
+    return h
+
+
+def zobrist_update(h, board, undos):
+    """Hash after a move, from the hash before it: board has the move applied (make_path) and undos are
+    its undo records. Flips the side to move. Only the squares the move touched are read."""
+    first, last = undos[0], undos[-1]
+    from_row, from_col, piece = first[0], first[1], first[4]
+    to_row, to_col = last[2], last[3]
+    h ^= ZOBRIST_PIECES[piece][from_row][from_col]
+    h ^= ZOBRIST_PIECES[board[to_row][to_col]][to_row][to_col]
+    for undo in undos:
+        jump = undo[5]
+        if jump:
+            h ^= ZOBRIST_PIECES[undo[6]][jump[0]][jump[1]]
+    return h ^ ZOBRIST_RED_TO_MOVE
+
+
+def zobrist_move(h, path, piece, moved, captured, turn_passes=True):
+    """Hash after a move, for boards of any engine: path is its squares, piece the mover before and moved
+    the mover after promotion, captured a list of ((row, col), piece). Flips the side to move if turn_passes."""
+    (from_row, from_col), (to_row, to_col) = path[0], path[-1]
+    h ^= ZOBRIST_PIECES[piece][from_row][from_col] ^ ZOBRIST_PIECES[moved][to_row][to_col]
+    for (row, col), captured_piece in captured:
+        h ^= ZOBRIST_PIECES[captured_piece][row][col]
+    return h ^ ZOBRIST_RED_TO_MOVE if turn_passes else h
+
+
+# Draw rules: the same position (with the same side to move) seen three times, or 40 moves by each
+# side without a capture.
+REPETITION_LIMIT = 3
+NO_CAPTURE_PLY_LIMIT = 80
+
+
 def board_to_state(board):
     """Serialize board for JSON."""
     return [[int(p) for p in row] for row in board]
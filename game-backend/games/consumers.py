@@ -1,47 +1,577 @@
 """
 WebSocket consumer for checkers game. Supports multiple rooms; room_id from query string.
 First user to join a room is black, second is red. Sends "identify" with user_id to report to matchmaker.
+
+Moves are sent either one hop at a time, { type: "move", from: [r, c], to: [r, c] } (multi-captures then go
+through mustContinue), or as a whole capture chain, { type: "move", path: [ [r, c], [r, c], ... ] }, which
+must be one of the side to move's "validPaths" (when no capture is available, a two-square path is a step).
+
+Every position has a monotonically increasing "version". Clients that connect with ?protocol=delta get a full
+"state" snapshot on join and reset, then per-move "delta" messages:
+{ type: "delta", version, baseVersion, changes: [ [row, col, piece], ... ], captured: [ [row, col], ... ],
+  promoted, currentTurn, winner, mustContinue, myColor, validMoves, validPaths }.
+A delta applies only on top of baseVersion; on a gap the server sends a full snapshot instead, and a client
+can always ask for one with { type: "resync" }.
+
+Positions and seats live in the state store (games.state_store), so the players of a room may be connected
+to different workers. Moves are committed with compare-and-set on version.
+
+Positions carry a Zobrist hash and the history of hashes since the last irreversible move, so a game is
+drawn (winner "draw") on the third repetition of a position or after 40 moves by each side without a
+capture. A finished room is evicted when its last player leaves.
+
+Other rooms are evicted by a background sweeper once they have no connections on this process and have been
+idle for CHECKERS_ROOM_IDLE_SECONDS, or least recently active first while more than CHECKERS_MAX_ROOMS are held.
+room_gauges() reports rooms and approximate bytes held.
+
+Within a process, moves and resets for a room go through that room's RoomActor: one task applies them in
+order, so handlers never interleave across awaits, and a burst of queued moves is committed and broadcast once.
+
+{ type: "add_bot" } seats a bot (games.ai) in the first free seat. The bot is driven by the RoomActor of the
+worker that seated it: whenever the room's position changes and it is the bot's turn, it searches in the AI
+process pool and submits its move through the actor like any player. The bot leaves with that worker's last
+connection to the room.
 """
+import asyncio
 import json
+import logging
+import random
+import sys
+import time
+from collections import OrderedDict
 from urllib.parse import parse_qs
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
 from django.conf import settings
 
-from .checkers import (
-    apply_move,
-    board_to_state,
-    check_winner,
-    get_all_moves,
-    initial_board,
+from . import ai, bitboard, checkers
+from .room_registry import (
+    add_player_to_room,
+    remove_player_from_room,
+    room_count,
+    unregister_room,
+    unregister_room_if_empty,
 )
-from .room_registry import add_player_to_room, remove_player_from_room, unregister_room
+from .room_state import RoomState
+from .state_store import get_state_store
+
+logger = logging.getLogger(__name__)
 
 CHECKERS_GROUP_PREFIX = "checkers_game_"
 
-# room_id -> game state dict
-_game_states: dict[str, dict] = {}
+# Start square plus at most 12 captures.
+_MAX_PATH_SQUARES = 13
+
+# Seat value used for the bot instead of a channel name.
+BOT_CHANNEL = "checkers.bot"
+
+_INITIAL_HASH = checkers.zobrist_hash(checkers.initial_board(), "black")
+
+# room_id -> this process's view of the room (RoomState: the stored position, packed, plus per-position
+# caches). Refreshed from the state store by _load_state.
+_game_states: dict[str, RoomState] = {}
 
 
 def _get_room_group(room_id: str) -> str:
     return f"{CHECKERS_GROUP_PREFIX}{room_id}"
 
 
-def _get_state(room_id: str) -> dict:
-    global _game_states
-    if room_id not in _game_states:
-        from .checkers import initial_board
-        _game_states[room_id] = {
-            "board": initial_board(),
-            "current_turn": "black",
-            "black_channel": None,
-            "red_channel": None,
-            "black_user_id": None,
-            "red_user_id": None,
-            "winner": None,
-            "must_continue": None,
-        }
-    return _game_states[room_id]
+def _engine():
+    """Board engine selected by CHECKERS_ENGINE: "list" (games.checkers) or "bitboard" (games.bitboard).
+    Both expose the same functions and serialize to the same board_to_state shape."""
+    if getattr(settings, "CHECKERS_ENGINE", "list") == "bitboard":
+        return bitboard
+    return checkers
+
+
+def _store():
+    # Room states keep packed boards, so the store decodes straight to BitBoards.
+    return get_state_store(bitboard)
+
+
+def _new_position(version: int = 0) -> dict:
+    return RoomState(bitboard.initial_board(), "black", version=version, hash=_INITIAL_HASH).position()
+
+
+async def _load_state(room_id: str) -> RoomState:
+    """Return this process's view of a room, refreshed from the state store (the room is created if missing).
+    Cached legal moves and frames are kept while the stored version still matches the local one."""
+    store = _store()
+    position = await store.load(room_id)
+    if position is None:
+        position = await store.create(room_id, _new_position())
+    state = _game_states.get(room_id)
+    if state is None or state.version != position["version"]:
+        state = RoomState.from_position(position)
+        _game_states[room_id] = state
+    return state
+
+
+async def _evict_room(room_id: str, keep_shared: bool = False) -> None:
+    """Forget a room: this process's cached view and activity, its registry entry if empty, and its stored
+    position and seats (unless keep_shared and the store is shared with other workers, which may still
+    serve the room; shared rooms then expire in the store on their own)."""
+    _game_states.pop(room_id, None)
+    _room_activity.pop(room_id, None)
+    unregister_room_if_empty(room_id)
+    store = _store()
+    if not (keep_shared and store.shared):
+        await store.delete(room_id)
+
+
+def _legal_moves(state: RoomState) -> dict:
+    """Legal moves for the side to move (honouring must_continue), computed once per position.
+    Cached in state.legal_moves:
+    { "moves": set of (fr, fc, tr, tc), "payload": [ {from, to} ],
+      "paths": set of complete capture chains as tuples of (row, col), "path_payload": [ [ [r, c], ... ] ] }.
+    A state's position never changes in place, so the cache lives as long as the state."""
+    if state.legal_moves is not None:
+        return state.legal_moves
+    engine = _engine()
+    color = state.current_turn
+    board = state.board_for(engine)
+    start = state.must_continue
+    moves = set()
+    payload = []
+    has_jump = False
+    for fr, fc, tr, tc, is_jump in engine.get_all_moves(board, color):
+        if start and (fr, fc) != start:
+            continue
+        moves.add((fr, fc, tr, tc))
+        payload.append({"from": [fr, fc], "to": [tr, tc]})
+        has_jump = has_jump or is_jump
+    paths = []
+    if has_jump:
+        paths = [
+            p for p in engine.get_capture_paths(board, color)
+            if not start or p[0] == start
+        ]
+    state.legal_moves = {
+        "moves": moves,
+        "payload": payload,
+        "paths": set(paths),
+        "path_payload": [[list(sq) for sq in p] for p in paths],
+    }
+    return state.legal_moves
+
+
+def _detect_winner(state: RoomState) -> str | None:
+    """The side to move loses when it has no legal move (this includes having no pieces left)."""
+    if _legal_moves(state)["moves"]:
+        return None
+    return "red" if state.current_turn == "black" else "black"
+
+
+def _encode_seat_frames(state: RoomState, shared: dict) -> dict[str, str]:
+    """Serialize shared once, then append myColor, validMoves and validPaths for each seat
+    (black, red, spectator), so broadcast cost does not grow with the number of viewers."""
+    current_turn = state.current_turn
+    prefix = json.dumps({
+        **shared,
+        "currentTurn": current_turn,
+        "winner": state.winner,
+        "mustContinue": state.must_continue,
+    })[:-1]
+    idle_moves = '"validMoves": [], "validPaths": []'
+    turn_moves = idle_moves
+    if not state.winner:
+        legal = _legal_moves(state)
+        turn_moves = f'"validMoves": {json.dumps(legal["payload"])}, "validPaths": {json.dumps(legal["path_payload"])}'
+    frames = {}
+    for seat in ("black", "red", "spectator"):
+        my_color = None if seat == "spectator" else seat
+        valid_moves = turn_moves if seat == current_turn else idle_moves
+        frames[seat] = f'{prefix}, "myColor": {json.dumps(my_color)}, {valid_moves}}}'
+    return frames
+
+
+def _state_frames(state: RoomState) -> dict[str, str]:
+    """Pre-encoded full "state" messages per seat, cached until the position changes."""
+    if state.frames is None:
+        engine = _engine()
+        state.frames = _encode_seat_frames(state, {
+            "type": "state",
+            "version": state.version,
+            # The list engine's board is already in the message's form (and cached on the state).
+            "board": state.board_for(engine) if engine is checkers else bitboard.board_to_state(state.board),
+        })
+    return state.frames
+
+
+def _delta_frames(state: RoomState) -> dict[str, str] | None:
+    """Pre-encoded "delta" messages per seat for the last move, or None when the last change was not a move."""
+    delta = state.last_delta
+    if delta is None:
+        return None
+    if state.delta_frames is None:
+        state.delta_frames = _encode_seat_frames(state, {
+            "type": "delta",
+            "version": state.version,
+            "baseVersion": state.version - 1,
+            **delta,
+        })
+    return state.delta_frames
+
+
+def _parse_squares(squares) -> tuple | None:
+    """Parse [ [row, col], ... ] from a client message into a tuple of (row, col), or None if malformed."""
+    if not isinstance(squares, list) or not 2 <= len(squares) <= _MAX_PATH_SQUARES:
+        return None
+    parsed = []
+    for sq in squares:
+        if not isinstance(sq, (list, tuple)) or len(sq) != 2:
+            return None
+        try:
+            parsed.append((int(sq[0]), int(sq[1])))
+        except (TypeError, ValueError):
+            return None
+    return tuple(parsed)
+
+
+def _apply_path(state: RoomState, path: tuple) -> RoomState:
+    """Return the room state after an already validated move (single step, one hop, or a full capture chain).
+    Sets must_continue when a single hop leaves another jump open, switches turn, bumps the version,
+    records the delta, updates the hash and history, and recomputes the winner (or a draw by repetition or
+    the no-capture rule). The given state is not modified."""
+    engine = _engine()
+    (from_row, from_col), (to_row, to_col) = path[0], path[-1]
+    old_board = state.board_for(engine)
+    piece = engine.get_piece(old_board, from_row, from_col)
+    board, captured = engine.apply_path(old_board, path)
+    moved = engine.get_piece(board, to_row, to_col)
+    promoted = moved != piece
+
+    must_continue = None
+    # Crowning ends the move (same rule as get_capture_paths).
+    if captured and not promoted and engine.get_valid_jumps(board, to_row, to_col):
+        must_continue = (to_row, to_col)
+    current_turn = state.current_turn
+    if not must_continue:
+        current_turn = "red" if current_turn == "black" else "black"
+
+    h = checkers.zobrist_move(
+        state.hash, path, piece, moved,
+        [(jump, engine.get_piece(old_board, *jump)) for jump in captured],
+        turn_passes=not must_continue,
+    )
+    history = {} if captured or not checkers.is_king(piece) else state.history
+    new_state = RoomState(
+        board, current_turn,
+        must_continue=must_continue,
+        version=state.version + 1,
+        hash=h,
+        quiet_plies=0 if captured else state.quiet_plies + 1,
+        history={**history, h: history.get(h, 0) + 1},
+    )
+
+    changes = [[from_row, from_col, checkers.EMPTY], [to_row, to_col, moved]]
+    changes.extend([jr, jc, checkers.EMPTY] for jr, jc in captured)
+    new_state.last_delta = {
+        "changes": changes,
+        "captured": [list(jump) for jump in captured],
+        "promoted": promoted,
+    }
+    new_state.winner = _detect_winner(new_state)
+    if not new_state.winner and (
+        new_state.history[h] >= checkers.REPETITION_LIMIT
+        or new_state.quiet_plies >= checkers.NO_CAPTURE_PLY_LIMIT
+    ):
+        new_state.winner = "draw"
+    return new_state
+
+
+def _next_state(state: RoomState, color: str | None, content: dict) -> RoomState | None:
+    """Return the state after a "move" or "reset" message from a connection seated as color,
+    or None when the message is not legal in this state."""
+    if content.get("type") == "reset":
+        return RoomState.from_position(_new_position(state.version + 1))
+    if state.winner or not color or color != state.current_turn:
+        return None
+    # Legal moves and paths already honour must_continue.
+    legal = _legal_moves(state)
+    if content.get("path") is not None:
+        path = _parse_squares(content.get("path"))
+        # Without captures available, a two-square path is a simple step.
+        is_step = not legal["paths"] and len(path or ()) == 2 and path[0] + path[1] in legal["moves"]
+        if not path or (path not in legal["paths"] and not is_step):
+            return None
+    else:
+        path = _parse_squares([content.get("from"), content.get("to")])
+        if not path or path[0] + path[1] not in legal["moves"]:
+            return None
+    return _apply_path(state, path)
+
+
+async def _broadcast_state(room_id: str, state: RoomState) -> None:
+    """Send the room's pre-encoded per-seat frames to the group; each consumer picks its own seat."""
+    await get_channel_layer().group_send(
+        _get_room_group(room_id),
+        {
+            "type": "checkers_state",
+            "version": state.version,
+            "frames": _state_frames(state),
+            "deltas": _delta_frames(state),
+        },
+    )
+
+
+class _BotSeat:
+    """Stands in for a consumer when the bot's moves go through RoomActor.submit. version is the position the
+    move was searched in."""
+
+    def __init__(self, color: str, version: int):
+        self._color = color
+        self.version = version
+
+    async def _send_state_to_self(self):
+        pass
+
+
+class RoomActor:
+    """Serializes state changes for one room in this process. Moves and resets are queued and applied by a
+    single task; everything queued while a batch was being committed is applied together and broadcast once.
+    Also runs the room's bot, if this process seated one.
+    Lives while the room has connections on this process (see _join_actor / _leave_actor)."""
+
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.connections = 0
+        self.bot_color: str | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._bot_task: asyncio.Task | None = None
+        self._bot_wake = asyncio.Event()
+        # Version the bot is searching or has a move queued for, and the last version it has played.
+        self._bot_pending_version: int | None = None
+        self._bot_played_version: int | None = None
+
+    def submit(self, consumer: "CheckersConsumer", content: dict) -> None:
+        self._queue.put_nowait((consumer, content))
+
+    def close(self) -> None:
+        """Stop the task once everything already queued has been applied, and stop the bot."""
+        self._queue.put_nowait(None)
+        if self._bot_task is not None:
+            self._bot_task.cancel()
+
+    def wake_bot(self) -> None:
+        """The room's position may have changed; let the bot check whether it is its turn."""
+        if self.bot_color is not None:
+            self._bot_wake.set()
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            requests = [item for item in batch if item is not None]
+            if requests:
+                try:
+                    await self._apply(requests)
+                except Exception:
+                    logger.exception("Checkers room %s: failed to apply %d queued actions", self.room_id, len(requests))
+            if len(requests) != len(batch):
+                return
+
+    async def _apply(self, requests: list):
+        _touch_room(self.room_id)
+        state = await _load_state(self.room_id)
+        new_state = state
+        bot_move = None  # (bot seat, whether its move applied)
+        for consumer, content in requests:
+            if content.get("type") == "add_bot":
+                await self._seat_bot()
+                continue
+            next_state = _next_state(new_state, consumer._color, content)
+            if isinstance(consumer, _BotSeat):
+                # A move searched in this very position that does not apply will not apply when searched again.
+                bot_move = (consumer, next_state is not None or new_state.version == consumer.version)
+            new_state = next_state or new_state
+        committed = new_state is not state
+        if committed and not await _store().compare_and_set(self.room_id, new_state.position(), state.version):
+            # Another worker changed the room first; these actions were based on a stale position.
+            committed = False
+            for consumer, _ in requests:
+                await consumer._send_state_to_self()
+        if bot_move is not None:
+            self._bot_move_done(bot_move[0].version, bot_move[1] and committed)
+        if not committed:
+            return
+        _game_states[self.room_id] = new_state
+        await _broadcast_state(self.room_id, new_state)
+
+    def _bot_move_done(self, version: int, played: bool) -> None:
+        """The bot's move for version was committed (played) or not; if not, let the bot search again."""
+        self._bot_pending_version = None
+        if played:
+            self._bot_played_version = version
+        else:
+            self.wake_bot()
+
+    async def _seat_bot(self):
+        if self.bot_color is not None:
+            return
+        store = _store()
+        if BOT_CHANNEL in (await store.get_seats(self.room_id)).values():
+            return  # Another worker already runs a bot here.
+        color = await store.claim_seat(self.room_id, BOT_CHANNEL)
+        if color is None:
+            return
+        self.bot_color = color
+        self._bot_task = asyncio.get_running_loop().create_task(self._run_bot())
+        self._bot_wake.set()
+        await _broadcast_state(self.room_id, await _load_state(self.room_id))
+
+    async def _run_bot(self):
+        """Search and submit a move each time it becomes the bot's turn in a position it has not played yet.
+        A move that is not committed (rejected, or another worker changed the room first) is searched again
+        (see _bot_move_done)."""
+        while True:
+            await self._bot_wake.wait()
+            self._bot_wake.clear()
+            try:
+                state = await _load_state(self.room_id)
+                if state.winner or state.current_turn != self.bot_color or state.version in (
+                    self._bot_pending_version, self._bot_played_version,
+                ):
+                    continue
+                self._bot_pending_version = state.version
+                path = await ai.choose_move_async(
+                    bitboard.board_to_state(state.board), self.bot_color, state.must_continue,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Checkers room %s: bot search failed", self.room_id)
+                self._bot_pending_version = None
+                continue
+            if path:
+                self.submit(
+                    _BotSeat(self.bot_color, state.version), {"type": "move", "path": [list(sq) for sq in path]},
+                )
+
+
+# room_id -> actor for rooms with at least one connection on this process
+_room_actors: dict[str, RoomActor] = {}
+
+
+def _join_actor(room_id: str) -> RoomActor:
+    actor = _room_actors.get(room_id)
+    if actor is None:
+        actor = _room_actors[room_id] = RoomActor(room_id)
+    actor.connections += 1
+    return actor
+
+
+def _leave_actor(room_id: str) -> RoomActor | None:
+    """Drop one connection from the room's actor. Returns the actor if that was the last one (it is closed)."""
+    actor = _room_actors.get(room_id)
+    if actor is None:
+        return None
+    actor.connections -= 1
+    if actor.connections <= 0:
+        del _room_actors[room_id]
+        actor.close()
+        return actor
+    return None
+
+
+# room_id -> monotonic time of the room's last connect, disconnect or action, least recently active first.
+_room_activity: OrderedDict[str, float] = OrderedDict()
+_sweeper_task: asyncio.Task | None = None
+# Gauges refreshed by sweep_rooms; see room_gauges.
+_gauges = {"bytes": 0, "evicted": 0}
+# Cached views measured per sweep for the "bytes" gauge; the total is extrapolated from them.
+_BYTES_SAMPLE_ROOMS = 16
+
+
+def _touch_room(room_id: str) -> None:
+    _room_activity[room_id] = time.monotonic()
+    _room_activity.move_to_end(room_id)
+
+
+def _deep_size(obj, seen: set) -> int:
+    """Approximate memory held by obj and everything it references (each object counted once)."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    elif isinstance(obj, RoomState):
+        size += sum(_deep_size(getattr(obj, name), seen) for name in RoomState.__slots__)
+    return size
+
+
+def _estimate_state_bytes() -> int:
+    """Approximate memory held by the cached views: the deep size of up to _BYTES_SAMPLE_ROOMS random rooms,
+    scaled to the number of rooms, so a sweep costs the same however many rooms are held."""
+    if not _game_states:
+        return sys.getsizeof(_game_states)
+    states = list(_game_states.values())
+    sample = random.sample(states, min(len(states), _BYTES_SAMPLE_ROOMS))
+    per_room = sum(_deep_size(state, set()) for state in sample) / len(sample)
+    return sys.getsizeof(_game_states) + int(per_room * len(states))
+
+
+async def sweep_rooms(now: float | None = None) -> list[str]:
+    """Evict rooms without connections on this process that have been idle for CHECKERS_ROOM_IDLE_SECONDS,
+    then the least recently active ones while more than CHECKERS_MAX_ROOMS are held. Rooms with connections
+    are never evicted; their expiry in the store is refreshed instead. Returns the evicted room ids."""
+    now = time.monotonic() if now is None else now
+    idle_seconds = getattr(settings, "CHECKERS_ROOM_IDLE_SECONDS", 600)
+    max_rooms = getattr(settings, "CHECKERS_MAX_ROOMS", 1000)
+    if _room_actors:
+        await _store().touch(list(_room_actors))
+    held = len(_room_activity)
+    candidates = []
+    for room_id, last_active in _room_activity.items():
+        if room_id in _room_actors:
+            continue
+        if now - last_active < idle_seconds and held - len(candidates) <= max_rooms:
+            break  # Everything after this is more recent.
+        candidates.append(room_id)
+    evicted = []
+    for room_id in candidates:
+        if room_id in _room_actors:
+            continue  # Someone connected while we were evicting.
+        await _evict_room(room_id, keep_shared=True)
+        evicted.append(room_id)
+    _gauges["evicted"] += len(evicted)
+    _gauges["bytes"] = _estimate_state_bytes()
+    return evicted
+
+
+async def _sweep_loop():
+    while True:
+        await asyncio.sleep(getattr(settings, "CHECKERS_ROOM_SWEEP_SECONDS", 30))
+        try:
+            evicted = await sweep_rooms()
+            if evicted:
+                logger.info("Evicted %d idle checkers rooms; %s", len(evicted), room_gauges())
+        except Exception:
+            logger.exception("Checkers room sweep failed")
+
+
+def _ensure_sweeper() -> None:
+    global _sweeper_task
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.get_running_loop().create_task(_sweep_loop())
+
+
+def room_gauges() -> dict:
+    """Rooms held by this process: cached views, rooms with connections, registry entries, approximate bytes
+    of the cached views (estimated from a sample at the last sweep) and rooms evicted so far."""
+    return {
+        "rooms": len(_game_states),
+        "connected_rooms": len(_room_actors),
+        "registry_rooms": room_count(),
+        "bytes": _gauges["bytes"],
+        "evicted": _gauges["evicted"],
+    }
 
 
 def _get_capacity() -> int:
@@ -58,93 +588,77 @@ def _get_capacity() -> int:
 class CheckersConsumer(AsyncJsonWebsocketConsumer):
     """Checkers game; supports multiple rooms via room_id query param. Default room_id is 'default'."""
 
-    def _room_id(self) -> str:
+    def _query_param(self, name: str) -> str:
         qs = self.scope.get("query_string") or b""
         if isinstance(qs, bytes):
             qs = qs.decode("utf-8")
-        params = parse_qs(qs)
-        room_ids = params.get("room_id", [])
-        return (room_ids[0] or "default").strip() or "default"
+        values = parse_qs(qs).get(name, [])
+        return (values[0] if values else "").strip()
+
+    def _room_id(self) -> str:
+        return self._query_param("room_id") or "default"
+
+    def _seat(self) -> str:
+        return getattr(self, "_color", None) or "spectator"
 
     async def connect(self):
         room_id = self._room_id()
         self._room_id_val = room_id
+        self._delta_protocol = self._query_param("protocol") == "delta"
+        self._version = None
+        self._color = None
         group = _get_room_group(room_id)
         await self.channel_layer.group_add(group, self.channel_name)
         await self.accept()
-        state = _get_state(room_id)
+        self._actor = _join_actor(room_id)
+        _touch_room(room_id)
+        _ensure_sweeper()
+        await _load_state(room_id)
         capacity = _get_capacity()
         add_player_to_room(room_id, None, capacity)  # ensure room exists; user_id added on identify
-        if state["black_channel"] is None:
-            state["black_channel"] = self.channel_name
-        elif state["red_channel"] is None:
-            state["red_channel"] = self.channel_name
+        self._color = await _store().claim_seat(room_id, self.channel_name)
         await self._send_state_to_self()
 
     async def disconnect(self, close_code):
         room_id = getattr(self, "_room_id_val", "default")
-        state = _get_state(room_id)
-        my_user_id = None
-        if state.get("black_channel") == self.channel_name:
-            state["black_channel"] = None
-            my_user_id = state.get("black_user_id")
-            state["black_user_id"] = None
-        elif state.get("red_channel") == self.channel_name:
-            state["red_channel"] = None
-            my_user_id = state.get("red_user_id")
-            state["red_user_id"] = None
+        _, my_user_id, occupied = await _store().release_seat(room_id, self.channel_name)
         remove_player_from_room(room_id, my_user_id)
-        if state.get("black_channel") is None and state.get("red_channel") is None:
+        _touch_room(room_id)
+        if getattr(self, "_actor", None) is not None:
+            closed = _leave_actor(room_id)
+            self._actor = None
+            if closed is not None and closed.bot_color:
+                # The bot ran on this worker's actor; it cannot stay seated without it.
+                _, _, occupied = await _store().release_seat(room_id, BOT_CHANNEL)
+        if not occupied:
             unregister_room(room_id)
         group = _get_room_group(room_id)
         await self.channel_layer.group_discard(group, self.channel_name)
-        await self.channel_layer.group_send(
-            group,
-            {"type": "checkers_state", "state": self._build_state_for_channel(room_id, None)},
-        )
-
-    def _build_state_for_channel(self, room_id: str, channel_name: str | None):
-        state = _get_state(room_id)
-        board = state["board"]
-        current_turn = state["current_turn"]
-        black_channel = state["black_channel"]
-        red_channel = state["red_channel"]
-        winner = state.get("winner") or check_winner(board)
-        if winner:
-            state["winner"] = winner
-
-        my_color = None
-        if channel_name == black_channel:
-            my_color = "black"
-        elif channel_name == red_channel:
-            my_color = "red"
-
-        valid_moves = []
-        must_continue = state.get("must_continue")
-        if my_color and my_color == current_turn and not winner:
-            for fr, fc, tr, tc, _ in get_all_moves(board, my_color):
-                if must_continue and (fr, fc) != tuple(must_continue):
-                    continue
-                valid_moves.append({"from": [fr, fc], "to": [tr, tc]})
-
-        return {
-            "board": board_to_state(board),
-            "currentTurn": current_turn,
-            "myColor": my_color,
-            "winner": winner,
-            "validMoves": valid_moves,
-            "mustContinue": state.get("must_continue"),
-        }
+        state = await _load_state(room_id)
+        await _broadcast_state(room_id, state)
+        if state.winner and not occupied and room_id not in _room_actors:
+            # Finished game and nobody left here: nothing to resume, so drop it now. A shared store keeps the
+            # room for spectators on other workers until it expires.
+            await _evict_room(room_id, keep_shared=True)
 
     async def _send_state_to_self(self):
         room_id = getattr(self, "_room_id_val", "default")
-        state = self._build_state_for_channel(room_id, self.channel_name)
-        await self.send(text_data=json.dumps({"type": "state", **state}))
+        state = await _load_state(room_id)
+        self._version = state.version
+        await self.send(text_data=_state_frames(state)[self._seat()])
 
     async def checkers_state(self, event):
-        room_id = getattr(self, "_room_id_val", "default")
-        full = self._build_state_for_channel(room_id, self.channel_name)
-        await self.send(text_data=json.dumps({"type": "state", **full}))
+        frames = event["frames"]
+        if getattr(self, "_delta_protocol", False):
+            version = event["version"]
+            if version == self._version:
+                return  # Position unchanged (e.g. someone left); client is already current.
+            if event.get("deltas") and self._version == version - 1:
+                frames = event["deltas"]
+            self._version = version
+        if getattr(self, "_actor", None) is not None:
+            self._actor.wake_bot()
+        await self.send(text_data=frames[self._seat()])
 
     async def receive_json(self, content):
         msg_type = content.get("type")
@@ -152,77 +666,11 @@ class CheckersConsumer(AsyncJsonWebsocketConsumer):
         if msg_type == "identify":
             user_id = content.get("user_id")
             if user_id:
-                state = _get_state(room_id)
-                if state.get("black_channel") == self.channel_name:
-                    state["black_user_id"] = str(user_id)
-                elif state.get("red_channel") == self.channel_name:
-                    state["red_user_id"] = str(user_id)
+                if self._color:
+                    await _store().set_seat_user(room_id, self._color, str(user_id))
                 add_player_to_room(room_id, str(user_id), _get_capacity())
-        elif msg_type == "move":
-            await self._handle_move(content, room_id)
-        elif msg_type == "reset":
-            await self._handle_reset(room_id)
-
-    async def _handle_move(self, content, room_id: str):
-        state = _get_state(room_id)
-        if state.get("winner"):
-            return
-        from_pos = content.get("from")
-        to_pos = content.get("to")
-        if not from_pos or not to_pos or len(from_pos) != 2 or len(to_pos) != 2:
-            return
-        from_row, from_col = int(from_pos[0]), int(from_pos[1])
-        to_row, to_col = int(to_pos[0]), int(to_pos[1])
-
-        my_color = None
-        if self.channel_name == state.get("black_channel"):
-            my_color = "black"
-        elif self.channel_name == state.get("red_channel"):
-            my_color = "red"
-        if not my_color or my_color != state["current_turn"]:
-            return
-
-        must_continue = state.get("must_continue")
-        if must_continue:
-            mr, mc = must_continue
-            if from_row != mr or from_col != mc:
-                return
-
-        moves = get_all_moves(state["board"], my_color)
-        valid = any(
-            m[0] == from_row and m[1] == from_col and m[2] == to_row and m[3] == to_col
-            for m in moves
-        )
-        if not valid:
-            return
-
-        state["board"], jump = apply_move(
-            state["board"], from_row, from_col, to_row, to_col
-        )
-        state["must_continue"] = None
-        if jump:
-            from .checkers import get_valid_jumps
-            more_jumps = get_valid_jumps(state["board"], to_row, to_col)
-            if more_jumps:
-                state["must_continue"] = (to_row, to_col)
-        if not state.get("must_continue"):
-            state["current_turn"] = "red" if state["current_turn"] == "black" else "black"
-        state["winner"] = check_winner(state["board"])
-
-        group = _get_room_group(room_id)
-        await self.channel_layer.group_send(
-            group,
-            {"type": "checkers_state", "state": self._build_state_for_channel(room_id, None)},
-        )
-
-    async def _handle_reset(self, room_id: str):
-        state = _get_state(room_id)
-        state["board"] = initial_board()
-        state["current_turn"] = "black"
-        state["winner"] = None
-        state["must_continue"] = None
-        group = _get_room_group(room_id)
-        await self.channel_layer.group_send(
-            group,
-            {"type": "checkers_state", "state": self._build_state_for_channel(room_id, None)},
-        )
+        elif msg_type in ("move", "reset", "add_bot"):
+            if getattr(self, "_actor", None) is not None:
+                self._actor.submit(self, content)
+        elif msg_type == "resync":
+            await self._send_state_to_self()
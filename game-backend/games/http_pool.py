@@ -0,0 +1,82 @@
+"""
+Keep-alive HTTP connection pool for one origin (the matchmaker), built on http.client.
+
+Callers (matchmaker_client's background threads) call request() directly. At most max_connections requests are
+in flight at once (callers wait up to timeout for a free slot), idle connections are reused, and every socket
+operation has a timeout.
+"""
+import http.client
+import threading
+import urllib.parse
+
+
+class PoolTimeout(ConnectionError):
+    """No connection slot became free within the timeout."""
+
+
+def _closed_while_idle(error: Exception, sent: bool) -> bool:
+    """True if error shows the server had closed the keep-alive connection before it could read our request,
+    so sending it again cannot apply it twice: the send failed with a broken pipe or reset, or the connection
+    closed without a single byte of response. Timeouts and anything after a response started never qualify."""
+    if isinstance(error, http.client.RemoteDisconnected):
+        return True
+    if not sent:
+        return isinstance(error, (BrokenPipeError, ConnectionResetError))
+    return type(error) is http.client.BadStatusLine and error.line in ("", "''")
+
+
+class HTTPPool:
+    def __init__(self, base_url: str, max_connections: int = 8, timeout: float = 5.0):
+        parts = urllib.parse.urlsplit(base_url)
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        """An idle connection (reused=True) or a new one."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connection_class(self._host, self._port, timeout=self._timeout), False
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def request(self, method: str, path: str, body: bytes | None = None, headers: dict | None = None) -> tuple[int, bytes]:
+        """Send a request and read the whole response. Returns (status, body) for any HTTP status.
+        Raises ConnectionError (PoolTimeout when no slot is free) if the matchmaker cannot be reached."""
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolTimeout(f"no free connection to {self._host} within {self._timeout}s")
+        try:
+            while True:
+                conn, reused = self._checkout()
+                sent = False
+                try:
+                    conn.request(method, self._prefix + path, body=body, headers=headers or {})
+                    sent = True
+                    resp = conn.getresponse()
+                    data = resp.read()
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    if reused and _closed_while_idle(e, sent):
+                        continue  # The server closed an idle keep-alive connection; retry on another.
+                    raise ConnectionError(f"{method} {path}: {e}") from e
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(conn)
+                return resp.status, data
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
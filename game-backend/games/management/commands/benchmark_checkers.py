@@ -0,0 +1,335 @@
+"""
+Benchmark the checkers engines and the checkers WebSocket consumer. Prints one JSON document
+(or writes it to --output) so runs can be compared after engine or consumer changes.
+
+engine:    move generation rate over positions sampled from seeded random self-play, full random
+           self-play games per second, and apply_move cost per call, for each board engine; plus
+           in-place make_move/unmake_move cost where the engine has it.
+memory:    bytes per room (tracemalloc) for rooms held as RoomState / RoomEntry slotted objects with packed
+           boards (and with the list engine's cached board), against the room dicts with list-of-lists boards
+           and the registry dicts with player lists that the consumer and room_registry held originally.
+websocket: N simulated rooms (two players plus optional spectators each) play random legal moves
+           against the ASGI application with the in-memory channel layer; reports move-to-broadcast
+           latency for the mover and messages delivered per second across all clients.
+"""
+import asyncio
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from games import bitboard, checkers
+from games.room_registry import RoomEntry
+from games.room_state import RoomState
+
+ENGINES = {"list": checkers, "bitboard": bitboard}
+MAX_PLIES = 200
+
+
+def _random_move(engine, board, color, rnd):
+    """Pick a random legal move as a path of squares (whole capture chain when jumping), or None."""
+    paths = engine.get_capture_paths(board, color)
+    if paths:
+        return rnd.choice(paths)
+    moves = engine.get_all_moves(board, color)
+    if not moves:
+        return None
+    fr, fc, tr, tc, _ = rnd.choice(moves)
+    return ((fr, fc), (tr, tc))
+
+
+def _self_play(engine, rnd, positions=None):
+    """Play one random game; optionally record (board, color) for every position. Returns plies played."""
+    board = engine.initial_board()
+    color = "black"
+    for ply in range(MAX_PLIES):
+        if positions is not None:
+            positions.append((board, color))
+        path = _random_move(engine, board, color, rnd)
+        if path is None:
+            return ply
+        board, _ = engine.apply_path(board, path)
+        color = "red" if color == "black" else "black"
+    return MAX_PLIES
+
+
+def _timed(fn, min_seconds):
+    """Run fn() repeatedly for at least min_seconds. Returns (calls, elapsed, sum of results)."""
+    calls = total = 0
+    start = time.perf_counter()
+    while True:
+        total += fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls, elapsed, total
+
+
+def bench_engine(name: str, seed: int, games: int, min_seconds: float) -> dict:
+    engine = ENGINES[name]
+    rnd = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        _self_play(engine, rnd, positions)
+
+    def generate_all():
+        return sum(len(engine.get_all_moves(board, color)) for board, color in positions)
+
+    calls, elapsed, generated = _timed(generate_all, min_seconds)
+
+    moves = []
+    for board, color in positions:
+        for fr, fc, tr, tc, _ in engine.get_all_moves(board, color):
+            moves.append((board, fr, fc, tr, tc))
+            break
+
+    def apply_all():
+        for board, fr, fc, tr, tc in moves:
+            engine.apply_move(board, fr, fc, tr, tc)
+        return len(moves)
+
+    _, apply_elapsed, applied = _timed(apply_all, min_seconds)
+
+    make_unmake = None
+    if hasattr(engine, "make_move"):
+        scratch = [([row[:] for row in board], fr, fc, tr, tc) for (board, fr, fc, tr, tc) in moves]
+
+        def make_unmake_all():
+            for board, fr, fc, tr, tc in scratch:
+                engine.unmake_move(board, engine.make_move(board, fr, fc, tr, tc))
+            return len(scratch)
+
+        _, pair_elapsed, pairs = _timed(make_unmake_all, min_seconds)
+        make_unmake = {"pairs": pairs, "ns_per_pair": round(pair_elapsed / max(pairs, 1) * 1e9, 1)}
+
+    game_rnd = random.Random(seed)
+    game_calls, game_elapsed, plies = _timed(lambda: _self_play(engine, game_rnd), min_seconds)
+
+    return {
+        "positions": len(positions),
+        "move_generation": {
+            "positions_per_second": round(calls * len(positions) / elapsed, 1),
+            "moves_per_second": round(generated / elapsed, 1),
+        },
+        "apply_move": {
+            "calls": applied,
+            "ns_per_call": round(apply_elapsed / max(applied, 1) * 1e9, 1),
+        },
+        "make_unmake": make_unmake,
+        "self_play": {
+            "games": game_calls,
+            "games_per_second": round(game_calls / game_elapsed, 2),
+            "plies_per_game": round(plies / game_calls, 1),
+        },
+    }
+
+
+def _allocated_bytes(build) -> int:
+    """Bytes still allocated after build() returns, with its result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return allocated
+
+
+def bench_memory(rooms: int, seed: int) -> dict:
+    positions = []
+    rnd = random.Random(seed)
+    while len(positions) < rooms:
+        _self_play(checkers, rnd, positions)
+    positions = positions[:rooms]
+
+    def room_states():
+        return [
+            RoomState(bitboard.board_from_state(board), color, version=i, hash=checkers.zobrist_hash(board, color))
+            for i, (board, color) in enumerate(positions)
+        ]
+
+    def room_states_with_list_board():
+        # CHECKERS_ENGINE=list keeps the board it played as lists next to the packed one.
+        return [
+            RoomState([row[:] for row in board], color, version=i, hash=checkers.zobrist_hash(board, color))
+            for i, (board, color) in enumerate(positions)
+        ]
+
+    def room_dicts():
+        # The consumer's original per-room dict: the engine's list-of-lists board plus turn, winner,
+        # must_continue and the seat keys. Seats are left empty, since RoomState leaves them to the state store.
+        return [
+            {
+                "board": [row[:] for row in board], "current_turn": color, "black_channel": None,
+                "red_channel": None, "black_user_id": None, "red_user_id": None, "winner": None,
+                "must_continue": None,
+            }
+            for board, color in positions
+        ]
+
+    def registry_entries():
+        return {str(i): RoomEntry(2, (str(uuid.uuid4()), str(uuid.uuid4()))) for i in range(rooms)}
+
+    def registry_dicts():
+        return {
+            str(i): {"capacity": 2, "current_players": [str(uuid.uuid4()), str(uuid.uuid4())]}
+            for i in range(rooms)
+        }
+
+    def per_room(build):
+        return round(_allocated_bytes(build) / rooms, 1)
+
+    return {
+        "rooms": rooms,
+        "room_state_bytes_per_room": {
+            "dict": per_room(room_dicts),
+            "slots": per_room(room_states),
+            "slots_with_list_board": per_room(room_states_with_list_board),
+        },
+        "registry_bytes_per_room": {"dict": per_room(registry_dicts), "slots": per_room(registry_entries)},
+    }
+
+
+async def _room_client(application, room_id: str):
+    from channels.testing import WebsocketCommunicator
+
+    comm = WebsocketCommunicator(
+        application,
+        f"/ws/checkers/?room_id={room_id}",
+        headers=[(b"origin", b"http://localhost")],
+    )
+    connected, _ = await comm.connect()
+    if not connected:
+        raise RuntimeError(f"WebSocket connect failed for room {room_id}")
+    return comm, await comm.receive_json_from()
+
+
+async def _play_room(application, room_id: str, moves: int, spectators: int, rnd, latencies: list) -> int:
+    """Play up to `moves` random legal moves in one room. Returns messages received by all clients."""
+    black, black_state = await _room_client(application, room_id)
+    red, red_state = await _room_client(application, room_id)
+    watchers = [(await _room_client(application, room_id))[0] for _ in range(spectators)]
+    players = {"black": (black, black_state), "red": (red, red_state)}
+    received = 2 + spectators
+    state = black_state
+    for _ in range(moves):
+        if state["winner"]:
+            break
+        mover, mover_state = players[state["currentTurn"]]
+        if mover_state["validPaths"]:
+            message = {"type": "move", "path": rnd.choice(mover_state["validPaths"])}
+        elif mover_state["validMoves"]:
+            move = rnd.choice(mover_state["validMoves"])
+            message = {"type": "move", "from": move["from"], "to": move["to"]}
+        else:
+            break
+        start = time.perf_counter()
+        await mover.send_json_to(message)
+        new_states = {}
+        for color, (comm, _) in players.items():
+            new_states[color] = await comm.receive_json_from(timeout=5)
+        latencies.append(time.perf_counter() - start)
+        for comm in watchers:
+            await comm.receive_json_from(timeout=5)
+        received += 2 + len(watchers)
+        players = {color: (players[color][0], new_states[color]) for color in players}
+        state = new_states["black"]
+    for comm in [black, red, *watchers]:
+        await comm.disconnect()
+    return received
+
+
+async def _bench_websocket(rooms: int, moves: int, spectators: int, seed: int) -> dict:
+    from channels.layers import channel_layers
+
+    from config.asgi import application
+    from games import consumers, state_store
+
+    channel_layers.backends.clear()
+    state_store._store = None
+    consumers._game_states.clear()
+    consumers._room_activity.clear()
+    rnd = random.Random(seed)
+    latencies: list[float] = []
+    start = time.perf_counter()
+    received = await asyncio.gather(*[
+        _play_room(application, f"bench-{seed}-{i}", moves, spectators, random.Random(rnd.random()), latencies)
+        for i in range(rooms)
+    ])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rooms": rooms,
+        "spectators_per_room": spectators,
+        "moves": len(latencies),
+        "messages": sum(received),
+        "elapsed_seconds": round(elapsed, 3),
+        "moves_per_second": round(len(latencies) / elapsed, 1),
+        "messages_per_second": round(sum(received) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+            "p50": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+            "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 3) if latencies else None,
+            "max": round(latencies[-1] * 1000, 3) if latencies else None,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark checkers engines and the checkers WebSocket consumer; prints JSON results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--engine", choices=[*ENGINES, "all"], default="all",
+                            help="Engine for engine benchmarks and the WebSocket run (all = every engine).")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for positions and moves.")
+        parser.add_argument("--games", type=int, default=20, help="Self-play games used to sample positions.")
+        parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum duration of each timed loop.")
+        parser.add_argument("--rooms", type=int, default=20, help="Simulated rooms for the WebSocket run (0 skips it).")
+        parser.add_argument("--moves", type=int, default=40, help="Maximum moves per simulated room.")
+        parser.add_argument("--spectators", type=int, default=0, help="Extra spectator connections per room.")
+        parser.add_argument("--memory-rooms", type=int, default=2000,
+                            help="Rooms built for the memory comparison (0 skips it).")
+        parser.add_argument("--output", default="", help="Write JSON here instead of stdout.")
+
+    def handle(self, *args, **options):
+        engines = list(ENGINES) if options["engine"] == "all" else [options["engine"]]
+        results = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "seed": options["seed"],
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "engine": {},
+            "memory": None,
+            "websocket": {},
+        }
+        if options["memory_rooms"] > 0:
+            results["memory"] = bench_memory(options["memory_rooms"], options["seed"])
+        for name in engines:
+            results["engine"][name] = bench_engine(name, options["seed"], options["games"], options["min_seconds"])
+            if options["rooms"] > 0:
+                layers = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+                with override_settings(CHANNEL_LAYERS=layers, CHECKERS_ENGINE=name, CHECKERS_STATE_STORE="memory"):
+                    results["websocket"][name] = asyncio.run(_bench_websocket(
+                        options["rooms"], options["moves"], options["spectators"], options["seed"],
+                    ))
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark results to {options['output']}"))
+        else:
+            self.stdout.write(output)
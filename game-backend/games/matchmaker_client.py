@@ -1,16 +1,26 @@
 """
 Client for matchmaker-backend app-authenticated endpoints (activity, online-users).
-Caches app JWT and refreshes when needed.
+Caches app JWT and refreshes when needed. Heartbeats are queued (queue_activity) and sent together once
+per MATCHMAKER_ACTIVITY_FLUSH_SECONDS by a background thread.
+All calls share one keep-alive connection pool (games.http_pool) sized by MATCHMAKER_HTTP_MAX_CONNECTIONS,
+with MATCHMAKER_HTTP_TIMEOUT on every connect, read and wait for a free connection.
 """
 import json
+import logging
 import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 
 from django.conf import settings
 
+from . import room_registry
+from .http_pool import HTTPPool
+
+logger = logging.getLogger(__name__)
+
+_pool: HTTPPool | None = None
+_pool_lock = threading.Lock()
+
 _cached_token: str | None = None
 _cached_token_expires_at: float = 0
 _token_lock = threading.Lock()
@@ -20,6 +30,34 @@ _online_users: list[dict] = []
 _online_users_lock = threading.Lock()
 
 
+def _get_pool() -> HTTPPool:
+    """Process-wide pool for BACKEND_URL, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HTTPPool(
+                getattr(settings, "BACKEND_URL", ""),
+                max_connections=getattr(settings, "MATCHMAKER_HTTP_MAX_CONNECTIONS", 8),
+                timeout=getattr(settings, "MATCHMAKER_HTTP_TIMEOUT", 5.0),
+            )
+        return _pool
+
+
+def _call(method: str, path: str, payload: dict | None = None, token: str | None = None) -> tuple[int, bytes] | None:
+    """Send a JSON request to the matchmaker through the pool. Returns (status, body), or None if unreachable."""
+    headers = {}
+    body = None
+    if payload is not None:
+        body = json.dumps(payload).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        return _get_pool().request(method, path, body=body, headers=headers)
+    except ConnectionError:
+        return None
+
+
 def _get_app_token() -> str | None:
     global _cached_token, _cached_token_expires_at
     with _token_lock:
@@ -27,16 +65,14 @@ def _get_app_token() -> str | None:
             return _cached_token
     app_id = getattr(settings, "MATCHMAKING_APP_ID", "") or ""
     app_secret = getattr(settings, "MATCHMAKING_SECRET", "") or ""
-    backend_url = getattr(settings, "BACKEND_URL", "").rstrip("/")
     if not app_id or not app_secret:
         return None
-    url = f"{backend_url}/api/v1/auth/app-token/"
-    data = json.dumps({"app_id": app_id, "app_secret": app_secret}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST", headers={"Content-Type": "application/json"})
+    result = _call("POST", "/api/v1/auth/app-token/", {"app_id": app_id, "app_secret": app_secret})
+    if result is None or result[0] != 200:
+        return None
     try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            body = json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.HTTPError, urllib.error.URLError, OSError, ValueError, json.JSONDecodeError):
+        body = json.loads(result[1].decode("utf-8"))
+    except ValueError:
         return None
     access = body.get("access")
     expires_in = body.get("expires_in", 3600)
@@ -48,25 +84,68 @@ def _get_app_token() -> str | None:
     return access
 
 
-def report_activity(user_id: str, server_id: str) -> bool:
-    """Report that this user is active on this server for our app. Returns True if the request succeeded."""
+def _drop_app_token() -> None:
+    """Forget the cached app token (e.g. after a 401), so the next call fetches a new one."""
+    global _cached_token, _cached_token_expires_at
+    with _token_lock:
+        _cached_token = None
+        _cached_token_expires_at = 0
+
+
+# server_id -> user_ids seen since the last flush; sent as one batch by the activity flusher.
+_pending_activity: dict[str, set[str]] = {}
+_pending_activity_lock = threading.Lock()
+
+
+def queue_activity(user_id: str, server_id: str) -> None:
+    """Note that this user is active on this server; reported with the next batch (flush_activity).
+    Repeated heartbeats from one user between flushes are sent once."""
+    with _pending_activity_lock:
+        _pending_activity.setdefault(server_id, set()).add(user_id)
+
+
+def flush_activity() -> bool:
+    """Send every queued activity to the matchmaker's batch endpoint in one request. Returns True if there was
+    nothing to send or the matchmaker accepted it. If the matchmaker cannot be reached, fails with a 5xx or
+    rejects the app token (401, which also drops the cached token) the activity is queued again for the next
+    flush; any other error drops the batch."""
+    global _pending_activity
+    with _pending_activity_lock:
+        pending, _pending_activity = _pending_activity, {}
+    if not pending:
+        return True
     token = _get_app_token()
-    if not token:
+    payload = {"activity": [{"server_id": sid, "user_ids": sorted(uids)} for sid, uids in pending.items()]}
+    result = _call("POST", "/api/v1/app/activity/batch/", payload, token) if token else None
+    if result is not None and result[0] == 200:
+        return True
+    if result is not None and result[0] == 401:
+        _drop_app_token()
+    if result is None or result[0] == 401 or result[0] >= 500:
+        with _pending_activity_lock:
+            for sid, uids in pending.items():
+                _pending_activity.setdefault(sid, set()).update(uids)
         return False
-    backend_url = getattr(settings, "BACKEND_URL", "").rstrip("/")
-    url = f"{backend_url}/api/v1/app/activity/"
-    data = json.dumps({"user_id": user_id, "server_id": server_id}).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        method="POST",
-        headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
+    logger.warning(
+        "Matchmaker rejected activity batch (HTTP %s); dropped activity for %d servers",
+        result[0],
+        len(pending),
     )
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.status in (200, 204)
-    except (urllib.error.HTTPError, urllib.error.URLError, OSError, ValueError):
-        return False
+    return False
+
+
+def _activity_flush_loop():
+    """Background loop: flush queued activity every MATCHMAKER_ACTIVITY_FLUSH_SECONDS."""
+    interval = getattr(settings, "MATCHMAKER_ACTIVITY_FLUSH_SECONDS", 1.0)
+    while True:
+        time.sleep(interval)
+        flush_activity()
+
+
+def start_activity_flusher():
+    """Start the background thread that sends queued activity (queue_activity) to the matchmaker."""
+    t = threading.Thread(target=_activity_flush_loop, daemon=True)
+    t.start()
 
 
 def _fetch_online_users(server_id: str) -> list[dict]:
@@ -74,17 +153,12 @@ def _fetch_online_users(server_id: str) -> list[dict]:
     token = _get_app_token()
     if not token:
         return []
-    backend_url = getattr(settings, "BACKEND_URL", "").rstrip("/")
-    url = f"{backend_url}/api/v1/app/online-users/?server_id={urllib.parse.quote(server_id, safe='')}"
-    req = urllib.request.Request(
-        url,
-        method="GET",
-        headers={"Authorization": f"Bearer {token}"},
-    )
+    result = _call("GET", f"/api/v1/app/online-users/?server_id={urllib.parse.quote(server_id, safe='')}", token=token)
+    if result is None or result[0] != 200:
+        return []
     try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.HTTPError, urllib.error.URLError, OSError, ValueError, json.JSONDecodeError):
+        return json.loads(result[1].decode("utf-8"))
+    except ValueError:
         return []
 
 
@@ -112,41 +186,85 @@ def start_online_users_poller(server_id: str | None = None):
     t.start()
 
 
-def report_status(server_id: str, rooms: list[dict]) -> bool:
-    """Report room status to matchmaker. rooms: [ { room_id, capacity, current_players } ]. Returns True if request succeeded."""
+def _post_status(payload: dict) -> int | None:
+    """POST to the matchmaker's app/status/ endpoint. Returns the HTTP status, or None if it could not be sent."""
     token = _get_app_token()
     if not token:
+        return None
+    result = _call("POST", "/api/v1/app/status/", payload, token)
+    return result[0] if result is not None else None
+
+
+def report_status(server_id: str, rooms: list[dict], version: int | None = None) -> bool:
+    """Report room status to matchmaker. rooms: [ { room_id, capacity, current_players } ]. Returns True if request succeeded.
+    version (the room registry version the rooms reflect) lets later reports be sent as deltas."""
+    payload = {"server_id": server_id, "rooms": rooms}
+    if version is not None:
+        payload["version"] = version
+    return _post_status(payload) in (200, 204)
+
+
+def report_status_delta(
+    server_id: str, base_version: int, version: int, upserted: list[dict], removed: list[str]
+) -> int | None:
+    """Report only the rooms changed since base_version. Returns the HTTP status (409: send a full report)."""
+    return _post_status({
+        "server_id": server_id,
+        "base_version": base_version,
+        "version": version,
+        "upserted": upserted,
+        "removed": removed,
+    })
+
+
+# Room registry version the matchmaker holds for this server; None until a full report has been accepted.
+_reported_version: int | None = None
+
+
+def push_status_once(server_id: str, get_rooms_callback) -> bool:
+    """Report room status and, on success, acknowledge the registry changes it included. Sends only the
+    changed rooms once the matchmaker has a full report; a 409 (e.g. the matchmaker restarted) falls back to
+    a full report."""
+    global _reported_version
+    version, upserted, removed = room_registry.pending_changes()
+    if _reported_version is not None:
+        code = report_status_delta(server_id, _reported_version, version, upserted, removed)
+        if code in (200, 204):
+            room_registry.acknowledge(version)
+            _reported_version = version
+            return True
+        if code != 409:
+            return False
+        _reported_version = None
+    rooms = get_rooms_callback()
+    if rooms is None or not report_status(server_id, rooms, version=version):
         return False
-    backend_url = getattr(settings, "BACKEND_URL", "").rstrip("/")
-    url = f"{backend_url}/api/v1/app/status/"
-    data = json.dumps({"server_id": server_id, "rooms": rooms}).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        method="POST",
-        headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.status in (200, 204)
-    except (urllib.error.HTTPError, urllib.error.URLError, OSError, ValueError):
-        return False
+    room_registry.acknowledge(version)
+    _reported_version = version
+    return True
 
 
-def _poll_status_loop(server_id: str, get_rooms_callback):
-    """Background loop: every 5s report current rooms to matchmaker."""
+def _status_push_loop(server_id: str, get_rooms_callback):
+    """Background loop: report rooms as soon as the registry changes (after a short debounce, so a burst of
+    joins and leaves is sent once), and every MATCHMAKER_STATUS_KEEPALIVE_SECONDS while nothing changes
+    (an empty delta, which also finds out when the matchmaker needs a full report).
+    A failed push is retried after MATCHMAKER_STATUS_RETRY_SECONDS."""
+    debounce = getattr(settings, "MATCHMAKER_STATUS_DEBOUNCE_SECONDS", 0.25)
+    keepalive = getattr(settings, "MATCHMAKER_STATUS_KEEPALIVE_SECONDS", 60)
+    retry = getattr(settings, "MATCHMAKER_STATUS_RETRY_SECONDS", 5)
     while True:
-        if server_id and get_rooms_callback:
-            rooms = get_rooms_callback()
-            if rooms is not None:
-                report_status(server_id, rooms)
-        time.sleep(5)
+        if room_registry.wait_for_change(keepalive):
+            time.sleep(debounce)
+        if not push_status_once(server_id, get_rooms_callback):
+            time.sleep(retry)
+            room_registry.mark_dirty()
 
 
 def start_status_poller(server_id: str | None = None, get_rooms_callback=None):
-    """Start the background thread that reports room status to the matchmaker.
-    get_rooms_callback() should return [ { room_id, capacity, current_players } ]."""
+    """Start the background thread that reports room status to the matchmaker whenever the room registry
+    changes (plus a slow keepalive). get_rooms_callback() should return [ { room_id, capacity, current_players } ]."""
     sid = server_id or getattr(settings, "MATCHMAKER_SERVER_ID", "") or ""
-    cb = get_rooms_callback
-    t = threading.Thread(target=_poll_status_loop, args=(sid, cb), daemon=True)
+    if not sid or not get_rooms_callback:
+        return
+    t = threading.Thread(target=_status_push_loop, args=(sid, get_rooms_callback), daemon=True)
     t.start()
@@ -1,52 +1,138 @@
 """
 In-memory registry of active rooms for status reporting to the matchmaker.
-room_id -> { "capacity": int, "current_players": [user_id, ...] }
+room_id -> RoomEntry(capacity, current_players), current_players being a tuple of user_ids.
 Updated by game consumers when connections join/leave a room.
+
+Every change the matchmaker can see (a room's players, a room going away) bumps a version counter,
+records the room in a change set and raises a dirty flag, so the status reporter can push right after a
+change (wait_for_change), send what changed (pending_changes) and forget it once delivered (acknowledge).
 """
 import threading
 
-_rooms: dict[str, dict] = {}
+
+class RoomEntry:
+    """One registered room. __slots__ and a tuple of players keep it small; rooms hold a handful of players,
+    so rebuilding the tuple on join/leave is cheap."""
+
+    __slots__ = ("capacity", "current_players")
+
+    def __init__(self, capacity: int, current_players: tuple = ()):
+        self.capacity = capacity
+        self.current_players = current_players
+
+
+_rooms: dict[str, RoomEntry] = {}
 _lock = threading.Lock()
 
+_version = 0
+# room_id -> registry version of its last unacknowledged change
+_changed: dict[str, int] = {}
+_dirty = threading.Event()
+
+
+def _mark_changed(room_id: str) -> None:
+    """Record a change to room_id; call with _lock held."""
+    global _version
+    _version += 1
+    _changed[room_id] = _version
+    _dirty.set()
+
 
 def register_room(room_id: str, capacity: int) -> None:
     with _lock:
         if room_id not in _rooms:
-            _rooms[room_id] = {"capacity": capacity, "current_players": []}
+            _rooms[room_id] = RoomEntry(capacity)
 
 
 def unregister_room(room_id: str) -> None:
     with _lock:
-        _rooms.pop(room_id, None)
+        room = _rooms.pop(room_id, None)
+        if room is not None and room.current_players:
+            _mark_changed(room_id)
 
 
 def add_player_to_room(room_id: str, user_id: str | None, capacity: int) -> None:
     with _lock:
-        if room_id not in _rooms:
-            _rooms[room_id] = {"capacity": capacity, "current_players": []}
-        if user_id and user_id not in _rooms[room_id]["current_players"]:
-            _rooms[room_id]["current_players"].append(user_id)
+        room = _rooms.get(room_id)
+        if room is None:
+            room = _rooms[room_id] = RoomEntry(capacity)
+        if user_id and user_id not in room.current_players:
+            room.current_players += (user_id,)
+            _mark_changed(room_id)
 
 
 def remove_player_from_room(room_id: str, user_id: str | None) -> None:
     with _lock:
-        if room_id not in _rooms:
+        room = _rooms.get(room_id)
+        if room is None:
             return
-        if user_id and user_id in _rooms[room_id]["current_players"]:
-            _rooms[room_id]["current_players"].remove(user_id)
-        # Keep room in registry even when empty so matchmaker sees "0/2"; game can report it
+        if user_id and user_id in room.current_players:
+            room.current_players = tuple(p for p in room.current_players if p != user_id)
+            _mark_changed(room_id)
+        # Keep room in registry even when empty so matchmaker sees "0/2"; game can report it.
+        # Idle empty rooms are dropped by the consumers' room sweeper (unregister_room_if_empty).
+
+
+def unregister_room_if_empty(room_id: str) -> bool:
+    """Remove the room if it has no players. Returns True if it was removed."""
+    with _lock:
+        room = _rooms.get(room_id)
+        if room is None or room.current_players:
+            return False
+        del _rooms[room_id]
+        return True
+
+
+def room_count() -> int:
+    with _lock:
+        return len(_rooms)
 
 
 def get_all_rooms_snapshot() -> list[dict]:
     """Return list of { room_id, capacity, current_players } for matchmaker status. Only rooms with at least one player.
     Returns a new list so the caller cannot mutate the registry."""
     with _lock:
-        return [
-            {
-                "room_id": str(rid),
-                "capacity": int(data["capacity"]),
-                "current_players": list(data["current_players"]),
-            }
-            for rid, data in list(_rooms.items())
-            if data.get("current_players")
-        ]
+        return [_snapshot_entry(rid, room) for rid, room in _rooms.items() if room.current_players]
+
+
+def _snapshot_entry(room_id: str, room: RoomEntry) -> dict:
+    return {
+        "room_id": str(room_id),
+        "capacity": int(room.capacity),
+        "current_players": list(room.current_players),
+    }
+
+
+def pending_changes() -> tuple[int, list[dict], list[str]]:
+    """Changes not yet acknowledged: (version, rooms to upsert, room_ids to remove). A room is removed
+    when it is gone or has no players (the snapshot only lists rooms with players)."""
+    with _lock:
+        upserted = []
+        removed = []
+        for room_id in _changed:
+            room = _rooms.get(room_id)
+            if room is not None and room.current_players:
+                upserted.append(_snapshot_entry(room_id, room))
+            else:
+                removed.append(str(room_id))
+        return _version, upserted, removed
+
+
+def acknowledge(version: int) -> None:
+    """Forget changes up to version (they have been delivered)."""
+    with _lock:
+        for room_id in [rid for rid, v in _changed.items() if v <= version]:
+            del _changed[room_id]
+
+
+def wait_for_change(timeout: float) -> bool:
+    """Block until a change is recorded or timeout passes. Returns True (and clears the flag) on a change."""
+    if not _dirty.wait(timeout):
+        return False
+    _dirty.clear()
+    return True
+
+
+def mark_dirty() -> None:
+    """Raise the dirty flag without a change, e.g. to retry a failed push."""
+    _dirty.set()
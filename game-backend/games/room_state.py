@@ -0,0 +1,56 @@
+"""
+Compact per-room checkers state for this process (see games.consumers).
+
+RoomState has __slots__ (no per-instance __dict__), and its board is always packed as a games.bitboard.BitBoard
+(three ints) whichever engine CHECKERS_ENGINE selects; board_for(engine) returns the engine's own form
+when moves are generated or applied. The "list" engine's form is kept per state (list_board, also set when the
+state was built from a list board), so it is converted at most once per position. Positions cross the state store boundary as plain dicts
+(position() / from_position()).
+"""
+from . import bitboard
+
+POSITION_FIELDS = ("board", "current_turn", "winner", "must_continue", "version", "hash", "quiet_plies", "history")
+
+
+class RoomState:
+    """A stored position plus caches derived from it: list_board (the board as games.checkers lists),
+    last_delta (the move that produced it), legal_moves (for the side to move), frames and delta_frames
+    (pre-encoded messages). The position is never changed
+    in place once the state is published; only the caches are filled in."""
+
+    __slots__ = POSITION_FIELDS + ("list_board", "last_delta", "legal_moves", "frames", "delta_frames")
+
+    def __init__(self, board, current_turn: str, winner: str | None = None, must_continue=None, version: int = 0,
+                 hash: int = 0, quiet_plies: int = 0, history: dict | None = None):
+        if isinstance(board, bitboard.BitBoard):
+            self.board, self.list_board = board, None
+        else:
+            self.board, self.list_board = bitboard.board_from_state(board), board
+        self.current_turn = current_turn
+        self.winner = winner
+        self.must_continue = tuple(must_continue) if must_continue else None
+        self.version = version
+        self.hash = hash
+        self.quiet_plies = quiet_plies
+        # Zobrist hash -> times seen, since the last capture or man move (earlier positions cannot recur).
+        self.history = history if history is not None else {hash: 1}
+        self.last_delta = None
+        self.legal_moves = None
+        self.frames = None
+        self.delta_frames = None
+
+    @classmethod
+    def from_position(cls, position: dict) -> "RoomState":
+        return cls(**{field: position[field] for field in POSITION_FIELDS})
+
+    def position(self) -> dict:
+        return {field: getattr(self, field) for field in POSITION_FIELDS}
+
+    def board_for(self, engine):
+        """The board in engine's native form (games.bitboard or games.checkers). The checkers form is shared
+        by every caller of this state, so it must not be changed in place."""
+        if engine is bitboard:
+            return self.board
+        if self.list_board is None:
+            self.list_board = bitboard.board_to_state(self.board)
+        return self.list_board
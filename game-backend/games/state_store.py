@@ -0,0 +1,279 @@
+"""
+Storage backends for checkers room state, so a room can be served by several Daphne workers or hosts.
+A room is a position { board, current_turn, winner, must_continue, version, hash, quiet_plies, history }
+plus two seats
+(black/red), each holding a channel name and an optional user_id.
+Positions are replaced with compare-and-set on version, so two workers cannot both apply a move
+to the same position. Seats are claimed and released atomically.
+
+CHECKERS_STATE_STORE selects the backend: "memory" (this process only) or "redis" (shared, uses REDIS_URL).
+Idle rooms: the memory store's rooms are deleted by the consumers' room sweeper; Redis rooms expire after
+CHECKERS_ROOM_IDLE_SECONDS without a write, and the sweeper refreshes rooms that still have connections (touch).
+"""
+import struct
+
+from django.conf import settings
+
+from . import bitboard, checkers
+
+SEATS = ("black", "red")
+ROOM_KEY_PREFIX = "checkers:room:"
+
+# version, black bits, red bits, king bits, turn, winner, must_continue square (row * 8 + col, 255 = none)
+_POSITION = struct.Struct("<QIIIBBB")
+# followed by: Zobrist hash, plies since the last capture, history length, then (hash, count) per entry
+_HISTORY_HEADER = struct.Struct("<QHB")
+_HISTORY_ENTRY = struct.Struct("<QB")
+_TURNS = ("black", "red")
+_WINNERS = (None, "black", "red", "draw")
+_NO_SQUARE = 255
+
+
+def encode_position(position: dict) -> bytes:
+    """Pack a position into 34 bytes plus 9 per history entry. board may be a games.checkers list board or a BitBoard."""
+    board = position["board"]
+    if not isinstance(board, bitboard.BitBoard):
+        board = bitboard.board_from_state(board)
+    must_continue = position.get("must_continue")
+    history = position.get("history") or {}
+    head = _POSITION.pack(
+        position["version"],
+        board.black,
+        board.red,
+        board.kings,
+        _TURNS.index(position["current_turn"]),
+        _WINNERS.index(position.get("winner")),
+        must_continue[0] * 8 + must_continue[1] if must_continue else _NO_SQUARE,
+    )
+    tail = b"".join(_HISTORY_ENTRY.pack(h, count) for h, count in history.items())
+    return head + _HISTORY_HEADER.pack(position.get("hash", 0), position.get("quiet_plies", 0), len(history)) + tail
+
+
+def decode_position(data: bytes, engine) -> dict:
+    """Unpack encode_position output; board is returned in the given engine's native form.
+    Positions stored before hashing was added get their hash computed and an empty history."""
+    version, black, red, kings, turn, winner, square = _POSITION.unpack_from(data)
+    bb = bitboard.BitBoard(black, red, kings)
+    board = bb if engine is bitboard else bitboard.board_to_state(bb)
+    if len(data) > _POSITION.size:
+        h, quiet_plies, entries = _HISTORY_HEADER.unpack_from(data, _POSITION.size)
+        offset = _POSITION.size + _HISTORY_HEADER.size
+        history = dict(
+            _HISTORY_ENTRY.unpack_from(data, offset + i * _HISTORY_ENTRY.size) for i in range(entries)
+        )
+    else:
+        h = checkers.zobrist_hash(bitboard.board_to_state(bb), _TURNS[turn])
+        quiet_plies, history = 0, {h: 1}
+    return {
+        "board": board,
+        "current_turn": _TURNS[turn],
+        "winner": _WINNERS[winner],
+        "must_continue": None if square == _NO_SQUARE else (square // 8, square % 8),
+        "version": version,
+        "hash": h,
+        "quiet_plies": quiet_plies,
+        "history": history,
+    }
+
+
+class InMemoryGameStateStore:
+    """Process-local store. Positions are kept as dicts and must be treated as read-only by callers."""
+
+    # Only this process sees the rooms, so it may delete any room it finds idle.
+    shared = False
+
+    def __init__(self):
+        self._rooms: dict[str, dict] = {}
+
+    async def load(self, room_id: str) -> dict | None:
+        room = self._rooms.get(room_id)
+        return room["position"] if room else None
+
+    async def create(self, room_id: str, position: dict) -> dict:
+        """Store position if the room does not exist yet; return the room's current position."""
+        room = self._rooms.setdefault(
+            room_id,
+            {"position": position, "black_channel": None, "red_channel": None,
+             "black_user_id": None, "red_user_id": None},
+        )
+        return room["position"]
+
+    async def compare_and_set(self, room_id: str, position: dict, expected_version: int) -> bool:
+        room = self._rooms.get(room_id)
+        if room is None or room["position"]["version"] != expected_version:
+            return False
+        room["position"] = position
+        return True
+
+    async def claim_seat(self, room_id: str, channel_name: str) -> str | None:
+        """Give channel_name the first free seat (black, then red). Returns the color or None (spectator)."""
+        room = self._rooms.get(room_id)
+        if room is None:
+            return None
+        for color in SEATS:
+            if room[f"{color}_channel"] is None:
+                room[f"{color}_channel"] = channel_name
+                return color
+        return None
+
+    async def get_seats(self, room_id: str) -> dict[str, str | None]:
+        """Channel name holding each seat (None when free)."""
+        room = self._rooms.get(room_id) or {}
+        return {color: room.get(f"{color}_channel") for color in SEATS}
+
+    async def set_seat_user(self, room_id: str, color: str, user_id: str) -> None:
+        room = self._rooms.get(room_id)
+        if room is not None:
+            room[f"{color}_user_id"] = user_id
+
+    async def release_seat(self, room_id: str, channel_name: str) -> tuple[str | None, str | None, int]:
+        """Free the seat held by channel_name. Returns (color, user_id, seats still occupied)."""
+        room = self._rooms.get(room_id)
+        if room is None:
+            return None, None, 0
+        color = user_id = None
+        for seat in SEATS:
+            if room[f"{seat}_channel"] == channel_name:
+                color, user_id = seat, room[f"{seat}_user_id"]
+                room[f"{seat}_channel"] = None
+                room[f"{seat}_user_id"] = None
+        occupied = sum(1 for seat in SEATS if room[f"{seat}_channel"] is not None)
+        return color, user_id, occupied
+
+    async def delete(self, room_id: str) -> None:
+        self._rooms.pop(room_id, None)
+
+    async def touch(self, room_ids) -> None:
+        pass
+
+
+_CREATE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'pos') == 0 then
+    redis.call('HSET', KEYS[1], 'pos', ARGV[1], 'version', ARGV[2])
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return redis.call('HGET', KEYS[1], 'pos')
+"""
+
+_CAS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'version') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'pos', ARGV[2], 'version', ARGV[3])
+if tonumber(ARGV[4]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+return 1
+"""
+
+_CLAIM_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'pos') == 0 then
+    return false
+end
+for _, color in ipairs({'black', 'red'}) do
+    if redis.call('HSETNX', KEYS[1], color .. '_channel', ARGV[1]) == 1 then
+        return color
+    end
+end
+return false
+"""
+
+_RELEASE_SCRIPT = """
+local color, user_id = '', ''
+for _, seat in ipairs({'black', 'red'}) do
+    if redis.call('HGET', KEYS[1], seat .. '_channel') == ARGV[1] then
+        color = seat
+        user_id = redis.call('HGET', KEYS[1], seat .. '_user_id') or ''
+        redis.call('HDEL', KEYS[1], seat .. '_channel', seat .. '_user_id')
+    end
+end
+local occupied = redis.call('HEXISTS', KEYS[1], 'black_channel') + redis.call('HEXISTS', KEYS[1], 'red_channel')
+return {color, user_id, occupied}
+"""
+
+
+class RedisGameStateStore:
+    """Shared store: one Redis hash per room with the packed position ("pos"), its "version" for
+    compare-and-set, and the seat fields. Multi-field updates run as Lua scripts so they are atomic.
+    With room_ttl > 0, a room expires room_ttl seconds after its last create, move or touch."""
+
+    # Other workers may be serving the room; idle rooms are left to expire instead of being deleted.
+    shared = True
+
+    def __init__(self, url: str, engine, room_ttl: int = 0):
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._engine = engine
+        self._room_ttl = room_ttl
+        self._create = self._redis.register_script(_CREATE_SCRIPT)
+        self._cas = self._redis.register_script(_CAS_SCRIPT)
+        self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    @staticmethod
+    def _key(room_id: str) -> str:
+        return f"{ROOM_KEY_PREFIX}{room_id}"
+
+    async def load(self, room_id: str) -> dict | None:
+        data = await self._redis.hget(self._key(room_id), "pos")
+        return decode_position(data, self._engine) if data else None
+
+    async def create(self, room_id: str, position: dict) -> dict:
+        data = await self._create(
+            keys=[self._key(room_id)], args=[encode_position(position), position["version"], self._room_ttl],
+        )
+        return decode_position(data, self._engine)
+
+    async def compare_and_set(self, room_id: str, position: dict, expected_version: int) -> bool:
+        ok = await self._cas(
+            keys=[self._key(room_id)],
+            args=[expected_version, encode_position(position), position["version"], self._room_ttl],
+        )
+        return bool(ok)
+
+    async def claim_seat(self, room_id: str, channel_name: str) -> str | None:
+        color = await self._claim(keys=[self._key(room_id)], args=[channel_name])
+        return color.decode() if color else None
+
+    async def get_seats(self, room_id: str) -> dict[str, str | None]:
+        channels = await self._redis.hmget(self._key(room_id), [f"{color}_channel" for color in SEATS])
+        return {color: channel.decode() if channel else None for color, channel in zip(SEATS, channels)}
+
+    async def set_seat_user(self, room_id: str, color: str, user_id: str) -> None:
+        await self._redis.hset(self._key(room_id), f"{color}_user_id", user_id)
+
+    async def release_seat(self, room_id: str, channel_name: str) -> tuple[str | None, str | None, int]:
+        color, user_id, occupied = await self._release(keys=[self._key(room_id)], args=[channel_name])
+        return color.decode() or None, user_id.decode() or None, int(occupied)
+
+    async def delete(self, room_id: str) -> None:
+        await self._redis.delete(self._key(room_id))
+
+    async def touch(self, room_ids) -> None:
+        """Push back expiry of rooms that still have connections (one pipelined round trip)."""
+        if self._room_ttl <= 0:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for room_id in room_ids:
+                pipe.expire(self._key(room_id), self._room_ttl)
+            await pipe.execute()
+
+
+_store = None
+
+
+def get_state_store(engine):
+    """Return the process-wide store selected by CHECKERS_STATE_STORE (created on first use)."""
+    global _store
+    if _store is None:
+        redis_url = getattr(settings, "CHECKERS_STATE_REDIS_URL", "")
+        if getattr(settings, "CHECKERS_STATE_STORE", "memory") == "redis" and redis_url:
+            _store = RedisGameStateStore(
+                redis_url, engine, room_ttl=int(getattr(settings, "CHECKERS_ROOM_IDLE_SECONDS", 0)),
+            )
+        else:
+            _store = InMemoryGameStateStore()
+    return _store
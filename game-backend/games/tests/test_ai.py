@@ -0,0 +1,48 @@
+from games import ai, checkers
+
+
+def _empty_board():
+    return [[checkers.EMPTY] * checkers.BOARD_SIZE for _ in range(checkers.BOARD_SIZE)]
+
+
+def test_takes_the_double_capture_that_wins():
+    board = _empty_board()
+    board[1][0] = checkers.BLACK
+    board[2][1] = checkers.RED
+    board[4][3] = checkers.RED
+    assert ai.choose_move(board, "black", time_budget=1.0) == ((1, 0), (3, 2), (5, 4))
+
+
+def test_avoids_a_step_that_hands_over_a_capture():
+    board = _empty_board()
+    board[7][0] = checkers.RED_KING
+    board[7][6] = checkers.RED
+    board[5][4] = checkers.BLACK
+    board[0][7] = checkers.BLACK_KING
+    # Stepping (5, 4) to (6, 5) would be captured by red at (7, 6).
+    move = ai.choose_move(board, "black", time_budget=1.0, max_depth=4)
+    assert move is not None
+    assert move != ((5, 4), (6, 5))
+
+
+def test_returns_none_without_moves_and_the_only_move_without_searching():
+    board = _empty_board()
+    board[7][0] = checkers.BLACK
+    assert ai.choose_move(board, "black", time_budget=0.0) is None
+    board[2][1] = checkers.RED
+    board[1][2] = checkers.BLACK
+    board[1][0] = checkers.BLACK
+    assert ai.choose_move(board, "red", time_budget=0.0) == ((2, 1), (0, 3))
+
+
+def test_search_pool_is_shut_down_at_exit(monkeypatch):
+    registered = []
+    monkeypatch.setattr(ai, "_pool", None)
+    monkeypatch.setattr(ai.atexit, "register", registered.append)
+    pool = ai._get_pool()
+    assert ai._get_pool() is pool
+    assert registered == [ai._shutdown_pool]
+
+    ai._shutdown_pool()
+    assert ai._pool is None
+    assert pool._shutdown_thread
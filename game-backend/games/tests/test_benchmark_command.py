@@ -0,0 +1,19 @@
+import io
+import json
+
+from django.core.management import call_command
+
+
+def test_benchmark_checkers_emits_json_for_engines_and_websocket():
+    out = io.StringIO()
+    call_command(
+        "benchmark_checkers",
+        games=2, min_seconds=0.01, rooms=2, moves=4, spectators=1, memory_rooms=50, stdout=out,
+    )
+    results = json.loads(out.getvalue())
+    assert set(results["engine"]) == {"list", "bitboard"}
+    assert results["engine"]["bitboard"]["move_generation"]["moves_per_second"] > 0
+    assert results["websocket"]["list"]["moves"] > 0
+    assert results["websocket"]["list"]["latency_ms"]["p50"] is not None
+    memory = results["memory"]["room_state_bytes_per_room"]
+    assert 0 < memory["slots"] < memory["dict"]
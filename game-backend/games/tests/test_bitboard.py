@@ -0,0 +1,43 @@
+import random
+
+from games import bitboard, checkers
+
+
+def test_initial_board_round_trips_through_state():
+    bb = bitboard.initial_board()
+    assert bitboard.board_to_state(bb) == checkers.board_to_state(checkers.initial_board())
+    assert bitboard.board_from_state(checkers.initial_board()) == bb
+
+
+def test_jump_is_mandatory_and_promotes():
+    board = [[checkers.EMPTY] * 8 for _ in range(8)]
+    board[5][2] = checkers.BLACK
+    board[6][3] = checkers.RED
+    board[2][1] = checkers.RED
+    bb = bitboard.board_from_state(board)
+    assert bitboard.get_all_moves(bb, "black") == [(5, 2, 7, 4, True)]
+    bb, jump = bitboard.apply_move(bb, 5, 2, 7, 4)
+    assert jump == (6, 3)
+    assert bitboard.board_to_state(bb)[7][4] == checkers.BLACK_KING
+    assert bitboard.check_winner(bb) is None
+
+
+def test_random_games_match_list_engine():
+    rnd = random.Random(7)
+    for _ in range(50):
+        board = checkers.initial_board()
+        bb = bitboard.initial_board()
+        turn = "black"
+        for _ in range(150):
+            assert bitboard.board_to_state(bb) == checkers.board_to_state(board)
+            assert bitboard.check_winner(bb) == checkers.check_winner(board)
+            moves = checkers.get_all_moves(board, turn)
+            assert bitboard.get_all_moves(bb, turn) == moves
+            if not moves:
+                break
+            fr, fc, tr, tc, _ = rnd.choice(moves)
+            board, jump = checkers.apply_move(board, fr, fc, tr, tc)
+            bb, bb_jump = bitboard.apply_move(bb, fr, fc, tr, tc)
+            assert bb_jump == jump
+            assert bitboard.get_valid_jumps(bb, tr, tc) == checkers.get_valid_jumps(board, tr, tc)
+            turn = "red" if turn == "black" else "black"
@@ -0,0 +1,85 @@
+import random
+
+from games import checkers
+
+
+def _empty_board():
+    return [[checkers.EMPTY] * checkers.BOARD_SIZE for _ in range(checkers.BOARD_SIZE)]
+
+
+def test_capture_paths_follow_the_whole_chain():
+    board = _empty_board()
+    board[1][0] = checkers.BLACK
+    board[2][1] = checkers.RED
+    board[4][3] = checkers.RED
+    board[4][1] = checkers.RED
+    paths = checkers.get_capture_paths(board, "black")
+    assert paths == [((1, 0), (3, 2), (5, 0)), ((1, 0), (3, 2), (5, 4))]
+    new_board, captured = checkers.apply_path(board, paths[1])
+    assert captured == [(2, 1), (4, 3)]
+    assert new_board[5][4] == checkers.BLACK
+    assert new_board[4][1] == checkers.RED
+
+
+def test_capture_path_stops_when_man_is_crowned():
+    board = _empty_board()
+    board[5][0] = checkers.BLACK
+    board[6][1] = checkers.RED
+    board[6][3] = checkers.RED  # a king on (7, 2) could jump this, a fresh king may not
+    assert checkers.get_capture_paths(board, "black") == [((5, 0), (7, 2))]
+
+
+def test_capture_paths_empty_without_jumps():
+    assert checkers.get_capture_paths(checkers.initial_board(), "black") == []
+
+
+def test_make_and_unmake_restore_board_through_random_games():
+    rnd = random.Random(5)
+    for _ in range(30):
+        board = checkers.initial_board()
+        history = []
+        color = "black"
+        for _ in range(120):
+            paths = checkers.get_capture_paths(board, color)
+            moves = checkers.get_all_moves(board, color)
+            if not moves:
+                break
+            path = rnd.choice(paths) if paths else (moves[0][:2], moves[0][2:4])
+            before = [row[:] for row in board]
+            expected, captured = checkers.apply_path(board, path)
+            undos = checkers.make_path(board, path)
+            assert board == expected
+            assert [u[5] for u in undos if u[5]] == captured
+            history.append((before, undos))
+            color = "red" if color == "black" else "black"
+        for before, undos in reversed(history):
+            checkers.unmake_path(board, undos)
+            assert board == before
+
+
+def test_unmake_reverts_promotion():
+    board = _empty_board()
+    board[6][1] = checkers.BLACK
+    undo = checkers.make_move(board, 6, 1, 7, 0)
+    assert board[7][0] == checkers.BLACK_KING
+    checkers.unmake_move(board, undo)
+    assert board[6][1] == checkers.BLACK
+    assert board[7][0] == checkers.EMPTY
+
+
+def test_incremental_zobrist_matches_full_hash():
+    rnd = random.Random(11)
+    for _ in range(20):
+        board = checkers.initial_board()
+        color = "black"
+        h = checkers.zobrist_hash(board, color)
+        for _ in range(120):
+            paths = checkers.get_capture_paths(board, color)
+            moves = checkers.get_all_moves(board, color)
+            if not moves:
+                break
+            path = rnd.choice(paths) if paths else rnd.choice([(m[:2], m[2:4]) for m in moves])
+            undos = checkers.make_path(board, path)
+            color = "red" if color == "black" else "black"
+            h = checkers.zobrist_update(h, board, undos)
+            assert h == checkers.zobrist_hash(board, color)
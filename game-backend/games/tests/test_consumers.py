@@ -0,0 +1,309 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from games import checkers, consumers, room_registry, state_store
+from games.consumers import CheckersConsumer
+
+
+@pytest.fixture(autouse=True)
+def fresh_rooms(monkeypatch):
+    monkeypatch.setattr(state_store, "_store", None)
+    monkeypatch.setattr(consumers, "_game_states", {})
+    monkeypatch.setattr(consumers, "_room_actors", {})
+    monkeypatch.setattr(consumers, "_room_activity", OrderedDict())
+    monkeypatch.setattr(consumers, "_sweeper_task", None)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _join(room_id: str) -> tuple[WebsocketCommunicator, dict]:
+    comm = WebsocketCommunicator(CheckersConsumer.as_asgi(), f"/ws/checkers/?room_id={room_id}")
+    connected, _ = await comm.connect()
+    assert connected
+    return comm, await comm.receive_json_from()
+
+
+def test_move_is_validated_and_broadcast_to_both_players():
+    async def play():
+        black, black_state = await _join("move-room")
+        red, red_state = await _join("move-room")
+        spectator, spectator_state = await _join("move-room")
+        assert black_state["myColor"] == "black"
+        assert red_state["myColor"] == "red"
+        assert spectator_state["myColor"] is None
+        assert spectator_state["validMoves"] == []
+        assert {"from": [2, 1], "to": [3, 0]} in black_state["validMoves"]
+
+        await red.send_json_to({"type": "move", "from": [5, 0], "to": [4, 1]})  # not red's turn
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [4, 3]})  # not a legal move
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        black_after = await black.receive_json_from()
+        red_after = await red.receive_json_from()
+        assert black_after["board"][3][0] == 1
+        assert black_after["currentTurn"] == "red"
+        assert black_after["validMoves"] == []
+        assert red_after["validMoves"]
+        spectator_after = await spectator.receive_json_from()
+        assert spectator_after["board"] == black_after["board"]
+        assert spectator_after["validMoves"] == []
+        assert await black.receive_nothing()
+        await spectator.disconnect()
+        await black.disconnect()
+        await red.disconnect()
+
+    _run(play())
+
+
+def test_legal_move_cache_is_invalidated_on_reset():
+    async def play():
+        black, _ = await _join("reset-room")
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        await black.receive_json_from()
+        state = consumers._game_states["reset-room"]
+        assert state.current_turn == "red"
+        assert state.legal_moves is not None
+        await black.send_json_to({"type": "reset"})
+        after = await black.receive_json_from()
+        assert after["currentTurn"] == "black"
+        assert {"from": [2, 1], "to": [3, 0]} in after["validMoves"]
+        await black.disconnect()
+
+    _run(play())
+
+
+def test_list_engine_converts_each_position_once(settings, monkeypatch):
+    settings.CHECKERS_ENGINE = "list"
+    conversions = []
+    board_to_state = consumers.bitboard.board_to_state
+    monkeypatch.setattr(consumers.bitboard, "board_to_state", lambda bb: conversions.append(bb) or board_to_state(bb))
+
+    async def play():
+        black, _ = await _join("list-room")
+        red, _ = await _join("list-room")
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        await black.receive_json_from()
+        await red.receive_json_from()
+        state = consumers._game_states["list-room"]
+        assert state.board_for(checkers) is state.list_board
+        assert state.board_for(checkers)[3][0] == checkers.BLACK
+        await black.disconnect()
+        await red.disconnect()
+
+    _run(play())
+    # Only the initial position is converted; the moved board came from the list engine itself.
+    assert len(conversions) == 1
+
+
+def test_delta_protocol_sends_changed_squares_after_snapshot():
+    async def play():
+        comm = WebsocketCommunicator(CheckersConsumer.as_asgi(), "/ws/checkers/?room_id=delta-room&protocol=delta")
+        connected, _ = await comm.connect()
+        assert connected
+        snapshot = await comm.receive_json_from()
+        assert snapshot["type"] == "state"
+        version = snapshot["version"]
+
+        await comm.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        delta = await comm.receive_json_from()
+        assert delta["type"] == "delta"
+        assert delta["baseVersion"] == version
+        assert delta["version"] == version + 1
+        assert delta["changes"] == [[2, 1, 0], [3, 0, 1]]
+        assert delta["captured"] == []
+        assert delta["promoted"] is False
+        assert delta["currentTurn"] == "red"
+        assert "board" not in delta
+
+        await comm.send_json_to({"type": "resync"})
+        resync = await comm.receive_json_from()
+        assert resync["type"] == "state"
+        assert resync["version"] == version + 1
+        assert resync["board"][3][0] == 1
+
+        await comm.send_json_to({"type": "reset"})
+        reset = await comm.receive_json_from()
+        assert reset["type"] == "state"
+        assert reset["version"] == version + 2
+        await comm.disconnect()
+
+    _run(play())
+
+
+def test_capture_chain_is_applied_from_one_path_message():
+    board = [[checkers.EMPTY] * 8 for _ in range(8)]
+    board[1][0] = checkers.BLACK
+    board[2][1] = checkers.RED
+    board[4][3] = checkers.RED
+    board[6][7] = checkers.RED
+
+    async def play():
+        black, _ = await _join("path-room")
+        position = {**consumers._new_position(version=1), "board": board}
+        assert await consumers._store().compare_and_set("path-room", position, 0)
+        await black.send_json_to({"type": "resync"})
+        snapshot = await black.receive_json_from()
+        assert snapshot["validPaths"] == [[[1, 0], [3, 2], [5, 4]]]
+
+        await black.send_json_to({"type": "move", "path": [[1, 0], [3, 2]]})  # stops mid-chain
+        await black.send_json_to({"type": "move", "path": [[1, 0], [3, 2], [5, 4]]})
+        after = await black.receive_json_from()
+        assert after["board"][5][4] == checkers.BLACK
+        assert after["board"][2][1] == checkers.EMPTY
+        assert after["board"][4][3] == checkers.EMPTY
+        assert after["mustContinue"] is None
+        assert after["currentTurn"] == "red"
+        assert await black.receive_nothing()
+        await black.disconnect()
+
+    _run(play())
+
+
+def test_queued_moves_are_applied_in_order_and_broadcast_once():
+    class Seat:
+        def __init__(self, color):
+            self._color = color
+
+    async def play():
+        viewer, _ = await _join("burst-room")
+        actor = consumers._room_actors["burst-room"]
+        actor.submit(Seat("black"), {"type": "move", "from": [2, 1], "to": [3, 0]})
+        actor.submit(Seat("red"), {"type": "move", "from": [5, 2], "to": [4, 3]})
+        state = await viewer.receive_json_from()
+        assert state["version"] == 2
+        assert state["board"][3][0] == checkers.BLACK
+        assert state["board"][4][3] == checkers.RED
+        assert state["currentTurn"] == "black"
+        assert await viewer.receive_nothing()
+        await viewer.disconnect()
+        assert "burst-room" not in consumers._room_actors
+
+    _run(play())
+
+
+def test_bot_fills_empty_seat_and_answers_moves(settings):
+    settings.CHECKERS_AI_TIME_BUDGET = 0.05
+    settings.CHECKERS_AI_WORKERS = 1
+
+    async def play():
+        black, _ = await _join("bot-room")
+        await black.send_json_to({"type": "add_bot"})
+        seated = await black.receive_json_from()
+        assert seated["version"] == 0
+        assert (await consumers._store().get_seats("bot-room"))["red"] == consumers.BOT_CHANNEL
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        assert (await black.receive_json_from())["currentTurn"] == "red"
+        answered = await black.receive_json_from(timeout=30)
+        assert answered["version"] == 2
+        assert answered["currentTurn"] == "black"
+        assert answered["validMoves"]
+        await black.disconnect()
+        assert (await consumers._store().get_seats("bot-room"))["red"] is None
+
+    _run(play())
+
+
+def test_bot_moves_again_when_its_commit_loses(settings, monkeypatch):
+    settings.CHECKERS_AI_TIME_BUDGET = 0.05
+    settings.CHECKERS_AI_WORKERS = 1
+
+    async def play():
+        black, _ = await _join("bot-cas-room")
+        await black.send_json_to({"type": "add_bot"})
+        await black.receive_json_from()
+        store = consumers._store()
+        compare_and_set = store.compare_and_set
+        attempts = []
+
+        async def lose_first_bot_commit(room_id, position, expected_version):
+            attempts.append(expected_version)
+            if expected_version == 1 and attempts.count(1) == 1:
+                return False  # as if another worker had written first
+            return await compare_and_set(room_id, position, expected_version)
+
+        monkeypatch.setattr(store, "compare_and_set", lose_first_bot_commit)
+        await black.send_json_to({"type": "move", "from": [2, 1], "to": [3, 0]})
+        assert (await black.receive_json_from())["currentTurn"] == "red"
+        answered = await black.receive_json_from(timeout=30)
+        assert answered["version"] == 2
+        assert answered["currentTurn"] == "black"
+        assert attempts == [0, 1, 1]
+        await black.disconnect()
+
+    _run(play())
+
+
+def test_third_repetition_is_a_draw_and_finished_room_is_evicted():
+    board = [[checkers.EMPTY] * 8 for _ in range(8)]
+    board[0][1] = checkers.BLACK_KING
+    board[7][6] = checkers.RED_KING
+    h = checkers.zobrist_hash(board, "black")
+
+    async def play():
+        black, _ = await _join("draw-room")
+        red, _ = await _join("draw-room")
+        position = {**consumers._new_position(version=1), "board": board, "hash": h, "history": {h: 1}}
+        assert await consumers._store().compare_and_set("draw-room", position, 0)
+        shuffle = [
+            (black, [0, 1], [1, 0]), (red, [7, 6], [6, 7]), (black, [1, 0], [0, 1]), (red, [6, 7], [7, 6]),
+        ] * 2
+        for mover, frm, to in shuffle:
+            await mover.send_json_to({"type": "move", "from": frm, "to": to})
+            state = await black.receive_json_from()
+            await red.receive_json_from()
+        assert state["winner"] == "draw"
+        assert state["validMoves"] == []
+        await black.disconnect()
+        await red.disconnect()
+        assert await consumers._store().load("draw-room") is None
+        assert "draw-room" not in consumers._game_states
+
+    _run(play())
+
+
+def test_finished_room_stays_in_a_shared_store_when_the_last_local_player_leaves(monkeypatch):
+    async def play():
+        monkeypatch.setattr(consumers._store(), "shared", True)
+        black, _ = await _join("shared-room")
+        position = {**consumers._new_position(version=1), "winner": "black"}
+        assert await consumers._store().compare_and_set("shared-room", position, 0)
+        await black.disconnect()
+        assert "shared-room" not in consumers._game_states
+        assert (await consumers._store().load("shared-room"))["winner"] == "black"
+
+    _run(play())
+
+
+def test_sweeper_evicts_idle_rooms_and_caps_held_rooms(settings):
+    settings.CHECKERS_ROOM_IDLE_SECONDS = 60
+    settings.CHECKERS_MAX_ROOMS = 2
+
+    async def play():
+        for room_id in ("old", "mid", "new"):
+            comm, _ = await _join(room_id)
+            await comm.disconnect()
+        playing, _ = await _join("playing")
+        now = time.monotonic()
+        consumers._room_activity["old"] = now - 120
+
+        # "old" is idle past the TTL; "mid" goes to bring the count within the cap (least recently active).
+        assert await consumers.sweep_rooms(now) == ["old", "mid"]
+        assert set(consumers._game_states) == {"new", "playing"}
+        assert await consumers._store().load("old") is None
+        assert "old" not in [room["room_id"] for room in room_registry.get_all_rooms_snapshot()]
+
+        # Rooms with connections stay even when idle.
+        assert await consumers.sweep_rooms(now + 3600) == ["new"]
+        gauges = consumers.room_gauges()
+        assert gauges["rooms"] == 1
+        assert gauges["connected_rooms"] == 1
+        assert gauges["evicted"] == 3
+        assert gauges["bytes"] > 0
+        await playing.disconnect()
+
+    _run(play())
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from games.http_pool import HTTPPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections: set = set()
+    requests: Counter = Counter()
+
+    def do_POST(self):
+        self.connections.add(self.client_address)
+        self.requests[self.path] += 1
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/slow/":
+            time.sleep(1)
+        if self.path == "/hang-up/":
+            self.close_connection = True  # without telling the client, like an idle timeout on the server
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.connections = set()
+    _Handler.requests = Counter()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_requests_reuse_keep_alive_connections(server):
+    pool = HTTPPool(server, max_connections=2, timeout=2)
+    for i in range(5):
+        assert pool.request("POST", "/echo/", body=str(i).encode()) == (200, str(i).encode())
+    assert len(_Handler.connections) == 1
+
+    with ThreadPoolExecutor(max_workers=10) as threads:
+        results = list(threads.map(lambda _: pool.request("POST", "/echo/", body=b"x"), range(10)))
+    assert all(status == 200 for status, _ in results)
+    assert len(_Handler.connections) <= 2
+    pool.close()
+
+
+def test_unreachable_server_raises_connection_error():
+    pool = HTTPPool("http://127.0.0.1:9", timeout=0.5)
+    with pytest.raises(ConnectionError):
+        pool.request("GET", "/")
+
+
+def test_stale_keep_alive_connection_is_retried(server):
+    pool = HTTPPool(server, max_connections=1, timeout=2)
+    assert pool.request("POST", "/hang-up/", body=b"a") == (200, b"a")
+    time.sleep(0.1)  # let the server close its end
+    assert pool.request("POST", "/echo/", body=b"b") == (200, b"b")
+    assert _Handler.requests["/echo/"] == 1
+    assert len(_Handler.connections) == 2  # the second request went out again on a new connection
+    pool.close()
+
+
+def test_timeout_on_reused_connection_is_not_retried(server):
+    pool = HTTPPool(server, max_connections=1, timeout=0.3)
+    assert pool.request("POST", "/echo/", body=b"a") == (200, b"a")
+    with pytest.raises(ConnectionError):
+        pool.request("POST", "/slow/", body=b"b")
+    time.sleep(1)
+    assert _Handler.requests["/slow/"] == 1
+    pool.close()
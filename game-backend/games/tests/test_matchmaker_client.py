@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from games import matchmaker_client, room_registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(room_registry, "_rooms", {})
+    monkeypatch.setattr(room_registry, "_changed", {})
+    monkeypatch.setattr(room_registry, "_version", 0)
+    monkeypatch.setattr(room_registry, "_dirty", threading.Event())
+    monkeypatch.setattr(matchmaker_client, "_reported_version", None)
+    monkeypatch.setattr(matchmaker_client, "_pending_activity", {})
+
+
+def test_push_acknowledges_only_on_success(monkeypatch):
+    sent = []
+    results = iter([False, True])
+    monkeypatch.setattr(
+        matchmaker_client, "report_status", lambda sid, rooms, version: sent.append(rooms) or next(results),
+    )
+    room_registry.add_player_to_room("a", "u1", 2)
+
+    assert not matchmaker_client.push_status_once("server", room_registry.get_all_rooms_snapshot)
+    assert room_registry.pending_changes()[1]
+    assert matchmaker_client.push_status_once("server", room_registry.get_all_rooms_snapshot)
+    assert room_registry.pending_changes()[1:] == ([], [])
+    assert sent[-1] == [{"room_id": "a", "capacity": 2, "current_players": ["u1"]}]
+
+
+def test_push_sends_deltas_after_full_report_and_resyncs_on_conflict(monkeypatch):
+    posts = []
+    codes = iter([204, 204, 409, 204])
+    monkeypatch.setattr(matchmaker_client, "_post_status", lambda payload: posts.append(payload) or next(codes))
+    room_registry.add_player_to_room("a", "u1", 2)
+    assert matchmaker_client.push_status_once("server", room_registry.get_all_rooms_snapshot)
+    assert posts[-1]["rooms"] and posts[-1]["version"] == 1
+
+    room_registry.add_player_to_room("b", "u2", 2)
+    assert matchmaker_client.push_status_once("server", room_registry.get_all_rooms_snapshot)
+    assert posts[-1]["base_version"] == 1
+    assert [room["room_id"] for room in posts[-1]["upserted"]] == ["b"]
+
+    # The matchmaker lost our status: the empty keepalive delta gets a 409, then a full report goes out.
+    assert matchmaker_client.push_status_once("server", room_registry.get_all_rooms_snapshot)
+    assert posts[-2] == {"server_id": "server", "base_version": 2, "version": 2, "upserted": [], "removed": []}
+    assert [room["room_id"] for room in posts[-1]["rooms"]] == ["a", "b"]
+
+
+def test_activity_is_batched_per_server_and_requeued_on_retryable_errors(monkeypatch, caplog):
+    monkeypatch.setattr(matchmaker_client, "_get_app_token", lambda: "token")
+    dropped_tokens = []
+    monkeypatch.setattr(matchmaker_client, "_drop_app_token", lambda: dropped_tokens.append(True))
+    calls = []
+    results = iter([None, (503, b""), (401, b""), (200, b"{}"), (400, b"")])
+    monkeypatch.setattr(
+        matchmaker_client, "_call", lambda method, path, payload, token: calls.append((path, payload)) or next(results),
+    )
+    for user_id, server_id in [("u1", "s1"), ("u2", "s1"), ("u1", "s1"), ("u3", "s2")]:
+        matchmaker_client.queue_activity(user_id, server_id)
+
+    assert not matchmaker_client.flush_activity()  # unreachable
+    assert not matchmaker_client.flush_activity()  # 503
+    assert not matchmaker_client.flush_activity()  # 401: token dropped
+    assert dropped_tokens == [True]
+    assert matchmaker_client.flush_activity()
+    assert matchmaker_client.flush_activity()  # nothing queued: no request
+    assert len(calls) == 4
+    path, payload = calls[-1]
+    assert path == "/api/v1/app/activity/batch/"
+    assert payload == {"activity": [{"server_id": "s1", "user_ids": ["u1", "u2"]}, {"server_id": "s2", "user_ids": ["u3"]}]}
+    assert all(c == calls[0] for c in calls)
+
+    # Any other error drops the batch, with a warning.
+    matchmaker_client.queue_activity("u4", "s1")
+    assert not matchmaker_client.flush_activity()
+    assert matchmaker_client._pending_activity == {}
+    assert "dropped activity for 1 servers" in caplog.text
@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from games import room_registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(room_registry, "_rooms", {})
+    monkeypatch.setattr(room_registry, "_changed", {})
+    monkeypatch.setattr(room_registry, "_version", 0)
+    monkeypatch.setattr(room_registry, "_dirty", threading.Event())
+
+
+def test_player_changes_are_tracked_until_acknowledged():
+    room_registry.add_player_to_room("a", None, 2)
+    assert not room_registry.wait_for_change(0)  # an empty room is not visible to the matchmaker
+
+    room_registry.add_player_to_room("a", "u1", 2)
+    room_registry.add_player_to_room("b", "u2", 2)
+    assert room_registry.wait_for_change(0)
+    version, upserted, removed = room_registry.pending_changes()
+    assert version == 2
+    assert [room["room_id"] for room in upserted] == ["a", "b"]
+    assert removed == []
+
+    room_registry.acknowledge(version)
+    room_registry.remove_player_from_room("a", "u1")
+    version, upserted, removed = room_registry.pending_changes()
+    assert version == 3
+    assert (upserted, removed) == ([], ["a"])
@@ -0,0 +1,56 @@
+import asyncio
+
+from games import bitboard, checkers
+from games.state_store import InMemoryGameStateStore, decode_position, encode_position
+
+
+def test_position_codec_round_trips_for_both_engines():
+    board, _ = checkers.apply_move(checkers.initial_board(), 2, 1, 3, 0)
+    position = {
+        "board": board,
+        "current_turn": "red",
+        "winner": None,
+        "must_continue": (3, 0),
+        "version": 42,
+        "hash": checkers.zobrist_hash(board, "red"),
+        "quiet_plies": 3,
+        "history": {checkers.zobrist_hash(board, "red"): 2, 7: 1},
+    }
+    data = encode_position(position)
+    assert len(data) == 34 + 2 * 9
+    assert decode_position(data, checkers) == position
+    legacy = decode_position(data[:23], checkers)
+    assert legacy["hash"] == position["hash"]
+    assert legacy["history"] == {position["hash"]: 1}
+    decoded = decode_position(data, bitboard)
+    assert decoded["board"] == bitboard.board_from_state(board)
+    assert decoded["must_continue"] == (3, 0)
+
+
+def test_compare_and_set_rejects_stale_version():
+    async def scenario():
+        store = InMemoryGameStateStore()
+        initial = {"board": checkers.initial_board(), "current_turn": "black", "winner": None,
+                   "must_continue": None, "version": 0}
+        assert await store.create("room", initial) is initial
+        moved = {**initial, "current_turn": "red", "version": 1}
+        assert await store.compare_and_set("room", moved, 0)
+        assert not await store.compare_and_set("room", {**initial, "version": 1}, 0)
+        assert (await store.load("room"))["current_turn"] == "red"
+
+    asyncio.run(scenario())
+
+
+def test_seats_are_claimed_in_order_and_released():
+    async def scenario():
+        store = InMemoryGameStateStore()
+        await store.create("room", {"version": 0})
+        assert await store.claim_seat("room", "a") == "black"
+        assert await store.claim_seat("room", "b") == "red"
+        assert await store.claim_seat("room", "c") is None
+        await store.set_seat_user("room", "black", "user-1")
+        assert await store.release_seat("room", "a") == ("black", "user-1", 1)
+        assert await store.claim_seat("room", "c") == "black"
+        assert await store.release_seat("room", "spectator") == (None, None, 2)
+
+    asyncio.run(scenario())
@@ -7,13 +7,14 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .matchmaker_client import get_cached_online_users, report_activity
+from .consumers import room_gauges
+from .matchmaker_client import get_cached_online_users, queue_activity
 
 
 @api_view(["GET"])
 def health(request):
-    """Health check endpoint for the game-backend service."""
-    return Response({"status": "ok", "service": "game-backend"})
+    """Health check endpoint for the game-backend service. "rooms" has the checkers room gauges."""
+    return Response({"status": "ok", "service": "game-backend", "rooms": room_gauges()})
 
 
 @api_view(["GET"])
@@ -29,7 +30,8 @@ def online_users(request):
 def heartbeat(request):
     """
     Record that the given user is still online on this server. Called by the game-frontend every ~10s.
-    POST body: {"user_id": "<uuid>", "server_id": "<uuid>"}. Returns 204 on success.
+    POST body: {"user_id": "<uuid>", "server_id": "<uuid>"}. Returns 204 on success, without waiting for the
+    matchmaker (the activity is queued and reported with the next batch).
     """
     data = request.data or {}
     user_id = data.get("user_id")
@@ -44,7 +46,7 @@ def heartbeat(request):
             {"detail": "Missing server_id."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    report_activity(user_id, server_id)
+    queue_activity(user_id, server_id)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -79,7 +81,7 @@ def login(request):
             result = json.loads(body)
             user_id = result.get("user_id")
             if user_id and server_id:
-                report_activity(user_id, server_id)
+                queue_activity(user_id, server_id)
             return Response(result, status=resp.status)
     except urllib.error.HTTPError as e:
         body = e.read().decode("utf-8")
@@ -471,7 +471,9 @@ export default function Checkers() {
                 className="badge badge-ok"
                 style={{ boxShadow: '0 2px 8px rgba(34,197,94,0.3)', fontWeight: 600 }}
               >
-                {state.winner === state.myColor ? 'You win!' : `${state.winner} wins!`}
+                {state.winner === 'draw'
+                  ? 'Draw!'
+                  : state.winner === state.myColor ? 'You win!' : `${state.winner} wins!`}
               </span>
             ) : canMove ? (
               <span
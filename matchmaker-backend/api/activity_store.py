@@ -1,32 +1,139 @@
 """
-In-memory store for user activity per app and server. Used to determine "online" users
-(made a request within ONLINE_WINDOW_SECONDS). Cleared when the backend process restarts.
+Store for user activity per app and server. Used to determine "online" users
+(made a request within ONLINE_WINDOW_SECONDS).
+
+MATCHMAKER_STORE selects the backend: "memory" (this process only, cleared on restart) or "redis" (shared by
+every matchmaker worker, uses MATCHMAKER_REDIS_URL).
+
+Memory: presence is indexed by (app_id, server_id): each server keeps its users in a dict ordered by last
+activity (a user is moved to the end when seen again), so the users that went offline are always at the front.
+A timing wheel of one-second buckets records which servers had activity in each second; once a bucket is
+older than the window, those servers are trimmed from the front. Lookups and expiry therefore touch only
+the users of the server concerned, and users who stopped sending heartbeats are dropped, not kept forever.
+Concurrent requests can record slightly out of time order, so that order only steers cleanup: lookups still
+check each user's own last activity, and an out-of-order record joins the newest wheel bucket.
+
+Redis: one sorted set per (app_id, server_id), user_id scored by last activity (epoch seconds). Writes trim
+entries older than the window and set the key to expire with it, so abandoned servers disappear.
 """
+import threading
 import uuid
 from datetime import datetime, timedelta, timezone
 
-ONLINE_WINDOW_SECONDS = 15
+from django.conf import settings
 
-# (app_id_str, server_id_str, user_id_str) -> last_activity_at (datetime UTC)
-_activity: dict[tuple[str, str, str], datetime] = {}
+ONLINE_WINDOW_SECONDS = 15
+PRESENCE_KEY_PREFIX = "matchmaker:presence:"
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+class InMemoryActivityStore:
+    def __init__(self):
+        # (app_id_str, server_id_str) -> {user_id_str: last_activity_at (datetime UTC)}, oldest activity first
+        self._presence: dict[tuple[str, str], dict[str, datetime]] = {}
+        # epoch second -> (app_id_str, server_id_str) keys with activity in that second, oldest second first
+        self._wheel: dict[int, set[tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _trim(self, key: tuple[str, str], cutoff: datetime) -> None:
+        """Drop users of one server whose last activity is before cutoff; call with _lock held."""
+        users = self._presence.get(key)
+        if users is None:
+            return
+        while users:
+            user_id, at = next(iter(users.items()))
+            if at >= cutoff:
+                break
+            del users[user_id]
+        if not users:
+            del self._presence[key]
+
+    def _expire(self, now: datetime) -> None:
+        """Trim every server that had activity in a bucket which has left the window; call with _lock held."""
+        cutoff = now - timedelta(seconds=ONLINE_WINDOW_SECONDS)
+        cutoff_second = int(cutoff.timestamp())
+        while self._wheel:
+            second = next(iter(self._wheel))
+            if second >= cutoff_second:
+                break
+            for key in self._wheel.pop(second):
+                self._trim(key, cutoff)
+
+    def record(self, app_id: str, server_id: str, user_ids: list[str], at: datetime) -> None:
+        key = (app_id, server_id)
+        with self._lock:
+            users = self._presence.setdefault(key, {})
+            for user_id in user_ids:
+                users.pop(user_id, None)
+                users[user_id] = at
+            second = int(at.timestamp())
+            if self._wheel:
+                second = max(second, next(reversed(self._wheel)))  # keep the wheel in time order
+            self._wheel.setdefault(second, set()).add(key)
+            self._expire(at)
+
+    def online_user_ids(self, app_id: str, server_id: str, now: datetime) -> list[str]:
+        key = (app_id, server_id)
+        cutoff = now - timedelta(seconds=ONLINE_WINDOW_SECONDS)
+        with self._lock:
+            self._expire(now)
+            self._trim(key, cutoff)
+            return [user_id for user_id, at in self._presence.get(key, {}).items() if at >= cutoff]
+
+
+class RedisActivityStore:
+    def __init__(self, url: str):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(app_id: str, server_id: str) -> str:
+        return f"{PRESENCE_KEY_PREFIX}{app_id}:{server_id}"
+
+    def record(self, app_id: str, server_id: str, user_ids: list[str], at: datetime) -> None:
+        if not user_ids:
+            return
+        key = self._key(app_id, server_id)
+        score = at.timestamp()
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zadd(key, {user_id: score for user_id in user_ids})
+        pipe.zremrangebyscore(key, "-inf", f"({score - ONLINE_WINDOW_SECONDS}")
+        pipe.expire(key, ONLINE_WINDOW_SECONDS + 1)
+        pipe.execute()
+
+    def online_user_ids(self, app_id: str, server_id: str, now: datetime) -> list[str]:
+        cutoff = now.timestamp() - ONLINE_WINDOW_SECONDS
+        members = self._redis.zrangebyscore(self._key(app_id, server_id), cutoff, "+inf")
+        return [m.decode() for m in members]
+
+
+_store = None
+
+
+def get_activity_store():
+    """Process-wide activity store for MATCHMAKER_STORE, created on first use."""
+    global _store
+    if _store is None:
+        if getattr(settings, "MATCHMAKER_STORE", "memory") == "redis":
+            _store = RedisActivityStore(settings.MATCHMAKER_REDIS_URL)
+        else:
+            _store = InMemoryActivityStore()
+    return _store
+
+
 def record_activity(app_id: uuid.UUID, server_id: uuid.UUID, user_id: uuid.UUID) -> None:
-    key = (str(app_id), str(server_id), str(user_id))
-    _activity[key] = _now()
+    get_activity_store().record(str(app_id), str(server_id), [str(user_id)], _now())
+
+
+def record_activity_batch(app_id: uuid.UUID, server_id: uuid.UUID, user_ids) -> None:
+    """record_activity for several users on one server, all stamped with the same time."""
+    get_activity_store().record(str(app_id), str(server_id), [str(user_id) for user_id in user_ids], _now())
 
 
 def get_online_user_ids(app_id: uuid.UUID, server_id: uuid.UUID) -> list[uuid.UUID]:
     """Return user_ids that have activity within ONLINE_WINDOW_SECONDS for this app and server."""
-    cutoff = _now() - timedelta(seconds=ONLINE_WINDOW_SECONDS)
-    app_id_str = str(app_id)
-    server_id_str = str(server_id)
-    return [
-        uuid.UUID(uid)
-        for (a, s, uid), at in _activity.items()
-        if a == app_id_str and s == server_id_str and at >= cutoff
-    ]
+    return [uuid.UUID(uid) for uid in get_activity_store().online_user_ids(str(app_id), str(server_id), _now())]
@@ -1,16 +1,21 @@
 import uuid
+from django.http import HttpResponse
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from .activity_store import get_online_user_ids, record_activity
-from .models import App, User, generate_app_secret
+from . import server_list_cache
+from .activity_store import get_online_user_ids, record_activity, record_activity_batch
+from .models import App, generate_app_secret
 from .ws_notify import notify_apps_changed, notify_online_users_changed, notify_servers_changed
 from .permissions import IsAppAuthenticated
 from .room_store import count_rooms_for_server, create_room as room_create, list_rooms_for_server
 from .server_store import (
     add_server as store_add_server,
+    apply_server_room_status_delta,
     delete_server as store_delete_server,
     get_server as store_get_server,
     get_server_room_status,
@@ -27,6 +32,7 @@ from .serializers import (
     ServerSerializer,
 )
 from .serializers import _get_client_ip
+from .username_cache import get_usernames
 
 
 def _is_owner(request, app):
@@ -161,40 +167,137 @@ def app_activity(request):
     app = getattr(request, "app", None)
     if not app:
         return Response({"detail": "App authentication required."}, status=status.HTTP_401_UNAUTHORIZED)
-    if not User.objects.filter(user_id=user_id).exists():
+    if not get_usernames([user_id]):
         return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
     record_activity(app.app_id, server_id, user_id)
     notify_online_users_changed(str(app.app_id), str(server_id))
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(["POST"])
+@permission_classes([IsAppAuthenticated])
+def app_activity_batch(request):
+    """
+    Record activity for many users at once (a game server flushing the heartbeats it collected).
+    Body: { "activity": [ { "server_id": "<uuid>", "user_ids": ["<uuid>", ...] }, ... ] }.
+    All user_ids are checked at once (one query for those not in the username cache); unknown or malformed ids are skipped and returned in "skipped".
+    Sends one online_users notification per server that had a known user.
+    """
+    app = getattr(request, "app", None)
+    if not app:
+        return Response({"detail": "App authentication required."}, status=status.HTTP_401_UNAUTHORIZED)
+    entries = (request.data or {}).get("activity")
+    if not isinstance(entries, list):
+        return Response({"detail": "activity must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+    by_server: dict[uuid.UUID, set[uuid.UUID]] = {}
+    skipped = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return Response({"detail": "Each activity entry must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            server_id = uuid.UUID(str(entry.get("server_id")))
+        except (TypeError, ValueError):
+            return Response({"detail": "server_id must be a valid UUID."}, status=status.HTTP_400_BAD_REQUEST)
+        user_ids = entry.get("user_ids")
+        if not isinstance(user_ids, list):
+            return Response({"detail": "user_ids must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+        users = by_server.setdefault(server_id, set())
+        for user_id_str in user_ids:
+            try:
+                users.add(uuid.UUID(str(user_id_str)))
+            except (TypeError, ValueError):
+                skipped.append(str(user_id_str))
+    requested = set().union(*by_server.values())
+    known = {uuid.UUID(uid) for uid in get_usernames(requested)}
+    skipped.extend(str(uid) for uid in requested - known)
+    recorded = 0
+    for server_id, user_ids in by_server.items():
+        user_ids &= known
+        if not user_ids:
+            continue
+        record_activity_batch(app.app_id, server_id, user_ids)
+        recorded += len(user_ids)
+        notify_online_users_changed(str(app.app_id), str(server_id))
+    return Response({"recorded": recorded, "skipped": skipped})
+
+
 def _online_users_for_server(app_id: uuid.UUID, server_id: uuid.UUID) -> list[dict]:
     """Return [ { "user_id": str, "username": str }, ... ] for this app+server (activity within 15 seconds)."""
     user_ids = get_online_user_ids(app_id, server_id)
-    users = User.objects.filter(user_id__in=user_ids).values("user_id", "username")
-    user_map = {str(u["user_id"]): u["username"] for u in users}
+    user_map = get_usernames(user_ids)
     return [
         {"user_id": str(uid), "username": user_map.get(str(uid), "")}
         for uid in user_ids
     ]
 
 
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _normalize_status_rooms(rooms: list) -> tuple[list[dict], list[str]]:
+    """Split reported rooms into valid rooms with players and room_ids of valid rooms without players.
+    Entries that are not dicts or have no UUID room_id are skipped."""
+    normalized = []
+    empty = []
+    for r in rooms:
+        if not isinstance(r, dict):
+            continue
+        rid = r.get("room_id")
+        cap = r.get("capacity")
+        players = r.get("current_players") or []
+        if not rid or not _is_uuid(rid):
+            continue
+        current_players = [str(p) for p in players] if isinstance(players, list) else []
+        if not current_players:
+            empty.append(str(rid))
+            continue
+        normalized.append({
+            "room_id": str(rid),
+            "capacity": int(cap) if cap is not None else 0,
+            "current_players": current_players,
+        })
+    return normalized, empty
+
+
 @api_view(["POST"])
 @permission_classes([IsAppAuthenticated])
 def app_status(request):
     """
     Game server reports status: list of rooms with capacity and current players.
-    Body: { "server_id": "<uuid>", "rooms": [ { "room_id": "<uuid>", "capacity": int, "current_players": [ "<user_id>", ... ] }, ... ] }.
+    Full body: { "server_id": "<uuid>", "rooms": [ { "room_id": "<uuid>", "capacity": int, "current_players": [ "<user_id>", ... ] }, ... ],
+                 "version": int (optional) } replaces the server's rooms.
+    Delta body: { "server_id": "<uuid>", "base_version": int, "version": int, "upserted": [ room, ... ], "removed": [ "<room_id>", ... ] }
+    changes only the listed rooms, and only if the last report left the server at base_version; otherwise 409
+    { "detail", "version": <stored version or null> } and the server must send a full report (with a version).
+    Both upserted and removed are required in a delta; removed room_ids must be strings (ids that are not UUIDs
+    are ignored, as for reported rooms).
     """
     data = request.data or {}
     server_id_str = data.get("server_id")
-    rooms = data.get("rooms")
+    is_delta = "base_version" in data
+    rooms_field = "upserted" if is_delta else "rooms"
+    rooms = data.get(rooms_field)
+    removed = data.get("removed") if is_delta else []
     if not server_id_str:
         return Response({"detail": "server_id is required."}, status=status.HTTP_400_BAD_REQUEST)
-    if rooms is None:
-        return Response({"detail": "rooms is required."}, status=status.HTTP_400_BAD_REQUEST)
-    if not isinstance(rooms, list):
-        return Response({"detail": "rooms must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+    for field, value in ((rooms_field, rooms), ("removed", removed)):
+        if value is None:
+            return Response({"detail": f"{field} is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(value, list):
+            return Response({"detail": f"{field} must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+    if not all(isinstance(rid, str) for rid in removed):
+        return Response({"detail": "removed must be a list of room_id strings."}, status=status.HTTP_400_BAD_REQUEST)
+    version = data.get("version")
+    if (is_delta or version is not None) and (isinstance(version, bool) or not isinstance(version, int)):
+        return Response({"detail": "version must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    base_version = data.get("base_version")
+    if is_delta and (isinstance(base_version, bool) or not isinstance(base_version, int)):
+        return Response({"detail": "base_version must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
     try:
         server_id = uuid.UUID(server_id_str)
     except (TypeError, ValueError):
@@ -205,28 +308,17 @@ def app_status(request):
     server = store_get_server(app.app_id, server_id)
     if not server:
         return Response({"detail": "Server not found."}, status=status.HTTP_404_NOT_FOUND)
-    normalized = []
-    for r in rooms:
-        if not isinstance(r, dict):
-            continue
-        rid = r.get("room_id")
-        cap = r.get("capacity")
-        players = r.get("current_players") or []
-        if not rid:
-            continue
-        try:
-            uuid.UUID(rid)
-        except (TypeError, ValueError):
-            continue
-        current_players = [str(p) for p in players] if isinstance(players, list) else []
-        if not current_players:
-            continue
-        normalized.append({
-            "room_id": str(rid),
-            "capacity": int(cap) if cap is not None else 0,
-            "current_players": current_players,
-        })
-    set_server_room_status(str(server_id), normalized)
+    normalized, empty = _normalize_status_rooms(rooms)
+    if not is_delta:
+        set_server_room_status(str(server_id), normalized, version=version)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    removed_ids = [rid for rid in removed if _is_uuid(rid)] + empty
+    if not apply_server_room_status_delta(str(server_id), base_version, version, normalized, removed_ids):
+        current = get_server_room_status(str(server_id))
+        return Response(
+            {"detail": "Status version mismatch; send a full report.", "version": current["version"] if current else None},
+            status=status.HTTP_409_CONFLICT,
+        )
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -270,18 +362,40 @@ def server_online_users(request, app_id, server_id):
     return Response(_online_users_for_server(app_uuid, server_uuid))
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header (a list of strong or weak ETags, or "*") matches etag (weak comparison)."""
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in parse_etags(if_none_match))
+
+
+def render_server_list(app_id, etag: str | None = None) -> tuple[str, bytes]:
+    """(ETag, JSON bytes) of the app's server list with rooms, from server_list_cache when it is current.
+    Also used by ws_notify to push the list to WebSocket clients."""
+    if etag is None:
+        etag = server_list_cache.current_etag(app_id)
+    body = server_list_cache.get(app_id, etag)
+    if body is None:
+        body = JSONRenderer().render(_servers_with_rooms(store_list_servers(app_id), uuid.UUID(str(app_id))))
+        server_list_cache.put(app_id, etag, body)
+    return etag, body
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def server_list(request, app_id):
-    """List servers for an app, or create a server (any user). Stored in memory; cleared on backend restart."""
+    """List servers for an app, or create a server (any user).
+    GET is answered from a per-app cache of the rendered list (see api.server_list_cache) with an ETag;
+    a matching If-None-Match gets 304 Not Modified."""
     try:
         app = App.objects.get(app_id=app_id)
     except App.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == "GET":
-        servers = store_list_servers(app_id)
-        return Response([_server_with_rooms(s, app_id) for s in servers])
+        etag = server_list_cache.current_etag(app_id)
+        if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        etag, body = render_server_list(app_id, etag)
+        return HttpResponse(body, content_type="application/json", headers={"ETag": etag})
 
     if request.method == "POST":
         serializer = ServerCreateSerializer(
@@ -310,25 +424,28 @@ def server_list(request, app_id):
     return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-def _enrich_room_status_with_usernames(status_data: dict | None) -> dict | None:
-    """Enrich room_status.rooms so current_players is [ { user_id, username }, ... ]."""
-    if not status_data or not status_data.get("rooms"):
-        return status_data
-    all_user_ids = []
-    for r in status_data["rooms"]:
+def _room_status_player_ids(status_data: dict | None) -> list[str]:
+    """user_ids of the players in room_status.rooms (plain ids or already enriched dicts)."""
+    user_ids = []
+    for r in (status_data or {}).get("rooms") or []:
         for uid in r.get("current_players") or []:
             if isinstance(uid, str):
-                all_user_ids.append(uid)
+                user_ids.append(uid)
             elif isinstance(uid, dict) and uid.get("user_id"):
-                all_user_ids.append(uid["user_id"])
-    if not all_user_ids:
-        return status_data
-    try:
-        user_ids_uuid = [uuid.UUID(uid) for uid in all_user_ids]
-    except (TypeError, ValueError):
+                user_ids.append(uid["user_id"])
+    return user_ids
+
+
+def _enrich_room_status_with_usernames(status_data: dict | None, username_map: dict[str, str] | None = None) -> dict | None:
+    """Enrich room_status.rooms so current_players is [ { user_id, username }, ... ].
+    username_map (user_id -> username) is looked up when not given."""
+    if not status_data or not status_data.get("rooms"):
         return status_data
-    users = User.objects.filter(user_id__in=user_ids_uuid).values("user_id", "username")
-    username_map = {str(u["user_id"]): u["username"] or "" for u in users}
+    if username_map is None:
+        all_user_ids = _room_status_player_ids(status_data)
+        if not all_user_ids:
+            return status_data
+        username_map = get_usernames(all_user_ids)
     enriched_rooms = []
     for r in status_data["rooms"]:
         room = dict(r)
@@ -344,12 +461,8 @@ def _enrich_room_status_with_usernames(status_data: dict | None) -> dict | None:
     return {"rooms": enriched_rooms, "updated_at": status_data.get("updated_at", "")}
 
 
-def _server_with_rooms(server: dict, app_id: uuid.UUID) -> dict:
-    """Enrich server dict with rooms list and last-reported room status (with usernames).
-    Merge game-reported rooms with matchmaker-created rooms so all rooms are listed."""
-    out = dict(server)
-    matchmaker_rooms = list_rooms_for_server(app_id, uuid.UUID(server["server_id"]))
-    out["rooms"] = matchmaker_rooms
+def _merged_room_status(server: dict, matchmaker_rooms: list[dict]) -> dict:
+    """Merge game-reported rooms with matchmaker-created rooms so all rooms are listed (players not enriched)."""
     status_data = get_server_room_status(server["server_id"])
     capacity = (server.get("room_config") or {}).get("capacity_per_room") or 2
     reported = (status_data or {}).get("rooms") or []
@@ -364,11 +477,29 @@ def _server_with_rooms(server: dict, app_id: uuid.UUID) -> dict:
             "capacity": capacity,
             "current_players": list(mr.get("member_ids") or []),
         })
-    merged_status = {"rooms": merged_rooms, "updated_at": (status_data or {}).get("updated_at", "")}
-    out["room_status"] = _enrich_room_status_with_usernames(merged_status)
+    return {"rooms": merged_rooms, "updated_at": (status_data or {}).get("updated_at", "")}
+
+
+def _servers_with_rooms(servers: list[dict], app_id: uuid.UUID) -> list[dict]:
+    """Enrich each server dict with its rooms list and last-reported room status (with usernames).
+    Usernames for all servers are resolved with one lookup."""
+    out = []
+    for server in servers:
+        entry = dict(server)
+        entry["rooms"] = list_rooms_for_server(app_id, uuid.UUID(server["server_id"]))
+        entry["room_status"] = _merged_room_status(server, entry["rooms"])
+        out.append(entry)
+    username_map = get_usernames(uid for entry in out for uid in _room_status_player_ids(entry["room_status"]))
+    for entry in out:
+        entry["room_status"] = _enrich_room_status_with_usernames(entry["room_status"], username_map)
     return out
 
 
+def _server_with_rooms(server: dict, app_id: uuid.UUID) -> dict:
+    """Enrich server dict with rooms list and last-reported room status (with usernames)."""
+    return _servers_with_rooms([server], app_id)[0]
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def server_create_room(request, app_id, server_id):
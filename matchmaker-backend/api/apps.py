@@ -6,3 +6,6 @@ class ApiConfig(AppConfig):
     name = "api"
     label = "api"
     verbose_name = "API"
+
+    def ready(self):
+        from . import server_list_cache, username_cache  # noqa: F401  (connect their signal handlers)
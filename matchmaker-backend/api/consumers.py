@@ -1,25 +1,107 @@
 """
 WebSocket consumer for matchmaker UI updates.
 Clients connect and receive broadcast events when apps, servers, or online users change.
+
+Every client gets "apps" events (matchmaker_updates group). Events about one app's servers and one server's
+online users go to per-scope groups, which a client joins by sending
+{ "type": "subscribe", "app_ids": [...], "server_ids": [...] } (and leaves with "unsubscribe"), so an event
+only reaches the clients looking at that app or server.
+
+With MATCHMAKER_NOTIFY_PAYLOADS on, a subscribe message may also carry "payloads": true and "token" (a user
+access JWT, as for the REST API). Such a connection joins the ".full" variant of each scope group, whose events
+also carry the new data ("servers": the app's server list, "users": the server's online users), so the client
+does not have to fetch it. Events arrive pre-serialized ("text"), encoded once per group rather than per client.
 """
-import json
+import uuid
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
 
 MATCHMAKER_GROUP = "matchmaker_updates"
+# Most app and server scopes one connection may subscribe to.
+MAX_SUBSCRIPTIONS = 200
+
+
+def app_group(app_id) -> str:
+    """Group for "servers" events of one app."""
+    return f"matchmaker_app.{app_id}"
+
+
+def server_group(server_id) -> str:
+    """Group for "online_users" events of one server."""
+    return f"matchmaker_server.{server_id}"
+
+
+def payload_group(group: str) -> str:
+    """Variant of a scope group whose events include the changed data."""
+    return f"{group}.full"
+
+
+def _wants_payloads(content: dict) -> bool:
+    """True if the message asks for payloads, they are enabled, and it carries a valid user access token."""
+    if not content.get("payloads") or not getattr(settings, "MATCHMAKER_NOTIFY_PAYLOADS", False):
+        return False
+    try:
+        AccessToken(str(content.get("token") or ""))
+    except TokenError:
+        return False
+    return True
+
+
+def _scope_groups(content: dict) -> list[str]:
+    """Groups named by a subscribe/unsubscribe message; ids that are not UUIDs are skipped."""
+    groups = []
+    for field, group in (("app_ids", app_group), ("server_ids", server_group)):
+        ids = content.get(field)
+        if not isinstance(ids, list):
+            continue
+        for scope_id in ids:
+            try:
+                groups.append(group(uuid.UUID(str(scope_id))))
+            except ValueError:
+                continue
+    return groups
 
 
 class MatchmakerUpdatesConsumer(AsyncJsonWebsocketConsumer):
-    """Clients join the matchmaker_updates group and receive { type, ... } events."""
+    """Clients join the matchmaker_updates group plus the app/server groups they subscribe to,
+    and receive { type, ... } events."""
 
     async def connect(self):
+        self.scope_groups: set[str] = set()
         await self.channel_layer.group_add(MATCHMAKER_GROUP, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(MATCHMAKER_GROUP, self.channel_name)
+        for group in self.scope_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.scope_groups = set()
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            return
+        if content.get("type") == "subscribe":
+            payloads = _wants_payloads(content)
+            for plain in _scope_groups(content):
+                group, other = (payload_group(plain), plain) if payloads else (plain, payload_group(plain))
+                await self._leave(other)  # switching between pings and payloads for this scope
+                if group in self.scope_groups or len(self.scope_groups) >= MAX_SUBSCRIPTIONS:
+                    continue
+                self.scope_groups.add(group)
+                await self.channel_layer.group_add(group, self.channel_name)
+        elif content.get("type") == "unsubscribe":
+            for group in _scope_groups(content):
+                await self._leave(group)
+                await self._leave(payload_group(group))
+
+    async def _leave(self, group: str) -> None:
+        if group in self.scope_groups:
+            self.scope_groups.discard(group)
+            await self.channel_layer.group_discard(group, self.channel_name)
 
     async def matchmaker_update(self, event):
-        """Send event to the client (type is used by Channels for routing; omit it in payload)."""
-        payload = {k: v for k, v in event.items() if k != "type"}
-        await self.send(text_data=json.dumps(payload))
+        """Send the event's pre-serialized JSON (text) to the client."""
+        await self.send(text_data=event["text"])
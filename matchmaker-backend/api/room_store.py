@@ -1,27 +1,126 @@
 """
-In-memory store for rooms on a server. A room is created when a user clicks "Create room"
+Store for rooms on a server. A room is created when a user clicks "Create room"
 on the matchmaker; the creating user is automatically a member.
-Cleared when the backend process restarts.
+
+MATCHMAKER_STORE selects the backend: "memory" (this process only, cleared when the backend process restarts)
+or "redis" (shared by every matchmaker worker): one hash per (app_id, server_id) of room_id -> JSON room,
+plus a room_id -> hash key lookup for get_room.
 """
+import json
 import uuid
 from datetime import datetime, timezone
 
-# list of { "room_id", "app_id", "server_id", "created_by_id", "created_at", "member_ids": [str] }
-_ROOMS: list[dict] = []
+from django.conf import settings
+
+from . import server_list_cache
+
+ROOMS_KEY_PREFIX = "matchmaker:rooms:"
+ROOM_INDEX_KEY = "matchmaker:room-index"
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+class InMemoryRoomStore:
+    def __init__(self):
+        # room_id -> { "room_id", "app_id", "server_id", "created_by_id", "created_at", "member_ids": [str] },
+        # and (app_id, server_id) -> { room_id -> room } (same dicts, creation order kept)
+        self._rooms: dict[str, dict] = {}
+        self._by_server: dict[tuple[str, str], dict[str, dict]] = {}
+
+    def list_for_server(self, app_id: str, server_id: str) -> list[dict]:
+        return list(self._by_server.get((app_id, server_id), {}).values())
+
+    def count_for_server(self, app_id: str, server_id: str) -> int:
+        return len(self._by_server.get((app_id, server_id), ()))
+
+    def add(self, entry: dict) -> None:
+        self._rooms[entry["room_id"]] = entry
+        self._by_server.setdefault((entry["app_id"], entry["server_id"]), {})[entry["room_id"]] = entry
+
+    def get(self, room_id: str) -> dict | None:
+        return self._rooms.get(room_id)
+
+    def add_member(self, room_id: str, user_id: str) -> bool:
+        r = self.get(room_id)
+        if not r:
+            return False
+        if user_id not in r["member_ids"]:
+            r["member_ids"].append(user_id)
+        return True
+
+
+class RedisRoomStore:
+    def __init__(self, url: str):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(app_id: str, server_id: str) -> str:
+        return f"{ROOMS_KEY_PREFIX}{app_id}:{server_id}"
+
+    def list_for_server(self, app_id: str, server_id: str) -> list[dict]:
+        rooms = [json.loads(v) for v in self._redis.hvals(self._key(app_id, server_id))]
+        return sorted(rooms, key=lambda r: r["created_at"])
+
+    def count_for_server(self, app_id: str, server_id: str) -> int:
+        return self._redis.hlen(self._key(app_id, server_id))
+
+    def add(self, entry: dict) -> None:
+        key = self._key(entry["app_id"], entry["server_id"])
+        pipe = self._redis.pipeline()
+        pipe.hset(key, entry["room_id"], json.dumps(entry))
+        pipe.hset(ROOM_INDEX_KEY, entry["room_id"], key)
+        pipe.execute()
+
+    def get(self, room_id: str) -> dict | None:
+        key = self._redis.hget(ROOM_INDEX_KEY, room_id)
+        if key is None:
+            return None
+        data = self._redis.hget(key, room_id)
+        return json.loads(data) if data is not None else None
+
+    def add_member(self, room_id: str, user_id: str) -> bool:
+        key = self._redis.hget(ROOM_INDEX_KEY, room_id)
+        if key is None:
+            return False
+
+        def add(pipe):
+            data = pipe.hget(key, room_id)
+            if data is None:
+                return False
+            entry = json.loads(data)
+            if user_id not in entry["member_ids"]:
+                entry["member_ids"].append(user_id)
+                pipe.multi()
+                pipe.hset(key, room_id, json.dumps(entry))
+            return True
+
+        return self._redis.transaction(add, key, value_from_callable=True)
+
+
+_store = None
+
+
+def get_room_store():
+    """Process-wide room store for MATCHMAKER_STORE, created on first use."""
+    global _store
+    if _store is None:
+        if getattr(settings, "MATCHMAKER_STORE", "memory") == "redis":
+            _store = RedisRoomStore(settings.MATCHMAKER_REDIS_URL)
+        else:
+            _store = InMemoryRoomStore()
+    return _store
+
+
 def list_rooms_for_server(app_id: uuid.UUID, server_id: uuid.UUID) -> list[dict]:
-    a = str(app_id)
-    s = str(server_id)
-    return [r for r in _ROOMS if r["app_id"] == a and r["server_id"] == s]
+    return get_room_store().list_for_server(str(app_id), str(server_id))
 
 
 def count_rooms_for_server(app_id: uuid.UUID, server_id: uuid.UUID) -> int:
-    return len(list_rooms_for_server(app_id, server_id))
+    return get_room_store().count_for_server(str(app_id), str(server_id))
 
 
 def create_room(
@@ -40,23 +139,18 @@ def create_room(
         "created_at": created_at,
         "member_ids": [str(created_by_id)],
     }
-    _ROOMS.append(entry)
+    get_room_store().add(entry)
+    server_list_cache.bump(app_id)
     return entry
 
 
 def get_room(room_id: uuid.UUID) -> dict | None:
-    rid = str(room_id)
-    for r in _ROOMS:
-        if r["room_id"] == rid:
-            return r
-    return None
+    return get_room_store().get(str(room_id))
 
 
 def add_member_to_room(room_id: uuid.UUID, user_id: uuid.UUID) -> bool:
-    r = get_room(room_id)
-    if not r:
+    room = get_room(room_id)
+    if room is None or not get_room_store().add_member(str(room_id), str(user_id)):
         return False
-    uid = str(user_id)
-    if uid not in r["member_ids"]:
-        r["member_ids"].append(uid)
+    server_list_cache.bump(room["app_id"])
     return True
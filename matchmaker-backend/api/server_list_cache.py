@@ -0,0 +1,70 @@
+"""
+Cache of server_list GET responses per app, already rendered to JSON bytes.
+
+Each app has a change counter in the Django cache (shared by workers when CACHES uses Redis), bumped by the
+stores whenever something in the app's server list changes: a server is added, updated or deleted, a game server
+reports room status, or a matchmaker room is created or joined. A global generation counter, bumped when a
+username changes, covers the usernames shown in room status. The ETag is built from both counters, so a
+worker can answer from its own copy (or with 304 Not Modified) after reading two small cache keys, and
+rebuilds only when the ETag moved. Counters start at a random value, so they never repeat after the cache
+is flushed.
+"""
+import random
+import threading
+
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from .username_cache import username_changed
+
+VERSION_KEY_PREFIX = "server-list-version:"
+GENERATION_KEY = "server-list-generation"
+
+# app_id -> (etag, rendered response body)
+_responses: dict[str, tuple[str, bytes]] = {}
+_lock = threading.Lock()
+
+
+def _incr(key: str) -> None:
+    cache.add(key, random.getrandbits(48), timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.add(key, random.getrandbits(48), timeout=None)
+
+
+def bump(app_id) -> None:
+    """Mark the server list of app_id as changed."""
+    _incr(f"{VERSION_KEY_PREFIX}{app_id}")
+
+
+@receiver(username_changed)
+def _bump_generation(sender, **kwargs):
+    _incr(GENERATION_KEY)
+
+
+def current_etag(app_id) -> str:
+    """ETag for the app's server list as it is now; read it before building a response for it."""
+    version_key = f"{VERSION_KEY_PREFIX}{app_id}"
+    values = cache.get_many([version_key, GENERATION_KEY])
+    if version_key not in values:
+        cache.add(version_key, random.getrandbits(48), timeout=None)
+    if GENERATION_KEY not in values:
+        cache.add(GENERATION_KEY, random.getrandbits(48), timeout=None)
+    if len(values) < 2:
+        values = cache.get_many([version_key, GENERATION_KEY])
+    return f'"{values.get(GENERATION_KEY, 0):x}-{values.get(version_key, 0):x}"'
+
+
+def get(app_id, etag: str) -> bytes | None:
+    """This worker's rendered response for app_id if it was built at etag."""
+    with _lock:
+        cached = _responses.get(str(app_id))
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    return None
+
+
+def put(app_id, etag: str, body: bytes) -> None:
+    with _lock:
+        _responses[str(app_id)] = (etag, body)
@@ -1,21 +1,227 @@
 """
-In-memory store for the server list. Cleared when the backend process restarts.
+Store for the server list and the room status each game server reports.
 Each entry is a dict with the same shape as the server list/detail API response.
 room_config: optional dict with max_rooms (int) and capacity_per_room (int).
+
+MATCHMAKER_STORE selects the backend: "memory" (this process only, cleared when the backend process restarts)
+or "redis" (shared by every matchmaker worker, uses MATCHMAKER_REDIS_URL). Redis keeps one hash per app of
+server_id -> JSON entry, and per server a hash of room_id -> JSON room plus a small hash with updated_at and
+version; a room status report is written in one MULTI, and deltas check the version under WATCH.
 """
+import json
 import uuid
 from datetime import datetime, timezone
 
-_SERVERS: list[dict] = []
+from django.conf import settings
+
+from . import server_list_cache
 
-# server_id -> { "rooms": [ { "room_id", "capacity", "current_players": [user_id] } ], "updated_at": iso }
-_SERVER_ROOM_STATUS: dict[str, dict] = {}
+SERVERS_KEY_PREFIX = "matchmaker:servers:"
+SERVER_APPS_KEY = "matchmaker:server-apps"
+ROOM_STATUS_KEY_PREFIX = "matchmaker:room-status:"
+UPDATABLE_FIELDS = ("server_name", "server_description", "game_modes", "port", "game_frontend_url", "room_config")
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def _ensure_room_config(entry: dict) -> dict:
+    if "room_config" not in entry:
+        entry = {**entry, "room_config": {}}
+    return entry
+
+
+def _apply_update(entry: dict, data: dict) -> None:
+    for key in UPDATABLE_FIELDS:
+        if key in data and data[key] is not None:
+            entry[key] = data[key]
+
+
+class InMemoryServerStore:
+    def __init__(self):
+        # server_id -> entry, and app_id -> { server_id -> entry } (same dicts, insertion order kept)
+        self._servers: dict[str, dict] = {}
+        self._by_app: dict[str, dict[str, dict]] = {}
+        # server_id -> { "rooms": { room_id: { "room_id", "capacity", "current_players": [user_id] } },
+        #               "updated_at": iso, "version": int | None }
+        self._room_status: dict[str, dict] = {}
+
+    def add(self, entry: dict) -> None:
+        self._servers[entry["server_id"]] = entry
+        self._by_app.setdefault(entry["app_id"], {})[entry["server_id"]] = entry
+
+    def list_for_app(self, app_id: str) -> list[dict]:
+        return [_ensure_room_config(s) for s in self._by_app.get(app_id, {}).values()]
+
+    def get(self, app_id: str, server_id: str) -> dict | None:
+        entry = self._by_app.get(app_id, {}).get(server_id)
+        return _ensure_room_config(entry) if entry is not None else None
+
+    def update(self, app_id: str, server_id: str, data: dict) -> dict | None:
+        entry = self.get(app_id, server_id)
+        if not entry:
+            return None
+        _apply_update(entry, data)
+        return entry
+
+    def delete(self, app_id: str, server_id: str) -> bool:
+        servers = self._by_app.get(app_id)
+        if not servers or servers.pop(server_id, None) is None:
+            return False
+        if not servers:
+            del self._by_app[app_id]
+        del self._servers[server_id]
+        return True
+
+    def app_id_for(self, server_id: str) -> str | None:
+        entry = self._servers.get(server_id)
+        return entry["app_id"] if entry is not None else None
+
+    def set_room_status(self, server_id: str, rooms: list[dict], version: int | None, updated_at: str) -> None:
+        self._room_status[server_id] = {
+            "rooms": {r["room_id"]: r for r in rooms},
+            "updated_at": updated_at,
+            "version": version,
+        }
+
+    def apply_room_status_delta(
+        self, server_id: str, base_version: int, version: int, upserted: list[dict], removed: list[str], updated_at: str
+    ) -> bool:
+        data = self._room_status.get(server_id)
+        if data is None or data.get("version") is None or data["version"] != base_version:
+            return False
+        rooms = data["rooms"]
+        for room_id in removed:
+            rooms.pop(room_id, None)
+        for r in upserted:
+            rooms[r["room_id"]] = r
+        data["version"] = version
+        data["updated_at"] = updated_at
+        return True
+
+    def get_room_status(self, server_id: str) -> dict | None:
+        data = self._room_status.get(server_id)
+        if not data:
+            return None
+        return {
+            "rooms": list((data.get("rooms") or {}).values()),
+            "updated_at": data.get("updated_at", ""),
+            "version": data.get("version"),
+        }
+
+
+class RedisServerStore:
+    def __init__(self, url: str):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _servers_key(app_id: str) -> str:
+        return f"{SERVERS_KEY_PREFIX}{app_id}"
+
+    @staticmethod
+    def _status_keys(server_id: str) -> tuple[str, str]:
+        """(room_id -> JSON room hash, { updated_at, version } hash)"""
+        return f"{ROOM_STATUS_KEY_PREFIX}{server_id}:rooms", f"{ROOM_STATUS_KEY_PREFIX}{server_id}:meta"
+
+    def add(self, entry: dict) -> None:
+        pipe = self._redis.pipeline()
+        pipe.hset(self._servers_key(entry["app_id"]), entry["server_id"], json.dumps(entry))
+        pipe.hset(SERVER_APPS_KEY, entry["server_id"], entry["app_id"])
+        pipe.execute()
+
+    def list_for_app(self, app_id: str) -> list[dict]:
+        servers = [_ensure_room_config(json.loads(v)) for v in self._redis.hvals(self._servers_key(app_id))]
+        return sorted(servers, key=lambda s: s["created_at"])
+
+    def get(self, app_id: str, server_id: str) -> dict | None:
+        data = self._redis.hget(self._servers_key(app_id), server_id)
+        return _ensure_room_config(json.loads(data)) if data is not None else None
+
+    def update(self, app_id: str, server_id: str, data: dict) -> dict | None:
+        key = self._servers_key(app_id)
+
+        def update(pipe):
+            stored = pipe.hget(key, server_id)
+            if stored is None:
+                return None
+            entry = _ensure_room_config(json.loads(stored))
+            _apply_update(entry, data)
+            pipe.multi()
+            pipe.hset(key, server_id, json.dumps(entry))
+            return entry
+
+        return self._redis.transaction(update, key, value_from_callable=True)
+
+    def delete(self, app_id: str, server_id: str) -> bool:
+        if not self._redis.hdel(self._servers_key(app_id), server_id):
+            return False
+        self._redis.hdel(SERVER_APPS_KEY, server_id)
+        return True
+
+    def app_id_for(self, server_id: str) -> str | None:
+        app_id = self._redis.hget(SERVER_APPS_KEY, server_id)
+        return app_id.decode() if app_id is not None else None
+
+    def set_room_status(self, server_id: str, rooms: list[dict], version: int | None, updated_at: str) -> None:
+        rooms_key, meta_key = self._status_keys(server_id)
+        pipe = self._redis.pipeline()
+        pipe.delete(rooms_key)
+        if rooms:
+            pipe.hset(rooms_key, mapping={r["room_id"]: json.dumps(r) for r in rooms})
+        pipe.hset(meta_key, mapping={"updated_at": updated_at, "version": "" if version is None else str(version)})
+        pipe.execute()
+
+    def apply_room_status_delta(
+        self, server_id: str, base_version: int, version: int, upserted: list[dict], removed: list[str], updated_at: str
+    ) -> bool:
+        rooms_key, meta_key = self._status_keys(server_id)
+
+        def apply(pipe):
+            if pipe.hget(meta_key, "version") != str(base_version).encode():
+                return False
+            pipe.multi()
+            if removed:
+                pipe.hdel(rooms_key, *removed)
+            if upserted:
+                pipe.hset(rooms_key, mapping={r["room_id"]: json.dumps(r) for r in upserted})
+            pipe.hset(meta_key, mapping={"updated_at": updated_at, "version": str(version)})
+            return True
+
+        return self._redis.transaction(apply, meta_key, value_from_callable=True)
+
+    def get_room_status(self, server_id: str) -> dict | None:
+        rooms_key, meta_key = self._status_keys(server_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hvals(rooms_key)
+        pipe.hgetall(meta_key)
+        rooms, meta = pipe.execute()
+        if not meta:
+            return None
+        version = meta.get(b"version", b"")
+        return {
+            "rooms": [json.loads(r) for r in rooms],
+            "updated_at": meta.get(b"updated_at", b"").decode(),
+            "version": int(version) if version else None,
+        }
+
+
+_store = None
+
+
+def get_server_store():
+    """Process-wide server store for MATCHMAKER_STORE, created on first use."""
+    global _store
+    if _store is None:
+        if getattr(settings, "MATCHMAKER_STORE", "memory") == "redis":
+            _store = RedisServerStore(settings.MATCHMAKER_REDIS_URL)
+        else:
+            _store = InMemoryServerStore()
+    return _store
+
+
 def add_server(
     *,
     app_id: uuid.UUID,
@@ -45,61 +251,59 @@ def add_server(
         "created_at": created_at,
         "room_config": room_config or {},
     }
-    _SERVERS.append(entry)
-    return entry
-
-
-def _ensure_room_config(entry: dict) -> dict:
-    if "room_config" not in entry:
-        entry = {**entry, "room_config": {}}
+    get_server_store().add(entry)
+    server_list_cache.bump(app_id)
     return entry
 
 
 def list_servers(app_id: uuid.UUID) -> list[dict]:
-    app_id_str = str(app_id)
-    return [_ensure_room_config(s) for s in _SERVERS if s["app_id"] == app_id_str]
+    return get_server_store().list_for_app(str(app_id))
 
 
 def get_server(app_id: uuid.UUID, server_id: uuid.UUID) -> dict | None:
-    app_id_str = str(app_id)
-    server_id_str = str(server_id)
-    for s in _SERVERS:
-        if s["app_id"] == app_id_str and s["server_id"] == server_id_str:
-            return _ensure_room_config(s)
-    return None
+    return get_server_store().get(str(app_id), str(server_id))
 
 
 def update_server(app_id: uuid.UUID, server_id: uuid.UUID, data: dict) -> dict | None:
-    entry = get_server(app_id, server_id)
-    if not entry:
-        return None
-    for key in ("server_name", "server_description", "game_modes", "port", "game_frontend_url", "room_config"):
-        if key in data and data[key] is not None:
-            entry[key] = data[key]
+    entry = get_server_store().update(str(app_id), str(server_id), data)
+    if entry is not None:
+        server_list_cache.bump(app_id)
     return entry
 
 
-def set_server_room_status(server_id: str, rooms: list[dict]) -> None:
-    """Update last-reported room status from game server poll. rooms: [ { room_id, capacity, current_players } ]."""
-    _SERVER_ROOM_STATUS[str(server_id)] = {
-        "rooms": list(rooms),
-        "updated_at": _now_iso(),
-    }
+def _bump_server_app(server_id: str) -> None:
+    app_id = get_server_store().app_id_for(server_id)
+    if app_id is not None:
+        server_list_cache.bump(app_id)
+
+
+def set_server_room_status(server_id: str, rooms: list[dict], version: int | None = None) -> None:
+    """Replace last-reported room status (full report). rooms: [ { room_id, capacity, current_players } ].
+    version is the game server's own status counter; deltas apply only on top of the version they were built on."""
+    get_server_store().set_room_status(str(server_id), rooms, version, _now_iso())
+    _bump_server_app(str(server_id))
+
+
+def apply_server_room_status_delta(
+    server_id: str, base_version: int, version: int, upserted: list[dict], removed: list[str]
+) -> bool:
+    """Apply a delta report (rooms to upsert, room_ids to remove) if the stored status is at base_version.
+    Returns False, changing nothing, when it is not (or there is none): the server must send a full report."""
+    applied = get_server_store().apply_room_status_delta(
+        str(server_id), base_version, version, upserted, removed, _now_iso(),
+    )
+    if applied and (upserted or removed):
+        _bump_server_app(str(server_id))
+    return applied
 
 
 def get_server_room_status(server_id: str) -> dict | None:
     """Return a copy of last-reported room status for a server, or None."""
-    data = _SERVER_ROOM_STATUS.get(str(server_id))
-    if not data:
-        return None
-    return {"rooms": list(data.get("rooms") or []), "updated_at": data.get("updated_at", "")}
+    return get_server_store().get_room_status(str(server_id))
 
 
 def delete_server(app_id: uuid.UUID, server_id: uuid.UUID) -> bool:
-    app_id_str = str(app_id)
-    server_id_str = str(server_id)
-    for i, s in enumerate(_SERVERS):
-        if s["app_id"] == app_id_str and s["server_id"] == server_id_str:
-            _SERVERS.pop(i)
-            return True
-    return False
+    if not get_server_store().delete(str(app_id), str(server_id)):
+        return False
+    server_list_cache.bump(app_id)
+    return True
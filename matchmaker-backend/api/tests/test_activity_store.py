@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api import activity_store
+
+
+@pytest.fixture(params=["memory", "redis"])
+def clock(request, monkeypatch, use_store_backend):
+    use_store_backend(request.param)
+    now = [datetime(2026, 1, 1, tzinfo=timezone.utc)]
+    monkeypatch.setattr(activity_store, "_now", lambda: now[0])
+    return now
+
+
+def test_users_go_offline_after_the_window_and_are_dropped(clock):
+    app_id, server_a, server_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    early, late, other = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    activity_store.record_activity(app_id, server_a, early)
+    activity_store.record_activity(app_id, server_b, other)
+    clock[0] += timedelta(seconds=10)
+    activity_store.record_activity_batch(app_id, server_a, [late])
+    assert activity_store.get_online_user_ids(app_id, server_a) == [early, late]
+
+    clock[0] += timedelta(seconds=10)
+    assert activity_store.get_online_user_ids(app_id, server_a) == [late]
+
+    clock[0] += timedelta(seconds=10)
+    activity_store.record_activity(app_id, server_a, early)
+    assert activity_store.get_online_user_ids(app_id, server_a) == [early]
+    assert activity_store.get_online_user_ids(app_id, server_b) == []
+
+
+def test_repeated_activity_moves_user_to_the_back(clock):
+    app_id, server_id = uuid.uuid4(), uuid.uuid4()
+    first, second = uuid.uuid4(), uuid.uuid4()
+    activity_store.record_activity(app_id, server_id, first)
+    clock[0] += timedelta(seconds=5)
+    activity_store.record_activity(app_id, server_id, second)
+    clock[0] += timedelta(seconds=5)
+    activity_store.record_activity(app_id, server_id, first)
+    clock[0] += timedelta(seconds=12)
+    assert activity_store.get_online_user_ids(app_id, server_id) == [first]
+    assert activity_store.get_online_user_ids(uuid.uuid4(), server_id) == []
+
+
+def test_out_of_order_records_expire_by_their_own_time(clock):
+    store = activity_store.get_activity_store()
+    app_id, server_id = str(uuid.uuid4()), str(uuid.uuid4())
+    start, first, second = clock[0], str(uuid.uuid4()), str(uuid.uuid4())
+    # Two concurrent requests: the later timestamp is recorded first.
+    store.record(app_id, server_id, [first], start + timedelta(seconds=10))
+    store.record(app_id, server_id, [second], start + timedelta(seconds=5))
+
+    assert sorted(store.online_user_ids(app_id, server_id, start + timedelta(seconds=19))) == sorted([first, second])
+    assert store.online_user_ids(app_id, server_id, start + timedelta(seconds=21)) == [first]
+    store.record(app_id, server_id, [str(uuid.uuid4())], start + timedelta(seconds=22))
+    assert first in store.online_user_ids(app_id, server_id, start + timedelta(seconds=24))
+    assert first not in store.online_user_ids(app_id, server_id, start + timedelta(seconds=26))
+
+
+def test_memory_sweeps_servers_that_are_never_looked_up(clock):
+    if not isinstance(activity_store.get_activity_store(), activity_store.InMemoryActivityStore):
+        pytest.skip("memory backend only")
+    app_id, idle_server, busy_server = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    activity_store.record_activity(app_id, idle_server, uuid.uuid4())
+    clock[0] += timedelta(seconds=20)
+    activity_store.record_activity(app_id, busy_server, uuid.uuid4())
+    assert (str(app_id), str(idle_server)) not in activity_store.get_activity_store()._presence
+
+
+def test_redis_trims_and_expires_presence_keys(clock):
+    store = activity_store.get_activity_store()
+    if not isinstance(store, activity_store.RedisActivityStore):
+        pytest.skip("redis backend only")
+    app_id, server_id = uuid.uuid4(), uuid.uuid4()
+    activity_store.record_activity(app_id, server_id, uuid.uuid4())
+    clock[0] += timedelta(seconds=20)
+    activity_store.record_activity(app_id, server_id, uuid.uuid4())
+    key = store._key(str(app_id), str(server_id))
+    assert store._redis.zcard(key) == 1
+    assert 0 < store._redis.ttl(key) <= activity_store.ONLINE_WINDOW_SECONDS + 1
@@ -0,0 +1,56 @@
+import uuid
+
+import pytest
+
+from api import app_views
+from api.activity_store import get_online_user_ids
+from api.models import App, User
+
+
+def _authenticate_app(api_client):
+    """Authenticate api_client as a new app; returns the app."""
+    owner = User.objects.create_user(email="o@x.com", username="o", password="p")
+    app = App.objects.create(name="A", description="", created_by=owner, app_secret="x")
+    app.set_app_secret("my-secret")
+    token = api_client.post(
+        "/api/v1/auth/app-token/",
+        data={"app_id": str(app.app_id), "app_secret": "my-secret"},
+        format="json",
+    ).json()["access"]
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return app
+
+
+@pytest.mark.django_db
+def test_activity_batch_records_known_users_and_notifies_once_per_server(api_client, monkeypatch):
+    app = _authenticate_app(api_client)
+    players = [User.objects.create_user(email=f"p{i}@x.com", username=f"p{i}", password="p") for i in range(3)]
+    server_a, server_b, server_c = (uuid.uuid4() for _ in range(3))
+    unknown = str(uuid.uuid4())
+    notified = []
+    monkeypatch.setattr(app_views, "notify_online_users_changed", lambda a, s: notified.append(s))
+
+    response = api_client.post(
+        "/api/v1/app/activity/batch/",
+        data={"activity": [
+            {"server_id": str(server_a), "user_ids": [str(players[0].user_id), str(players[1].user_id), "bad"]},
+            {"server_id": str(server_b), "user_ids": [str(players[2].user_id)]},
+            {"server_id": str(server_c), "user_ids": [unknown]},
+        ]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.json()["recorded"] == 3
+    assert sorted(response.json()["skipped"]) == sorted(["bad", unknown])
+    assert sorted(notified) == sorted([str(server_a), str(server_b)])
+    assert set(get_online_user_ids(app.app_id, server_a)) == {players[0].user_id, players[1].user_id}
+    assert get_online_user_ids(app.app_id, server_b) == [players[2].user_id]
+    assert get_online_user_ids(app.app_id, server_c) == []
+
+
+@pytest.mark.django_db
+def test_activity_batch_rejects_malformed_body(api_client):
+    _authenticate_app(api_client)
+    response = api_client.post("/api/v1/app/activity/batch/", data={"activity": {}}, format="json")
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+import uuid
+
+import pytest
+
+from api.models import App, User
+from api.server_store import get_server_room_status
+
+
+@pytest.fixture(autouse=True, params=["memory", "redis"])
+def store_backend(request, use_store_backend):
+    use_store_backend(request.param)
+
+
+def _app_client(api_client):
+    """Authenticate api_client as a new app and register a server; returns server_id."""
+    user = User.objects.create_user(email="u@x.com", username="u", password="p")
+    app = App.objects.create(name="A", description="", created_by=user, app_secret="x")
+    app.set_app_secret("my-secret")
+    token_resp = api_client.post(
+        "/api/v1/auth/app-token/",
+        data={"app_id": str(app.app_id), "app_secret": "my-secret"},
+        format="json",
+    )
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token_resp.json()['access']}")
+    server = api_client.post("/api/v1/app/server/", data={"server_name": "S"}, format="json")
+    return server.json()["server_id"]
+
+
+def _room(players):
+    return {"room_id": str(uuid.uuid4()), "capacity": 2, "current_players": players}
+
+
+@pytest.mark.django_db
+def test_delta_applies_on_top_of_full_report(api_client):
+    server_id = _app_client(api_client)
+    kept, changed, gone = _room(["a"]), _room(["b"]), _room(["c"])
+    response = api_client.post(
+        "/api/v1/app/status/",
+        data={"server_id": server_id, "rooms": [kept, changed, gone], "version": 5},
+        format="json",
+    )
+    assert response.status_code == 204
+
+    changed = {**changed, "current_players": ["b", "d"]}
+    added = _room(["e"])
+    response = api_client.post(
+        "/api/v1/app/status/",
+        data={
+            "server_id": server_id, "base_version": 5, "version": 8,
+            "upserted": [changed, added], "removed": [gone["room_id"]],
+        },
+        format="json",
+    )
+    assert response.status_code == 204
+    status_data = get_server_room_status(server_id)
+    assert status_data["version"] == 8
+    rooms = {r["room_id"]: r["current_players"] for r in status_data["rooms"]}
+    assert rooms == {kept["room_id"]: ["a"], changed["room_id"]: ["b", "d"], added["room_id"]: ["e"]}
+
+
+@pytest.mark.django_db
+def test_delta_on_wrong_base_version_asks_for_full_report(api_client):
+    server_id = _app_client(api_client)
+    delta = {"server_id": server_id, "base_version": 1, "version": 2, "upserted": [_room(["a"])], "removed": []}
+    response = api_client.post("/api/v1/app/status/", data=delta, format="json")
+    assert response.status_code == 409
+    assert response.json()["version"] is None
+
+    api_client.post("/api/v1/app/status/", data={"server_id": server_id, "rooms": [], "version": 3}, format="json")
+    response = api_client.post("/api/v1/app/status/", data=delta, format="json")
+    assert response.status_code == 409
+    assert response.json()["version"] == 3
+    assert get_server_room_status(server_id)["rooms"] == []
+
+
+@pytest.mark.django_db
+def test_boolean_versions_are_rejected(api_client):
+    server_id = _app_client(api_client)
+    for data in (
+        {"server_id": server_id, "rooms": [], "version": True},
+        {"server_id": server_id, "base_version": False, "version": 1, "upserted": [], "removed": []},
+        {"server_id": server_id, "base_version": 0, "version": True, "upserted": [], "removed": []},
+    ):
+        response = api_client.post("/api/v1/app/status/", data=data, format="json")
+        assert response.status_code == 400
+    assert get_server_room_status(server_id) is None
+
+
+@pytest.mark.django_db
+def test_malformed_delta_fields_are_named_in_the_error(api_client):
+    server_id = _app_client(api_client)
+    api_client.post("/api/v1/app/status/", data={"server_id": server_id, "rooms": [], "version": 1}, format="json")
+    delta = {"server_id": server_id, "base_version": 1, "version": 2, "upserted": [], "removed": []}
+    for change, detail in (
+        ({"upserted": None}, "upserted is required."),
+        ({"upserted": {}}, "upserted must be a list."),
+        ({"removed": None}, "removed is required."),
+        ({"removed": [str(uuid.uuid4()), 7]}, "removed must be a list of room_id strings."),
+    ):
+        response = api_client.post("/api/v1/app/status/", data={**delta, **change}, format="json")
+        assert response.status_code == 400
+        assert response.json()["detail"] == detail
+    missing = {k: v for k, v in delta.items() if k != "removed"}
+    assert api_client.post("/api/v1/app/status/", data=missing, format="json").json()["detail"] == "removed is required."
+    assert get_server_room_status(server_id)["version"] == 1
+
+    response = api_client.post("/api/v1/app/status/", data={**delta, "removed": ["not-a-room"]}, format="json")
+    assert response.status_code == 204
+    assert get_server_room_status(server_id)["version"] == 2
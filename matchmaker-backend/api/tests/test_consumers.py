@@ -0,0 +1,106 @@
+import asyncio
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import activity_store, ws_notify
+from api.consumers import MatchmakerUpdatesConsumer
+
+
+async def _connect():
+    comm = WebsocketCommunicator(MatchmakerUpdatesConsumer.as_asgi(), "/ws/matchmaker/")
+    connected, _ = await comm.connect()
+    assert connected
+    return comm
+
+
+def test_scoped_events_reach_only_subscribers(settings):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.MATCHMAKER_NOTIFY_WINDOW_SECONDS = 0
+    app_id, server_id, other_server = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def run():
+        watcher, bystander = await _connect(), await _connect()
+        await watcher.send_json_to({"type": "subscribe", "app_ids": [app_id], "server_ids": [server_id, "bad"]})
+        await bystander.send_json_to({"type": "subscribe", "server_ids": [other_server]})
+        await asyncio.sleep(0.05)
+
+        await sync_to_async(ws_notify.notify_online_users_changed)(app_id, server_id)
+        await sync_to_async(ws_notify.notify_servers_changed)(app_id)
+        await sync_to_async(ws_notify.notify_apps_changed)()
+        assert await watcher.receive_json_from() == {"kind": "online_users", "app_id": app_id, "server_id": server_id}
+        assert await watcher.receive_json_from() == {"kind": "servers", "app_id": app_id}
+        assert await watcher.receive_json_from() == {"kind": "apps"}
+        assert await bystander.receive_json_from() == {"kind": "apps"}
+        assert await bystander.receive_nothing()
+
+        await watcher.send_json_to({"type": "unsubscribe", "server_ids": [server_id]})
+        await asyncio.sleep(0.05)
+        await sync_to_async(ws_notify.notify_online_users_changed)(app_id, server_id)
+        assert await watcher.receive_nothing()
+        await watcher.disconnect()
+        await bystander.disconnect()
+
+    asyncio.run(run())
+
+
+def test_notifications_are_coalesced_and_sent_only_when_online_set_changes(settings, monkeypatch):
+    settings.MATCHMAKER_NOTIFY_WINDOW_SECONDS = 60
+    monkeypatch.setattr(ws_notify, "_pending", {})
+    monkeypatch.setattr(ws_notify, "_last_online", {})
+    monkeypatch.setattr(ws_notify, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(activity_store, "_store", activity_store.InMemoryActivityStore())
+    sent = []
+    monkeypatch.setattr(ws_notify, "_send", lambda group, text: sent.append(json.loads(text)["kind"]))
+    app_id, server_id = uuid.uuid4(), uuid.uuid4()
+
+    activity_store.record_activity(app_id, server_id, uuid.uuid4())
+    for _ in range(5):
+        ws_notify.notify_online_users_changed(app_id, server_id)
+        ws_notify.notify_servers_changed(app_id)
+    assert sent == []
+    ws_notify.flush()
+    assert sorted(sent) == ["online_users", "servers"]
+
+    sent.clear()
+    ws_notify.notify_online_users_changed(app_id, server_id)  # same user heartbeating again
+    ws_notify.flush()
+    assert sent == []
+
+    activity_store.record_activity(app_id, server_id, uuid.uuid4())
+    ws_notify.notify_online_users_changed(app_id, server_id)
+    ws_notify.flush()
+    assert sent == ["online_users"]
+
+
+def test_payload_subscribers_get_online_users_in_the_event(settings, monkeypatch):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.MATCHMAKER_NOTIFY_WINDOW_SECONDS = 0
+    settings.MATCHMAKER_NOTIFY_PAYLOADS = True
+    monkeypatch.setattr(activity_store, "_store", activity_store.InMemoryActivityStore())
+    monkeypatch.setattr(ws_notify, "get_usernames", lambda user_ids: {uid: "alice" for uid in user_ids})
+    app_id, server_id, user_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    token = AccessToken()
+    token["user_id"] = str(uuid.uuid4())
+    ping = {"kind": "online_users", "app_id": app_id, "server_id": server_id}
+
+    async def run():
+        full, plain, forged = await _connect(), await _connect(), await _connect()
+        await full.send_json_to({"type": "subscribe", "server_ids": [server_id], "payloads": True, "token": str(token)})
+        await plain.send_json_to({"type": "subscribe", "server_ids": [server_id]})
+        await forged.send_json_to({"type": "subscribe", "server_ids": [server_id], "payloads": True, "token": "x"})
+        await asyncio.sleep(0.05)
+
+        await sync_to_async(activity_store.record_activity)(app_id, server_id, user_id)
+        await sync_to_async(ws_notify.notify_online_users_changed)(app_id, server_id)
+        assert await full.receive_json_from() == {**ping, "users": [{"user_id": user_id, "username": "alice"}]}
+        assert await plain.receive_json_from() == ping
+        assert await forged.receive_json_from() == ping
+        for comm in (full, plain, forged):
+            assert await comm.receive_nothing()
+            await comm.disconnect()
+
+    asyncio.run(run())
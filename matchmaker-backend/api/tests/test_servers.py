@@ -124,3 +124,89 @@ def test_server_detail_only_creator_can_update(authenticated_client, api_client)
     )
     assert response.status_code == 200
     assert response.json()["server_name"] == "Updated"
+
+
+@pytest.mark.django_db
+def test_server_list_etag_changes_only_when_servers_change(authenticated_client):
+    from api.server_store import add_server, set_server_room_status
+
+    user, client = authenticated_client()
+    app = App.objects.create(name="A", description="", created_by=user, app_secret="x")
+    server = add_server(app_id=app.app_id, server_name="S")
+    url = f"/api/v1/apps/{app.app_id}/servers/"
+
+    first = client.get(url)
+    etag = first["ETag"]
+    assert first.status_code == 200 and [s["server_name"] for s in first.json()] == ["S"]
+    assert client.get(url)["ETag"] == etag
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(url, HTTP_IF_NONE_MATCH=f'"other", {etag}').status_code == 304
+    assert client.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code == 304
+    assert client.get(url, HTTP_IF_NONE_MATCH="*").status_code == 304
+    assert client.get(url, HTTP_IF_NONE_MATCH='"other", W/"other"').status_code == 200
+
+    set_server_room_status(server["server_id"], [{"room_id": "r", "capacity": 2, "current_players": []}])
+    changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200 and changed["ETag"] != etag
+    assert changed.json()[0]["room_status"]["rooms"][0]["room_id"] == "r"
+
+    etag = changed["ETag"]
+    user.username = "renamed"
+    user.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_server_list_follows_renames_and_deletes_after_username_cache_expiry(authenticated_client):
+    from django.core.cache import cache
+
+    from api.server_store import add_server, set_server_room_status
+    from api.username_cache import _key
+
+    user, client = authenticated_client()
+    app = App.objects.create(name="A", description="", created_by=user, app_secret="x")
+    player = User.objects.create_user(email="p@x.com", username="old", password="p")
+    server = add_server(app_id=app.app_id, server_name="S")
+    set_server_room_status(server["server_id"], [
+        {"room_id": "r", "capacity": 2, "current_players": [str(player.user_id)]},
+    ])
+    url = f"/api/v1/apps/{app.app_id}/servers/"
+
+    def player_name(response):
+        return response.json()[0]["room_status"]["rooms"][0]["current_players"][0]["username"]
+
+    first = client.get(url)
+    assert player_name(first) == "old"
+    cache.delete(_key(str(player.user_id)))  # the username cache entry expired
+
+    player.username = "new"
+    player.save()
+    renamed = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert renamed.status_code == 200 and player_name(renamed) == "new"
+
+    player.delete()
+    deleted = client.get(url, HTTP_IF_NONE_MATCH=renamed["ETag"])
+    assert deleted.status_code == 200 and player_name(deleted) == ""
+
+
+@pytest.mark.django_db
+def test_servers_event_carries_rendered_list_when_payloads_enabled(authenticated_client, settings, monkeypatch):
+    import json
+
+    from api import ws_notify
+    from api.server_store import add_server
+
+    settings.MATCHMAKER_NOTIFY_WINDOW_SECONDS = 0
+    settings.MATCHMAKER_NOTIFY_PAYLOADS = True
+    sent = {}
+    monkeypatch.setattr(ws_notify, "_send", lambda group, text: sent.__setitem__(group, json.loads(text)))
+    user, client = authenticated_client()
+    app = App.objects.create(name="A", description="", created_by=user, app_secret="x")
+    add_server(app_id=app.app_id, server_name="S")
+
+    ws_notify.notify_servers_changed(app.app_id)
+
+    full = sent[f"matchmaker_app.{app.app_id}.full"]
+    assert sent[f"matchmaker_app.{app.app_id}"] == {"kind": "servers", "app_id": str(app.app_id)}
+    assert full["servers"] == client.get(f"/api/v1/apps/{app.app_id}/servers/").json()
+    assert full["etag"] == client.get(f"/api/v1/apps/{app.app_id}/servers/")["ETag"]
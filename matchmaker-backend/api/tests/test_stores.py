@@ -0,0 +1,79 @@
+import pytest
+
+from api.room_store import InMemoryRoomStore, RedisRoomStore
+from api.server_store import InMemoryServerStore, RedisServerStore
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, use_store_backend):
+    use_store_backend(request.param)
+    return request.param
+
+
+def _server_store(backend):
+    return RedisServerStore("redis://fake") if backend == "redis" else InMemoryServerStore()
+
+
+def _room_store(backend):
+    return RedisRoomStore("redis://fake") if backend == "redis" else InMemoryRoomStore()
+
+
+def _server(app_id, server_id):
+    return {"server_id": server_id, "app_id": app_id, "server_name": server_id, "created_at": server_id, "room_config": {}}
+
+
+def _room(app_id, server_id, room_id):
+    return {"room_id": room_id, "app_id": app_id, "server_id": server_id, "created_at": room_id, "member_ids": ["u"]}
+
+
+def test_server_store_indexes_follow_add_update_delete(backend):
+    store = _server_store(backend)
+    store.add(_server("a", "s1"))
+    store.add(_server("a", "s2"))
+    store.add(_server("b", "s3"))
+
+    assert [s["server_id"] for s in store.list_for_app("a")] == ["s1", "s2"]
+    assert store.get("b", "s1") is None
+    assert store.update("a", "s2", {"server_name": "renamed", "port": None})["server_name"] == "renamed"
+    assert store.get("a", "s2")["server_name"] == "renamed"
+    assert store.update("b", "s2", {"server_name": "x"}) is None
+    assert store.app_id_for("s3") == "b"
+
+    assert store.delete("a", "s1")
+    assert not store.delete("a", "s1")
+    assert not store.delete("a", "s3")
+    assert [s["server_id"] for s in store.list_for_app("a")] == ["s2"]
+    assert store.delete("b", "s3")
+    assert store.list_for_app("b") == []
+    assert store.app_id_for("s3") is None
+
+
+def test_server_store_room_status_deltas_need_the_stored_version(backend):
+    store = _server_store(backend)
+    assert not store.apply_room_status_delta("s", 1, 2, [], [], "t0")
+    store.set_room_status("s", [{"room_id": "r1"}], None, "t0")
+    assert not store.apply_room_status_delta("s", 1, 2, [], [], "t1")  # no version to build on
+
+    store.set_room_status("s", [{"room_id": "r1"}, {"room_id": "r2"}], 1, "t1")
+    assert store.apply_room_status_delta("s", 1, 2, [{"room_id": "r3"}], ["r1"], "t2")
+    assert not store.apply_room_status_delta("s", 1, 3, [], ["r2"], "t3")
+    status = store.get_room_status("s")
+    assert (status["version"], status["updated_at"]) == (2, "t2")
+    assert sorted(r["room_id"] for r in status["rooms"]) == ["r2", "r3"]
+    assert store.get_room_status("other") is None
+
+
+def test_room_store_indexes_rooms_by_id_and_server(backend):
+    store = _room_store(backend)
+    store.add(_room("a", "s1", "r1"))
+    store.add(_room("a", "s1", "r2"))
+    store.add(_room("a", "s2", "r3"))
+
+    assert [r["room_id"] for r in store.list_for_server("a", "s1")] == ["r1", "r2"]
+    assert store.count_for_server("a", "s2") == 1
+    assert store.count_for_server("b", "s1") == 0
+    assert store.add_member("r3", "v")
+    assert store.add_member("r3", "v")
+    assert store.list_for_server("a", "s2")[0]["member_ids"] == ["u", "v"]
+    assert not store.add_member("missing", "v")
+    assert store.get("missing") is None
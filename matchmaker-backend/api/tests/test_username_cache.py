@@ -0,0 +1,70 @@
+import pytest
+from django.core.cache import cache
+
+from api.models import App, User
+from api.server_store import add_server, set_server_room_status
+from api.username_cache import get_usernames
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_lookups_query_only_misses_and_follow_renames(django_assert_num_queries):
+    alice = User.objects.create_user(email="a@x.com", username="alice", password="p")
+    bob = User.objects.create_user(email="b@x.com", username="bob", password="p")
+    cache.clear()
+
+    with django_assert_num_queries(1):
+        assert get_usernames([alice.user_id, "not-a-uuid"]) == {str(alice.user_id): "alice"}
+    with django_assert_num_queries(1):
+        assert get_usernames([alice.user_id, bob.user_id]) == {str(alice.user_id): "alice", str(bob.user_id): "bob"}
+    with django_assert_num_queries(0):
+        assert get_usernames([str(alice.user_id), str(bob.user_id)])[str(bob.user_id)] == "bob"
+
+    bob.username = "robert"
+    bob.save()
+    with django_assert_num_queries(0):
+        assert get_usernames([bob.user_id]) == {str(bob.user_id): "robert"}
+
+
+@pytest.mark.django_db
+def test_saves_only_signal_username_changes_without_extra_queries(django_assert_num_queries):
+    from api.username_cache import username_changed
+
+    changed = []
+    username_changed.connect(lambda sender, user_id, **kwargs: changed.append(user_id), weak=False, dispatch_uid="t")
+    try:
+        User.objects.create_user(email="a@x.com", username="alice", password="p")
+        alice = User.objects.get(username="alice")
+        alice.email = "alice@x.com"
+        with django_assert_num_queries(1):  # just the UPDATE
+            alice.save()
+        alice.username = "alicia"
+        with django_assert_num_queries(1):
+            alice.save()
+        alice.save()
+        assert changed == [str(alice.user_id)]
+    finally:
+        username_changed.disconnect(dispatch_uid="t")
+
+
+@pytest.mark.django_db
+def test_server_list_resolves_usernames_for_all_servers_at_once(authenticated_client, django_assert_num_queries):
+    user, client = authenticated_client()
+    app = App.objects.create(name="A", description="", created_by=user, app_secret="x")
+    players = [User.objects.create_user(email=f"p{i}@x.com", username=f"p{i}", password="p") for i in range(3)]
+    for i, player in enumerate(players):
+        server = add_server(app_id=app.app_id, server_name=f"S{i}")
+        set_server_room_status(server["server_id"], [
+            {"room_id": f"room-{i}", "capacity": 2, "current_players": [str(player.user_id)]},
+        ])
+    cache.clear()
+
+    with django_assert_num_queries(3):  # the authenticated user, the app, then every player's username at once
+        response = client.get(f"/api/v1/apps/{app.app_id}/servers/")
+    assert response.status_code == 200
+    names = {s["server_name"]: s["room_status"]["rooms"][0]["current_players"][0]["username"] for s in response.json()}
+    assert names == {"S0": "p0", "S1": "p1", "S2": "p2"}
@@ -17,6 +17,7 @@ urlpatterns = [
     path("auth/app-token/", app_auth_views.app_token),
     path("app/server/", app_views.app_server_create),
     path("app/activity/", app_views.app_activity),
+    path("app/activity/batch/", app_views.app_activity_batch),
     path("app/status/", app_views.app_status),
     path("app/online-users/", app_views.app_online_users),
     path("apps/", app_views.app_list),
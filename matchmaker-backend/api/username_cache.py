@@ -0,0 +1,74 @@
+"""
+user_id -> username lookups through the Django cache (shared by all workers when CACHES uses Redis), so room
+status and online-user enrichment do not query User on every request. Entries live USERNAME_CACHE_SECONDS and
+are rewritten whenever a User is saved (e.g. a username change) and dropped when it is deleted.
+username_changed is sent when a saved username differs from the one the instance was loaded (or last saved)
+with, which does not depend on what is still cached and needs no extra query, and when a user is deleted.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from .models import User
+
+KEY_PREFIX = "username:"
+
+# Sent with user_id when a user's username changes or the user is deleted.
+username_changed = Signal()
+
+
+def _key(user_id: str) -> str:
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def get_usernames(user_ids) -> dict[str, str]:
+    """Return { user_id: username } for the given user_ids (str or UUID) that belong to existing users.
+    Only ids missing from the cache are looked up, in a single query. Malformed ids are ignored."""
+    ids = set()
+    for user_id in user_ids:
+        try:
+            ids.add(str(uuid.UUID(str(user_id))))
+        except (TypeError, ValueError):
+            continue
+    if not ids:
+        return {}
+    cached = cache.get_many([_key(uid) for uid in ids])
+    usernames = {key[len(KEY_PREFIX):]: name for key, name in cached.items()}
+    missing = ids - usernames.keys()
+    if missing:
+        found = {
+            str(u["user_id"]): u["username"] or ""
+            for u in User.objects.filter(user_id__in=missing).values("user_id", "username")
+        }
+        cache.set_many({_key(uid): name for uid, name in found.items()}, getattr(settings, "USERNAME_CACHE_SECONDS", 300))
+        usernames.update(found)
+    return usernames
+
+
+_DEFERRED = object()
+
+
+@receiver(post_init, sender=User)
+def _remember_loaded_username(sender, instance, **kwargs):
+    """Note the username the instance starts with (_DEFERRED if it was not loaded)."""
+    instance._loaded_username = instance.__dict__.get("username", _DEFERRED)
+
+
+@receiver(post_save, sender=User)
+def _refresh_username(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and "username" not in update_fields:
+        return
+    cache.set(_key(str(instance.user_id)), instance.username or "", getattr(settings, "USERNAME_CACHE_SECONDS", 300))
+    loaded = getattr(instance, "_loaded_username", _DEFERRED)
+    instance._loaded_username = instance.username
+    if not created and loaded != instance.username:
+        username_changed.send(sender=User, user_id=str(instance.user_id))
+
+
+@receiver(post_delete, sender=User)
+def _drop_username(sender, instance, **kwargs):
+    cache.delete(_key(str(instance.user_id)))
+    username_changed.send(sender=User, user_id=str(instance.user_id))
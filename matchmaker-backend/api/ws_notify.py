@@ -1,33 +1,151 @@
 """
 Broadcast WebSocket events when apps, servers, or online users change.
 Call from sync code (views, activity_store) so the matchmaker UI updates immediately.
+"apps" events go to every client; "servers" and "online_users" only to clients subscribed to that app or server.
+
+Events are queued, not sent from the request thread: a background thread sends them
+MATCHMAKER_NOTIFY_WINDOW_SECONDS after the first one arrives, and identical (kind, app_id, server_id) events
+queued within that window go out once. An online_users event is only sent if the server's online set differs
+from the one last announced, so heartbeats from users who were already online cost nothing.
+MATCHMAKER_NOTIFY_WINDOW_SECONDS = 0 sends each event immediately from the caller (still with the online check).
+
+Each event is serialized once and group_send carries the text, so clients get the same bytes without
+re-encoding per connection. With MATCHMAKER_NOTIFY_PAYLOADS on, scope events are also sent to the ".full" groups
+(see api.consumers) with the new data: the app's rendered server list (shared with the server_list response
+cache) or the server's online users with usernames.
 """
+import json
+import logging
+import threading
+import time
+
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections
 
-from api.consumers import MATCHMAKER_GROUP
+from api.activity_store import get_online_user_ids
+from api.consumers import MATCHMAKER_GROUP, app_group, payload_group, server_group
+from api.username_cache import get_usernames
 
+logger = logging.getLogger(__name__)
 
-def _send(event: dict) -> None:
+# (kind, app_id, server_id) -> (group, event), waiting for the next flush
+_pending: dict[tuple, tuple[str, dict]] = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher: threading.Thread | None = None
+# (app_id, server_id) -> online user_ids last announced for that server
+_last_online: dict[tuple[str, str], frozenset] = {}
+
+
+def _send(group: str, text: str) -> None:
+    """group_send an already serialized event."""
     try:
         from channels.layers import get_channel_layer
 
         layer = get_channel_layer()
         if layer:
-            async_to_sync(layer.group_send)(MATCHMAKER_GROUP, {"type": "matchmaker.update", **event})
+            async_to_sync(layer.group_send)(group, {"type": "matchmaker.update", "text": text})
     except Exception:
         pass  # Don't break HTTP flow if WS broadcast fails
 
 
+def _online_user_ids_if_changed(app_id: str, server_id: str) -> list[str] | None:
+    """The server's online user_ids, or None if they are the same set as last announced."""
+    online = [str(uid) for uid in get_online_user_ids(app_id, server_id)]
+    current = frozenset(online)
+    with _lock:
+        previous = _last_online.pop((app_id, server_id), None)
+        if current:
+            _last_online[(app_id, server_id)] = current
+    return online if current != previous else None
+
+
+def _servers_payload(event: dict) -> str:
+    from api.app_views import render_server_list  # app_views imports this module
+
+    etag, body = render_server_list(event["app_id"])
+    # Splice the cached list bytes in rather than decoding and re-encoding them.
+    return json.dumps({**event, "etag": etag})[:-1] + ', "servers": ' + body.decode("utf-8") + "}"
+
+
+def _online_users_payload(event: dict, user_ids: list[str]) -> str:
+    usernames = get_usernames(user_ids)
+    users = [{"user_id": uid, "username": usernames.get(uid, "")} for uid in user_ids]
+    return json.dumps({**event, "users": users})
+
+
+def _emit(key: tuple, group: str, event: dict) -> None:
+    kind, app_id, server_id = key
+    online = None
+    if kind == "online_users":
+        online = _online_user_ids_if_changed(app_id, server_id)
+        if online is None:
+            return
+    _send(group, json.dumps(event))
+    if kind == "apps" or not getattr(settings, "MATCHMAKER_NOTIFY_PAYLOADS", False):
+        return
+    if kind == "servers":
+        _send(payload_group(group), _servers_payload(event))
+    else:
+        _send(payload_group(group), _online_users_payload(event, online))
+
+
+def flush() -> None:
+    """Send every queued event now."""
+    with _lock:
+        pending = _pending.copy()
+        _pending.clear()
+    for key, (group, event) in pending.items():
+        try:
+            _emit(key, group, event)
+        except Exception:
+            logger.exception("Failed to send matchmaker update %s", key)
+
+
+def _flush_loop() -> None:
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        time.sleep(getattr(settings, "MATCHMAKER_NOTIFY_WINDOW_SECONDS", 0.25))
+        flush()
+        close_old_connections()  # payloads query the database from this thread
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="matchmaker-notify", daemon=True)
+            _flusher.start()
+
+
+def _queue(key: tuple, group: str, event: dict) -> None:
+    if getattr(settings, "MATCHMAKER_NOTIFY_WINDOW_SECONDS", 0.25) <= 0:
+        _emit(key, group, event)
+        return
+    with _lock:
+        _pending[key] = (group, event)
+    _ensure_flusher()
+    _wakeup.set()
+
+
 def notify_apps_changed() -> None:
     """Call after app create/update/delete."""
-    _send({"kind": "apps"})
+    _queue(("apps", None, None), MATCHMAKER_GROUP, {"kind": "apps"})
 
 
 def notify_servers_changed(app_id: str) -> None:
     """Call after server add/update/delete for an app."""
-    _send({"kind": "servers", "app_id": str(app_id)})
+    app_id = str(app_id)
+    _queue(("servers", app_id, None), app_group(app_id), {"kind": "servers", "app_id": app_id})
 
 
 def notify_online_users_changed(app_id: str, server_id: str) -> None:
     """Call after activity is recorded for a server (user came online or heartbeat)."""
-    _send({"kind": "online_users", "app_id": str(app_id), "server_id": str(server_id)})
+    app_id, server_id = str(app_id), str(server_id)
+    _queue(
+        ("online_users", app_id, server_id),
+        server_group(server_id),
+        {"kind": "online_users", "app_id": app_id, "server_id": server_id},
+    )
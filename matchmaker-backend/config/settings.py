@@ -85,6 +85,30 @@ else:
         "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
     }
 
+# Where servers, reported room status, matchmaker rooms and online presence live (api.server_store, room_store,
+# activity_store): "memory" (this process only) or "redis" (shared, needed with more than one worker).
+# Defaults to redis when REDIS_URL is set.
+MATCHMAKER_STORE = os.environ.get("MATCHMAKER_STORE", "redis" if _redis_url else "memory").strip().lower()
+MATCHMAKER_REDIS_URL = _redis_url
+
+# WebSocket updates (api.ws_notify) are sent from a background thread this many seconds after the first one is
+# queued; repeats of the same event within the window go out once. 0 sends every event immediately.
+MATCHMAKER_NOTIFY_WINDOW_SECONDS = float(os.environ.get("MATCHMAKER_NOTIFY_WINDOW_SECONDS", "0.25"))
+# Also push the changed data (server list, online users) to clients that subscribe with payloads and a user token.
+MATCHMAKER_NOTIFY_PAYLOADS = os.environ.get("MATCHMAKER_NOTIFY_PAYLOADS", "false").lower() in ("true", "1", "yes")
+
+# Django cache (api.username_cache): Redis when REDIS_URL is set so all workers share it, else this process only.
+if _redis_url:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": _redis_url},
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+# How long a user_id -> username lookup is cached (entries are also refreshed whenever the user is saved).
+USERNAME_CACHE_SECONDS = int(os.environ.get("USERNAME_CACHE_SECONDS", "300"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -27,3 +27,24 @@ def authenticated_client(api_client):
         return user, api_client
 
     return _make
+
+
+@pytest.fixture
+def use_store_backend(settings, monkeypatch):
+    """Select the MATCHMAKER_STORE backend for server_store, room_store and activity_store.
+    "redis" runs against an in-process fakeredis server, fresh for each test."""
+    from api import activity_store, room_store, server_store
+
+    def _use(backend):
+        settings.MATCHMAKER_STORE = backend
+        if backend == "redis":
+            import fakeredis
+            import redis
+
+            server = fakeredis.FakeServer()
+            settings.MATCHMAKER_REDIS_URL = "redis://fake"
+            monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+        for module in (activity_store, room_store, server_store):
+            monkeypatch.setattr(module, "_store", None)
+
+    return _use
@@ -3,14 +3,22 @@
  * when apps, servers, or online users change so the UI updates immediately.
  * Started from main.tsx with the app's QueryClient so no React hooks are used
  * (avoids "invalid hook call" / "dispatcher is null" on some environments).
+ *
+ * Server and online-user events are only sent for subscribed apps and servers. The subscriptions follow
+ * the server queries in the cache: an app is subscribed while any of its server queries exists, a server
+ * while its online-users query exists. When logged in, subscriptions ask for payloads; if the backend has
+ * them enabled, events carry the new server list or online users and are written straight into the cache
+ * instead of triggering a refetch.
  */
 import type { QueryClient } from '@tanstack/react-query'
+import { getAccessToken } from './authStorage'
+import type { OnlineUser, Server } from './client'
 import { queryKeys } from './keys'
 
 type WsMessage =
   | { kind: 'apps' }
-  | { kind: 'servers'; app_id: string }
-  | { kind: 'online_users'; app_id: string; server_id: string }
+  | { kind: 'servers'; app_id: string; servers?: Server[] }
+  | { kind: 'online_users'; app_id: string; server_id: string; users?: OnlineUser[] }
 
 function getWsUrl(): string {
   const envUrl = import.meta.env.VITE_WS_URL as string | undefined
@@ -21,23 +29,80 @@ function getWsUrl(): string {
   return `${protocol}//${base.host}/ws/matchmaker/`
 }
 
+type Scopes = { appIds: Set<string>; serverIds: Set<string> }
+
+/** App and server ids that cached queries want updates for. */
+function wantedScopes(queryClient: QueryClient): Scopes {
+  const scopes: Scopes = { appIds: new Set(), serverIds: new Set() }
+  const [api, apps, servers] = queryKeys.apps.servers(null)
+  for (const query of queryClient.getQueryCache().getAll()) {
+    const key = query.queryKey
+    if (key[0] !== api || key[1] !== apps || key[2] !== servers || typeof key[3] !== 'string') continue
+    scopes.appIds.add(key[3])
+    if (key[4] === 'onlineUsers' && typeof key[5] === 'string') scopes.serverIds.add(key[5])
+  }
+  return scopes
+}
+
+function difference(a: Set<string>, b: Set<string>): string[] {
+  return [...a].filter((id) => !b.has(id))
+}
+
 export function startMatchmakerWebSocket(queryClient: QueryClient): void {
   const url = getWsUrl()
   if (!url) return
 
   let ws: WebSocket
   let reconnectTimeout: ReturnType<typeof setTimeout>
+  // What the current connection is subscribed to.
+  let subscribed: Scopes = { appIds: new Set(), serverIds: new Set() }
+
+  const syncSubscriptions = () => {
+    if (!ws || ws.readyState !== WebSocket.OPEN) return
+    const wanted = wantedScopes(queryClient)
+    const add = {
+      app_ids: difference(wanted.appIds, subscribed.appIds),
+      server_ids: difference(wanted.serverIds, subscribed.serverIds),
+    }
+    const drop = {
+      app_ids: difference(subscribed.appIds, wanted.appIds),
+      server_ids: difference(subscribed.serverIds, wanted.serverIds),
+    }
+    if (add.app_ids.length || add.server_ids.length) {
+      const token = getAccessToken()
+      ws.send(JSON.stringify({ type: 'subscribe', ...add, ...(token ? { payloads: true, token } : {}) }))
+    }
+    if (drop.app_ids.length || drop.server_ids.length) ws.send(JSON.stringify({ type: 'unsubscribe', ...drop }))
+    subscribed = wanted
+  }
+
+  queryClient.getQueryCache().subscribe((event) => {
+    if (event.type === 'added' || event.type === 'removed') syncSubscriptions()
+  })
 
   const connect = () => {
     ws = new WebSocket(url)
 
+    ws.onopen = () => {
+      subscribed = { appIds: new Set(), serverIds: new Set() }
+      syncSubscriptions()
+    }
+
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data) as WsMessage
         if (msg.kind === 'apps') {
           queryClient.invalidateQueries({ queryKey: queryKeys.apps.all })
+        } else if (msg.kind === 'servers' && msg.app_id && msg.servers) {
+          queryClient.setQueryData(queryKeys.apps.servers(msg.app_id), msg.servers)
+          for (const server of msg.servers) {
+            const key = [...queryKeys.apps.servers(msg.app_id), server.server_id]
+            if (queryClient.getQueryData(key) !== undefined) queryClient.setQueryData(key, server)
+          }
         } else if (msg.kind === 'servers' && msg.app_id) {
           queryClient.invalidateQueries({ queryKey: queryKeys.apps.servers(msg.app_id) })
+        } else if (msg.kind === 'online_users' && msg.app_id && msg.server_id && msg.users) {
+          queryClient.setQueryData(queryKeys.apps.serverOnlineUsers(msg.app_id, msg.server_id), msg.users)
         } else if (msg.kind === 'online_users' && msg.app_id && msg.server_id) {
           queryClient.invalidateQueries({
             queryKey: queryKeys.apps.serverOnlineUsers(msg.app_id, msg.server_id),